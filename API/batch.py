@@ -0,0 +1,214 @@
+"""
+Batch questions: POST /chat/batch and a CLI.
+
+Input is JSONL, one question per line:
+    {"id": "q1", "question": "How many flights were delayed yesterday?"}
+"question" may also be called "text"/"user_text"; logged requests with
+"title"/"body" are accepted too. "id" (or "request_id") defaults to the line number.
+
+Output is NDJSON in input order, streamed as soon as the next line is ready:
+    {"index": 0, "id": "q1", "ok": true, "latency_ms": 812.4, "sql": "...", "row_count": 10, ...}
+
+mode="db"   runs the db pipeline directly (LLM/db_pipeline.py), catalog loaded once per batch
+mode="chat" runs a full chat turn (router + agent), one throw-away session per question,
+            dropped with its state when the question is done
+LLM calls run with "background" priority, so interactive /chat traffic goes first.
+
+CLI (in-process, no server needed):
+    python -m API.batch questions.jsonl --concurrency 4 --mode db > results.ndjson
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+from uuid import uuid4
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from API.config import settings
+from DB.columnar import payload_row_count
+from DB.profiles import get_db_profile
+from DB.row_encoding import dumps as dumps_json, dumps_bytes
+from LLM.admission import LLMOverloadedError, llm_priority
+from LLM.db_pipeline import run_db_pipeline
+from LLM.make_llm import make_llm
+from store.request_ctx import current_session_id
+
+batch_router = APIRouter()
+logger = logging.getLogger("orchestrator")
+
+_QUESTION_KEYS = ("question", "text", "user_text")
+
+
+def parse_batch_lines(text: str) -> List[Dict[str, Any]]:
+    """
+    JSONL -> [{"index", "id", "question"}]; a bad line becomes {"index", "id", "error"}.
+    """
+    items: List[Dict[str, Any]] = []
+    for lineno, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        item: Dict[str, Any] = {"index": len(items), "id": str(lineno)}
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            items.append({**item, "error": "invalid JSON line"})
+            continue
+        if not isinstance(obj, dict):
+            items.append({**item, "error": "line is not a JSON object"})
+            continue
+
+        item["id"] = str(obj.get("id") or obj.get("request_id") or lineno)
+        question = next((obj[k] for k in _QUESTION_KEYS if obj.get(k)), None)
+        if question is None and obj.get("title"):
+            question = "\n".join(str(obj[k]) for k in ("title", "body") if obj.get(k))
+        if not question or not str(question).strip():
+            items.append({**item, "error": "no question in line"})
+            continue
+        items.append({**item, "question": str(question)})
+    return items
+
+
+def _db_result(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "ok": bool(payload.get("ok")),
+        "sql": payload.get("sql"),
+        "row_count": payload_row_count(payload),
+        "attempts": len(payload.get("attempts") or []),
+        "error": payload.get("error"),
+    }
+
+
+async def _run_one(
+    item: Dict[str, Any],
+    *,
+    mode: str,
+    answer_mode: str,
+    llm: Any,
+    schema_full: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"index": item["index"], "id": item["id"]}
+    if "error" in item:
+        return {**out, "ok": False, "error": item["error"], "latency_ms": 0.0}
+
+    start = time.perf_counter()
+    try:
+        with llm_priority("background"):
+            if mode == "db":
+                payload = await run_db_pipeline(llm, item["question"], schema_full=schema_full)
+                out.update(_db_result(payload))
+            else:
+                from API.chat import answer_chat_turn  # agent import is heavy; chat mode only
+                from tools.llm_tools import forget_session
+
+                session_id = uuid4().hex
+                token = current_session_id.set(session_id)
+                try:
+                    out["answer"] = await answer_chat_turn(item["question"], [], answer_mode)
+                    out["ok"] = True
+                finally:
+                    current_session_id.reset(token)
+                    forget_session(session_id)  # never used again
+    except LLMOverloadedError as e:
+        out.update(ok=False, error=str(e), overloaded=True)
+    except Exception as e:
+        logger.exception("batch question failed", extra={"batch_id": item["id"]})
+        out.update(ok=False, error=f"{type(e).__name__}: {e}")
+    out["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return out
+
+
+async def run_batch(
+    items: List[Dict[str, Any]],
+    *,
+    concurrency: int = 4,
+    mode: str = "db",
+    answer_mode: Optional[str] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Runs questions with at most `concurrency` in flight; yields results in input order.
+    """
+    answer_mode = answer_mode or settings.DEFAULT_ANSWER_MODE
+    llm = make_llm(None, 0) if mode == "db" else None
+    schema_full = None
+    if mode == "db" and any("question" in i for i in items):
+        # one catalog for the whole batch: every question shares its prompt/index caches
+        try:
+            schema_full = await get_db_profile().aschema_context()
+        except Exception as e:
+            logger.exception("batch: catalog load failed")
+            error = f"catalog load failed: {type(e).__name__}: {e}"
+            items = [{**i, "error": i.get("error", error)} for i in items]
+
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def guarded(item: Dict[str, Any]) -> Dict[str, Any]:
+        async with sem:
+            return await _run_one(item, mode=mode, answer_mode=answer_mode, llm=llm, schema_full=schema_full)
+
+    tasks = [asyncio.create_task(guarded(item)) for item in items]
+    try:
+        for task in tasks:
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()  # client went away: stop the rest
+
+
+@batch_router.post("/chat/batch")
+async def chat_batch(
+    request: Request,
+    concurrency: int = Query(4, ge=1),
+    mode: str = Query("db", pattern="^(db|chat)$"),
+    answer_mode: Optional[str] = Query(None, pattern="^(template|llm)$"),
+):
+    """
+    Body: JSONL (application/x-ndjson). Response: NDJSON stream, one line per question.
+    """
+    items = parse_batch_lines((await request.body()).decode("utf-8"))
+    if not items:
+        raise HTTPException(status_code=400, detail="no questions in body")
+    if len(items) > settings.BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=413, detail=f"batch is limited to {settings.BATCH_MAX_QUESTIONS} questions")
+    concurrency = min(concurrency, settings.BATCH_MAX_CONCURRENCY)
+
+    async def body() -> AsyncIterator[bytes]:
+        async for result in run_batch(items, concurrency=concurrency, mode=mode, answer_mode=answer_mode):
+            yield dumps_bytes(result) + b"\n"
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+async def _main_async(args: argparse.Namespace) -> None:
+    with open(args.path, encoding="utf-8") as f:
+        items = parse_batch_lines(f.read())
+
+    total = ok = 0
+    start = time.perf_counter()
+    async for result in run_batch(items, concurrency=args.concurrency, mode=args.mode, answer_mode=args.answer_mode):
+        total += 1
+        ok += bool(result.get("ok"))
+        sys.stdout.write(dumps_json(result) + "\n")
+        sys.stdout.flush()
+    elapsed = time.perf_counter() - start
+    print(f"{ok}/{total} ok in {elapsed:.1f}s", file=sys.stderr)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("path", help="JSONL file with questions")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--mode", choices=["db", "chat"], default="db")
+    ap.add_argument("--answer-mode", choices=["template", "llm"], default=None)
+    asyncio.run(_main_async(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
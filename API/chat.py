@@ -2,10 +2,14 @@ from store.SessionStore import ChatResponse,ChatRequest
 from store.SessionStore import session_store
 from fastapi import APIRouter, Request, HTTPException
 from langchain_core.messages import SystemMessage, HumanMessage
-from LLM.agent import AGENT_EXECUTOR
+from LLM.agent import AGENT_EXECUTOR, AGENT_EXECUTOR_TEMPLATE
+from LLM.answer_renderer import parse_db_payload, render_db_answer
+from LLM.router import route_request
+from LLM.admission import LLMOverloadedError
 from API.config import *
 import logging
-from store.request_ctx import current_session_id
+from store.request_ctx import current_db_profile, current_session_id
+from tools.llm_tools import session_db_profile
 from fastapi import HTTPException, Request
 
 
@@ -13,6 +17,25 @@ chat_router = APIRouter()
 logger = logging.getLogger("orchestrator")
 
 
+async def answer_chat_turn(user_text: str, history: list, answer_mode: str) -> str:
+    """
+    One chat turn: fast-path router first, tool-calling agent as fallback.
+    Expects current_session_id to be set by the caller.
+    """
+    # clear data requests skip the agent's tool-choice round-trip
+    answer = await route_request(user_text, answer_mode)
+    if answer is None:
+        executor = AGENT_EXECUTOR_TEMPLATE if answer_mode == "template" else AGENT_EXECUTOR
+        result = await executor.ainvoke(
+            {"input": user_text, "chat_history": history},
+        )
+        answer = result.get("output", "")
+        payload = parse_db_payload(answer) if answer_mode == "template" else None
+        if payload is not None:
+            answer = render_db_answer(payload)
+    return answer
+
+
 @chat_router.post("/chat", response_model=ChatResponse)
 async def chat(req: ChatRequest, request: Request):
     if not req.messages:
@@ -26,23 +49,23 @@ async def chat(req: ChatRequest, request: Request):
         key,
         []
     )
+    answer_mode = req.answer_mode or settings.DEFAULT_ANSWER_MODE
     token = current_session_id.set(session_id)
+    # run_sql / catalog / pools of this request follow the session's set_db_profile
+    profile_token = current_db_profile.set(session_db_profile(session_id))
     try:
-        result = await AGENT_EXECUTOR.ainvoke(
-            {"input": user_text, "chat_history": history},
-        )
+        answer = await answer_chat_turn(user_text, history, answer_mode)
+    except LLMOverloadedError:
+        raise  # 429/503 + Retry-After, see main.py
     except Exception as e:
         logger.exception(str(e))
         raise HTTPException(status_code=500, detail=str(e))
     finally:
+        current_db_profile.reset(profile_token)
         current_session_id.reset(token)
 
 
 
-    answer = result.get("output", "")
-
-
-
     return ChatResponse(
         session_id=session_id,
         message_key= key,
@@ -1,10 +1,67 @@
 from fastapi import APIRouter
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Dict, List
 
 class Settings(BaseSettings):
     # DB
     DATABASE_URL: str
-    PG_STATEMENT_TIMEOUT_MS: int = 3
+    PG_STATEMENT_TIMEOUT_MS: int = 2000  # static timeout; adaptive: the start when nothing is known
+
+    # adaptive statement_timeout for generated SQL (DB/timeout_policy.py)
+    PG_TIMEOUT_ADAPTIVE: bool = True
+    PG_TIMEOUT_MIN_MS: int = 200
+    PG_TIMEOUT_MAX_MS: int = 30000
+    PG_TIMEOUT_HEADROOM: float = 3.0  # timeout = estimated runtime * headroom
+    PG_TIMEOUT_ESCALATION: float = 2.0  # after a timeout the next attempt gets this much more
+    PG_TIMEOUT_EXPLAIN: bool = True  # EXPLAIN cost estimate for fingerprints without history; only raises the default
+    PG_TIMEOUT_MS_PER_COST: float = 0.01  # planner cost unit -> ms, calibrate per server
+    PG_REQUEST_DB_BUDGET_MS: int = 20000  # total DB time of one request across attempts
+
+    # filter literals -> bind parameters of prepared statements (DB/sql_params.py)
+    PG_LIFT_LITERALS: bool = True  # off behind a transaction-mode pgbouncer < 1.21
+    PG_PREPARED_MAX: int = 100  # prepared statements kept per pooled connection
+
+    # named databases for set_db_profile, JSON: {"dev": "postgresql://...", "prod": "..."}
+    # "default" is always DATABASE_URL (DB/profiles.py)
+    DB_PROFILES: Dict[str, str] = {}
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 4  # per profile
+    DB_PROFILE_IDLE_TTL_S: float = 900.0  # idle profiles close their pool and drop caches
+    DB_MAX_OPEN_PROFILES: int = 8  # above this the least recently used idle profile is closed
+    DB_CATALOG_TTL_S: float = 300.0  # catalog cache per profile; 0 = load on every request
+
+    # read replicas per profile, JSON: {"default": ["postgresql://replica1/...", ...]} (DB/replicas.py)
+    # generated SELECTs and catalog queries go there; writes/healthcheck stay on the primary
+    DB_REPLICAS: Dict[str, List[str]] = {}
+    DB_REPLICA_POLICY: str = "round_robin"  # round_robin | least_connections
+    DB_REPLICA_MAX_LAG_S: float | None = None  # replicas lagging more are skipped
+    DB_REPLICA_CHECK_INTERVAL_S: float = 10.0
+    DB_REPLICA_RETRY_AFTER_S: float = 30.0  # a failed replica is skipped this long
+
+    # db pipeline payload: result = {"columns", "types", "rows"} instead of rows_preview dicts (DB/columnar.py)
+    RESULT_COLUMNAR: bool = False
+
+    # aggregates over the full result for the answer step (DB/result_profile.py)
+    RESULT_PROFILE: str = "auto"  # auto (when the preview is full) | always | off
+    RESULT_PROFILE_TIMEOUT_MS: int = 1500
+    RESULT_PROFILE_TOP_K: int = 5
+    RESULT_PROFILE_MAX_COLUMNS: int = 16
+
+    # cached results of run_sql / run_aggregate (DB/result_cache.py)
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_TTL_S: float = 60.0
+    # per table group, fnmatch on "schema.table" or "table", JSON: {"ref.*": 3600, "*.flights": 15}; 0 = never cache
+    RESULT_CACHE_TABLE_TTLS: Dict[str, float] = {}
+    RESULT_CACHE_INVALIDATION: str = "pg_stat"  # pg_stat | notify | none
+    RESULT_CACHE_MARKER_CHECK_S: float = 5.0  # pg_stat: how often table counters are re-read
+    RESULT_CACHE_NOTIFY_CHANNEL: str = "result_cache"
+    RESULT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # serialized size of all entries
+    RESULT_CACHE_MAX_ENTRY_BYTES: int = 4 * 1024 * 1024
+
+    # runtime stats per SQL fingerprint, GET /stats/queries (store/query_stats.py)
+    QUERY_STATS_PATH: str | None = "logs/query_stats.sqlite3"  # None = in memory only
+    QUERY_STATS_FLUSH_S: float = 30.0
+    QUERY_STATS_WINDOW: int = 256  # recent runtimes kept per fingerprint for p50/p95
     # LLM
 
     LLM_PROVIDER: str = "openai"  # ollama | openai
@@ -17,6 +74,52 @@ class Settings(BaseSettings):
     DEFAULT_LLM_MODEL: str = "ministral-3:8B"
     DEFAULT_TEMPERATURE: float = 0.6
     OLLAMA_BASE_URL: str = "http://127.0.0.1:11434"
+    OLLAMA_KEEP_ALIVE: str | None = "30m"  # keep model + prompt KV cache loaded between requests
+    OLLAMA_NUM_CTX: int | None = None  # context window; must fit system prompt + schema prefix
+
+    # native JSON output for JSON-producing stages: schema | json | off (LLM/structured.py)
+    LLM_STRUCTURED_OUTPUT: str = "schema"
+    LLM_JSON_REPAIR_ATTEMPTS: int = 1  # re-asks with the validation error before giving up
+
+    # admission control around LLM calls (LLM/admission.py), per provider/host
+    LLM_ADMISSION_ENABLED: bool = True
+    LLM_MAX_CONCURRENCY: int = 2  # match OLLAMA_NUM_PARALLEL on the Ollama host
+    LLM_MAX_QUEUE: int = 32  # waiting calls above this are rejected with 429
+    LLM_QUEUE_TIMEOUT_S: float = 60.0  # waiting longer than this -> 503
+
+    # identical concurrent questions share one pipeline run (store/single_flight.py)
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    # /chat/batch
+    BATCH_MAX_QUESTIONS: int = 1000
+    BATCH_MAX_CONCURRENCY: int = 8
+
+    # /jobs: long-running queries off the interactive path (API/jobs.py)
+    JOBS_WORKERS: int = 2  # jobs executing at once, each on its own DB connection
+    JOBS_MAX_QUEUED: int = 50  # waiting jobs above this are rejected with 429
+    JOBS_STATEMENT_TIMEOUT_MS: int = 600_000  # per job, instead of PG_STATEMENT_TIMEOUT_MS
+    JOBS_MAX_ROWS: int = 1_000_000  # the result is cut (truncated=true) above this
+    JOBS_FETCH_ROWS: int = 5000  # server-side cursor batch = one spool batch
+    JOBS_SPOOL_DIR: str = "logs/jobs"
+    JOBS_TTL_S: float = 24 * 3600  # finished jobs and their spool files are removed after this
+
+    # Fast-path router: clear data requests skip the tool-calling agent
+    FAST_PATH_ROUTER: bool = True
+    ROUTER_LLM_MODEL: str | None = None  # None => DEFAULT_LLM_MODEL; a smaller model is enough
+    ROUTER_MIN_CONFIDENCE: float = 0.8
+    ROUTER_CACHE_SIZE: int = 2048
+
+    # "template": render DB results without an LLM turn; "llm": LLM paraphrase
+    DEFAULT_ANSWER_MODE: str = "template"
+
+    # "two_call": analyze_query + select_relevant_schema_with_llm
+    # "combined": one LLM call for both (LLM/analyze_and_select.py)
+    PIPELINE_MODE: str = "two_call"
+    COMBINED_MAX_CANDIDATES: int = 40  # tables shown to the combined prompt
+
+    # Prompts
+    SCHEMA_PROMPT_FORMAT: str = "compact"  # compact | json
+    SCHEMA_PROMPT_TOKEN_BUDGET: int | None = None  # drop low-relevance columns above this size
 
     # App
     APP_NAME: str = "LLM Orchestrator"
@@ -37,6 +140,7 @@ config_router = APIRouter()
 def get_config():
     return {
         "database_url": settings.DATABASE_URL,
+        "db_profiles": ["default", *sorted(settings.DB_PROFILES)],
         "default_model": settings.DEFAULT_LLM_MODEL,
         "default_temperature": settings.DEFAULT_TEMPERATURE,
         "ollama_base_url": settings.OLLAMA_BASE_URL,
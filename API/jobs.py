@@ -0,0 +1,433 @@
+"""
+Long-running queries as jobs: POST /jobs, GET /jobs/{id}, DELETE /jobs/{id}.
+
+    POST /jobs {"question": "..."} or {"sql": "SELECT ..."}   -> 202 {"job_id", "status": "queued", ...}
+    GET  /jobs/{id}                 status, stage, progress (rows/bytes spooled), sql, error
+    GET  /jobs/{id}/result?offset=0&limit=100[&format=csv]   a page of the result / the whole CSV
+    DELETE /jobs/{id}               cancel: pg_cancel_backend() on the job's backend
+
+At most JOBS_WORKERS jobs execute at once (the rest wait as "queued", up to
+JOBS_MAX_QUEUED); each runs on its own connection, outside the profile's pool,
+with JOBS_STATEMENT_TIMEOUT_MS, so heavy queries never hold the connections or
+the timeouts of interactive /chat requests. Question jobs generate their SQL
+with "background" LLM priority and only plan it (EXPLAIN) before the run.
+
+The query reads through a server-side cursor, JOBS_FETCH_ROWS rows at a time,
+and every batch is appended to JOBS_SPOOL_DIR/<id>/result.ndjson in the
+columnar spool format (DB/spool.py) - the full result is never held in memory.
+Above JOBS_MAX_ROWS the result is cut and marked truncated.
+
+Job state lives in this process (like the LLM admission queue): with several
+uvicorn workers, poll the worker that accepted the job. Finished jobs and their
+spool files are removed after JOBS_TTL_S.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+import psycopg
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from psycopg.errors import QueryCanceled
+from psycopg.rows import tuple_row
+from pydantic import BaseModel
+
+from API.config import settings
+from DB.columnar import from_cursor
+from DB.format_pg_error import format_pg_error
+from DB.profiles import UnknownDBProfileError, get_db_profile
+from DB.row_encoding import dumps_bytes
+from DB.spool import SPOOL_FORMAT, SpoolWriter, iter_csv, read_spool
+from LLM.admission import llm_priority
+from LLM.db_pipeline import generate_db_sql
+from LLM.make_llm import make_llm
+from LLM.sql_pipeline import _is_select_only
+from observability.metrics import JOBS_ACTIVE, JOBS_TOTAL
+from store.query_stats import query_stats
+from store.request_ctx import current_db_profile
+from tools.llm_tools import session_db_profile
+
+jobs_router = APIRouter()
+logger = logging.getLogger("orchestrator")
+
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    db_profile: str
+    question: Optional[str] = None
+    sql: Optional[str] = None
+    timeout_ms: int = 0
+    max_rows: int = 0
+    status: str = "queued"  # queued | running | succeeded | failed | cancelled
+    stage: str = "queued"  # queued | generating | connecting | executing | fetching | done
+    rows: int = 0
+    bytes: int = 0
+    columns: List[str] = field(default_factory=list)
+    types: List[str] = field(default_factory=list)
+    truncated: bool = False
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # cancellation: the backend running the query and the server it is on
+    backend_pid: Optional[int] = None
+    dsn: Optional[str] = None
+    cancel_requested: bool = False
+    result_path: Optional[str] = None
+
+    @property
+    def kind(self) -> str:
+        return "question" if self.question is not None else "sql"
+
+    def as_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        out: Dict[str, Any] = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "db_profile": self.db_profile,
+            "question": self.question,
+            "sql": self.sql,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_s": round(end - self.started_at, 3) if self.started_at else None,
+            "progress": {"rows": self.rows, "bytes": self.bytes},
+            "error": self.error,
+        }
+        if self.status == "succeeded":
+            out["result"] = {
+                "columns": self.columns,
+                "types": self.types,
+                "row_count": self.rows,
+                "truncated": self.truncated,
+                "format": SPOOL_FORMAT,
+            }
+        return out
+
+
+class JobManager:
+    def __init__(self, *, workers: int, max_queued: int, spool_dir: str):
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.spool_dir = spool_dir
+        self._jobs: Dict[str, Job] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._sem: Optional[asyncio.Semaphore] = None  # created in the serving loop
+        self._lock = threading.Lock()  # job fields shared with the executing thread
+
+    # ---------- API ----------
+
+    def submit(
+        self,
+        *,
+        question: Optional[str] = None,
+        sql: Optional[str] = None,
+        db_profile: Optional[str] = None,
+        timeout_ms: Optional[int] = None,
+        max_rows: Optional[int] = None,
+    ) -> Job:
+        """
+        Must be called from the event loop. ValueError for a bad request,
+        OverflowError when JOBS_MAX_QUEUED jobs are already waiting.
+        """
+        if (question is None) == (sql is None):
+            raise ValueError("exactly one of question / sql is required")
+        if sql is not None and not _is_select_only(sql):
+            raise ValueError("Refused: only SELECT or WITH queries are allowed.")
+        profile = get_db_profile(db_profile)  # UnknownDBProfileError for a bad name
+
+        self.purge()
+        if sum(j.status == "queued" for j in self._jobs.values()) >= self.max_queued:
+            raise OverflowError(f"{self.max_queued} jobs are already queued")
+
+        job = Job(
+            id=uuid4().hex,
+            db_profile=profile.name,
+            question=question,
+            sql=sql.strip().rstrip(";") if sql is not None else None,
+            timeout_ms=int(timeout_ms or settings.JOBS_STATEMENT_TIMEOUT_MS),
+            max_rows=int(max_rows or settings.JOBS_MAX_ROWS),
+        )
+        self._jobs[job.id] = job
+        JOBS_ACTIVE.labels(state="queued").inc()
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.workers)
+        task = asyncio.create_task(self._run(job))
+        task.add_done_callback(lambda _: self._on_done(job))
+        self._tasks[job.id] = task
+        logger.info("job_submitted", extra={"job_id": job.id, "kind": job.kind, "profile": job.db_profile})
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self, limit: int = 50) -> List[Job]:
+        self.purge()
+        return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)[:limit]
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Queued / generating: the task is cancelled. Executing: pg_cancel_backend()
+        on the job's backend; the worker then stops and marks the job cancelled.
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.status in FINISHED:
+            return job
+        with self._lock:
+            job.cancel_requested = True
+            pid, dsn = job.backend_pid, job.dsn
+        if pid is None:
+            task = self._tasks.get(job_id)
+            if task is not None and job.stage in ("queued", "generating"):
+                task.cancel()
+        else:
+            await asyncio.to_thread(cancel_backend, dsn, pid)
+        return job
+
+    async def shutdown(self) -> None:
+        for job_id in list(self._tasks):
+            await self.cancel(job_id)
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def purge(self, now: Optional[float] = None) -> int:
+        """
+        Drops finished jobs older than JOBS_TTL_S with their spool directories
+        (also directories left behind by a previous process).
+        """
+        now = time.time() if now is None else now
+        ttl = settings.JOBS_TTL_S
+        expired = [j for j in self._jobs.values() if j.status in FINISHED and now - (j.finished_at or now) > ttl]
+        for job in expired:
+            del self._jobs[job.id]
+            shutil.rmtree(self._job_dir(job.id), ignore_errors=True)
+        if os.path.isdir(self.spool_dir):
+            for name in os.listdir(self.spool_dir):
+                path = os.path.join(self.spool_dir, name)
+                if name not in self._jobs and now - os.path.getmtime(path) > ttl:
+                    shutil.rmtree(path, ignore_errors=True)
+        return len(expired)
+
+    # ---------- worker ----------
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.spool_dir, job_id)
+
+    async def _run(self, job: Job) -> None:
+        token = current_db_profile.set(job.db_profile)
+        running = False
+        try:
+            async with self._sem:
+                JOBS_ACTIVE.labels(state="queued").dec()
+                JOBS_ACTIVE.labels(state="running").inc()
+                running = True
+                job.status, job.started_at = "running", time.time()
+                if job.question is not None:
+                    job.stage = "generating"
+                    with llm_priority("background"):
+                        gen = await generate_db_sql(make_llm(None, 0), job.question)
+                    if not gen.get("ok"):
+                        raise RuntimeError(gen.get("error") or "SQL generation failed")
+                    job.sql = gen["sql"].strip().rstrip(";")
+                job.stage = "connecting"
+                await asyncio.to_thread(self._execute, job)
+            self._finish(job, "succeeded")
+        except (asyncio.CancelledError, JobCancelled):
+            self._finish(job, "cancelled")
+        except QueryCanceled as e:
+            # pg_cancel_backend and statement_timeout raise the same error
+            if job.cancel_requested:
+                self._finish(job, "cancelled")
+            else:
+                self._finish(job, "failed", f"Query timed out after {job.timeout_ms} ms: {format_pg_error(e)}")
+        except psycopg.Error as e:
+            self._finish(job, "failed", format_pg_error(e))
+        except Exception as e:
+            logger.exception("job failed", extra={"job_id": job.id})
+            self._finish(job, "failed", f"{type(e).__name__}: {e}")
+        finally:
+            JOBS_ACTIVE.labels(state="running" if running else "queued").dec()
+            current_db_profile.reset(token)
+
+    def _on_done(self, job: Job) -> None:
+        self._tasks.pop(job.id, None)
+        if job.status not in FINISHED:
+            # cancelled before the task started: _run never ran
+            JOBS_ACTIVE.labels(state="queued").dec()
+            self._finish(job, "cancelled")
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None) -> None:
+        job.status, job.stage, job.error = status, "done", error
+        job.finished_at = time.time()
+        with self._lock:
+            job.backend_pid = None
+        if status != "succeeded":
+            shutil.rmtree(self._job_dir(job.id), ignore_errors=True)
+            job.result_path = None
+        JOBS_TOTAL.labels(status=status).inc()
+        logger.info("job_finished", extra={"job_id": job.id, "status": status, "rows": job.rows})
+
+    def _execute(self, job: Job) -> None:
+        """
+        Worker thread: the whole query on a dedicated read-only connection,
+        streamed through a server-side cursor into the spool.
+        """
+        dsn = get_db_profile(job.db_profile).read_dsn()
+        path = os.path.join(self._job_dir(job.id), "result.ndjson")
+        deadline = time.monotonic() + job.timeout_ms / 1000
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            with psycopg.connect(dsn, row_factory=tuple_row) as conn:
+                conn.read_only = True
+                with self._lock:
+                    if job.cancel_requested:
+                        raise JobCancelled()
+                    job.backend_pid, job.dsn = conn.info.backend_pid, dsn
+                # statement_timeout applies to each FETCH; the deadline covers the whole run
+                conn.execute("SELECT set_config('statement_timeout', %s, true)", (str(job.timeout_ms),))
+                job.stage = "executing"
+                with conn.cursor(name=f"job_{job.id}") as cur, SpoolWriter(path) as spool:
+                    job.result_path = path
+                    cur.execute(job.sql)
+                    if job.cancel_requested:  # cancelled before the query reached the backend
+                        raise JobCancelled()
+                    while True:
+                        rows = cur.fetchmany(min(settings.JOBS_FETCH_ROWS, job.max_rows - spool.rows + 1))
+                        if spool.bytes == 0:
+                            result = from_cursor(cur.description, [], conn.adapters)
+                            job.columns, job.types = result.columns, result.types
+                            spool.write_header(job.columns, job.types)
+                            job.stage = "fetching"
+                        if spool.rows + len(rows) > job.max_rows:
+                            rows, job.truncated = rows[: job.max_rows - spool.rows], True
+                        spool.write_batch(rows)
+                        job.rows, job.bytes = spool.rows, spool.bytes
+                        if job.truncated or not rows:
+                            break
+                        if job.cancel_requested:
+                            raise JobCancelled()
+                        if time.monotonic() > deadline:
+                            raise QueryCanceled(f"job deadline of {job.timeout_ms} ms exceeded")
+            outcome = "ok"
+        except QueryCanceled:
+            outcome = "error" if job.cancel_requested else "timeout"
+            raise
+        finally:
+            query_stats.record(job.db_profile, job.sql, time.perf_counter() - start, rows=job.rows, outcome=outcome)
+
+
+def cancel_backend(dsn: str, pid: int) -> bool:
+    """
+    pg_cancel_backend() from a separate connection to the server running the query.
+    """
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        return bool(conn.execute("SELECT pg_cancel_backend(%s)", (pid,)).fetchone()[0])
+
+
+job_manager = JobManager(
+    workers=settings.JOBS_WORKERS,
+    max_queued=settings.JOBS_MAX_QUEUED,
+    spool_dir=settings.JOBS_SPOOL_DIR,
+)
+
+
+# ---------- HTTP ----------
+
+
+class JobRequest(BaseModel):
+    question: Optional[str] = None
+    sql: Optional[str] = None
+    db_profile: Optional[str] = None  # default: the session's profile, else "default"
+    session_id: Optional[str] = None
+    timeout_ms: Optional[int] = None  # capped by JOBS_STATEMENT_TIMEOUT_MS
+    max_rows: Optional[int] = None  # capped by JOBS_MAX_ROWS
+
+
+def _get_job(job_id: str) -> Job:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+
+@jobs_router.post("/jobs", status_code=202)
+async def create_job(req: JobRequest):
+    profile = req.db_profile or session_db_profile(req.session_id)
+    timeout_ms = min(req.timeout_ms or settings.JOBS_STATEMENT_TIMEOUT_MS, settings.JOBS_STATEMENT_TIMEOUT_MS)
+    max_rows = min(req.max_rows or settings.JOBS_MAX_ROWS, settings.JOBS_MAX_ROWS)
+    try:
+        job = job_manager.submit(
+            question=req.question, sql=req.sql, db_profile=profile, timeout_ms=timeout_ms, max_rows=max_rows,
+        )
+    except UnknownDBProfileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except OverflowError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    return job.as_dict()
+
+
+@jobs_router.get("/jobs")
+def list_jobs(limit: int = Query(50, ge=1, le=500)):
+    return {"jobs": [j.as_dict() for j in job_manager.list(limit)]}
+
+
+@jobs_router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    return _get_job(job_id).as_dict()
+
+
+@jobs_router.get("/jobs/{job_id}/result")
+def get_job_result(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=10000),
+    format: str = Query("json", pattern="^(json|csv)$"),
+):
+    job = _get_job(job_id)
+    if job.status != "succeeded" or not job.result_path:
+        raise HTTPException(status_code=409, detail=f"job is {job.status}")
+    if format == "csv":
+        return StreamingResponse(
+            iter_csv(job.result_path),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{job.id}.csv"'},
+        )
+    page = read_spool(job.result_path, offset, limit)
+    body = {
+        "job_id": job.id,
+        "offset": offset,
+        "row_count": job.rows,
+        "truncated": job.truncated,
+        "columns": page.columns,
+        "types": page.types,
+        "rows": page.rows,
+    }
+    return Response(dumps_bytes(body), media_type="application/json")
+
+
+@jobs_router.delete("/jobs/{job_id}")
+async def delete_job(job_id: str):
+    _get_job(job_id)
+    job = await job_manager.cancel(job_id)
+    return {"job_id": job.id, "status": job.status, "cancel_requested": job.cancel_requested}
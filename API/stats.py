@@ -0,0 +1,23 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from store.query_stats import ORDER_FIELDS, query_stats
+
+
+stats_router = APIRouter()
+
+@stats_router.get("/stats/queries")
+def query_stats_top(
+    limit: int = Query(20, ge=1, le=500),
+    order_by: str = "p95_ms",
+    profile: Optional[str] = None,
+):
+    # самые медленные формы SQL (по fingerprint), см. store/query_stats.py
+    if order_by not in ORDER_FIELDS:
+        raise HTTPException(status_code=400, detail=f"order_by must be one of {', '.join(ORDER_FIELDS)}")
+    return {
+        "order_by": order_by,
+        "fingerprints": len(query_stats),
+        "queries": query_stats.top(limit, order_by=order_by, profile=profile),
+    }
@@ -0,0 +1,97 @@
+"""
+Columnar query results: column names and types once, rows as tuples.
+
+    run_sql(sql, columnar=True) -> ColumnarResult(columns=["carrier", "n"], types=["text", "int8"],
+                                                  rows=[("SU", 12), ("S7", 9)])
+
+With RESULT_COLUMNAR the db pipeline ships it as payload["result"] instead of
+payload["rows_preview"] (a list of dicts repeating every column name per row):
+
+    {"ok": true, "sql": "...", "result": {"columns": [...], "types": [...], "rows": [[...], ...]}}
+
+ColumnarResult is a dataclass, so DB/row_encoding.dumps encodes it as exactly
+that object. Consumers read either shape through payload_table().
+"""
+
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, TextIO, Tuple
+
+
+@dataclass
+class ColumnarResult:
+    columns: List[str]
+    types: List[str] = field(default_factory=list)  # Postgres type names; "" when unknown
+    rows: List[Tuple[Any, ...]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def head(self, n: int) -> "ColumnarResult":
+        return ColumnarResult(self.columns, self.types, self.rows[:n])
+
+    def column(self, name: str) -> List[Any]:
+        i = self.columns.index(name)
+        return [row[i] for row in self.rows]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [dict(zip(self.columns, row)) for row in self.rows]
+
+    @classmethod
+    def from_dicts(cls, rows: Sequence[Dict[str, Any]]) -> "ColumnarResult":
+        columns = list(rows[0].keys()) if rows else []
+        return cls(columns, [""] * len(columns), [tuple(r.get(c) for c in columns) for r in rows])
+
+    @classmethod
+    def from_obj(cls, obj: Any) -> "ColumnarResult":
+        """
+        A ColumnarResult or its JSON form ({"columns", "types", "rows"}).
+        """
+        if isinstance(obj, cls):
+            return obj
+        columns = list(obj.get("columns") or [])
+        return cls(columns, list(obj.get("types") or [""] * len(columns)), [tuple(r) for r in obj.get("rows") or []])
+
+    def write_csv(self, f: TextIO, *, header: bool = True) -> int:
+        """
+        Export; returns the number of rows written.
+        """
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(self.columns)
+        writer.writerows(self.rows)
+        return len(self.rows)
+
+
+def from_cursor(description: Optional[Iterable[Any]], rows: List[Tuple[Any, ...]], adapters: Any = None) -> ColumnarResult:
+    """
+    From a psycopg cursor's description and tuple rows; type names via the
+    connection's type registry (adapters.types) when given.
+    """
+    columns, types = [], []
+    for col in description or []:
+        columns.append(col.name)
+        info = adapters.types.get(col.type_code) if adapters is not None else None
+        types.append(info.name if info is not None else "")
+    return ColumnarResult(columns, types, rows)
+
+
+def payload_table(payload: Dict[str, Any]) -> Tuple[List[str], List[Sequence[Any]]]:
+    """
+    (columns, rows as sequences) of a db pipeline payload in either shape.
+    """
+    if payload.get("result") is not None:
+        result = ColumnarResult.from_obj(payload["result"])
+        return result.columns, result.rows
+    rows = payload.get("rows_preview") or []
+    columns = list(rows[0].keys()) if rows else []
+    return columns, [[r.get(c) for c in columns] for r in rows]
+
+
+def payload_row_count(payload: Dict[str, Any]) -> int:
+    result = payload.get("result")
+    if result is not None:
+        return len(result.rows) if isinstance(result, ColumnarResult) else len(result.get("rows") or [])
+    return len(payload.get("rows_preview") or [])
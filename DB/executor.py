@@ -1,56 +1,183 @@
 import re
 import logging
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional, Tuple, Union
 
 import psycopg
-from psycopg.rows import dict_row
+from psycopg.rows import dict_row, tuple_row
 from psycopg.errors import QueryCanceled
 
 from API.config import settings
+from DB.columnar import ColumnarResult, from_cursor
 from DB.format_pg_error import format_pg_error
+from DB.profiles import get_db_profile
+from DB.replicas import PRIMARY
+from DB.result_cache import result_cache
+from DB.sql_params import is_lifting_error, lift_literals, unsafe_fingerprints
+from DB.timeout_policy import history_key, runtime_history
+from observability.metrics import SQL_EXEC_MODE_TOTAL
+from store.query_stats import query_stats
 
 
 class DBTimeoutError(RuntimeError):
     pass
 
 
-def run_sql(sql: str, limit: int = 10) -> List[Dict[str, Any]]:
+def enforce_limit(sql: str, limit: int = 10) -> str:
     """
-    Executes a SELECT query with a hard statement_timeout and an enforced LIMIT
-    (added if missing). Returns a list of dicts.
+    SQL as it will be executed: trailing ";" dropped, LIMIT added if missing.
     """
-    logger = logging.getLogger("orchestrator")
-
     sql_clean = sql.strip().rstrip(";")
-
-    # enforce LIMIT for safety
     if not re.search(r"\blimit\b", sql_clean, flags=re.IGNORECASE):
         sql_clean = f"{sql_clean} LIMIT {int(limit)}"
+    return sql_clean
+
+
+def run_sql(
+    sql: str,
+    limit: int = 10,
+    timeout_ms: Optional[int] = None,
+    *,
+    use_cache: bool = True,
+    columnar: bool = False,
+) -> Union[List[Dict[str, Any]], ColumnarResult]:
+    """
+    Executes a SELECT query with a hard statement_timeout and an enforced LIMIT
+    (added if missing). Returns a list of dicts, or with columnar=True a
+    ColumnarResult (column names/types once, tuple rows; DB/columnar.py).
+
+    timeout_ms defaults to PG_STATEMENT_TIMEOUT_MS; execute_with_retries passes the
+    adaptive one (DB/timeout_policy.py). Runtimes feed the per-fingerprint history
+    and the query stats (store/query_stats.py).
+
+    With PG_LIFT_LITERALS filter literals are sent as bind parameters of a
+    server-side prepared statement (DB/sql_params.py), cached by psycopg per
+    pooled connection; if the server rejects the lifted form, the original text
+    runs in the same call and that fingerprint is not lifted again.
+
+    Results are served from / stored in the result cache (DB/result_cache.py)
+    unless use_cache=False or RESULT_CACHE_ENABLED is off.
+    """
+    sql_clean = enforce_limit(sql, limit)
+    return _cached("columnar" if columnar else "rows", sql_clean, limit, timeout_ms, use_cache)
+
+
+def run_aggregate(sql: str, timeout_ms: Optional[int] = None, *, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    The single row of an aggregate query over a generated one (result profile,
+    DB/result_profile.py). No LIMIT is added; same timeouts, stats and cache as run_sql.
+    """
+    rows = _cached("aggregate", sql.strip().rstrip(";"), None, timeout_ms, use_cache)
+    return rows[0] if rows else {}
+
+
+def check_sql(sql: str, timeout_ms: Optional[int] = None) -> None:
+    """
+    Plans the query without running it (EXPLAIN); raises the same psycopg errors
+    as execution would for undefined tables/columns, syntax and type errors.
+    Used for SQL that is only run later, with a longer timeout (API/jobs.py).
+    """
+    timeout_ms = int(timeout_ms or settings.PG_STATEMENT_TIMEOUT_MS)
+    with get_db_profile().read_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT set_config('statement_timeout', %s, true);", (str(timeout_ms),))
+            try:
+                cur.execute(f"EXPLAIN {sql.strip().rstrip(';')}")
+            except QueryCanceled as e:
+                raise DBTimeoutError(format_pg_error(e)) from e
+
+
+def _cached(
+    kind: str,
+    sql_clean: str,
+    limit: Optional[int],
+    timeout_ms: Optional[int],
+    use_cache: bool,
+) -> Any:
+    columnar = kind == "columnar"
+    if not (use_cache and settings.RESULT_CACHE_ENABLED):
+        return _execute(sql_clean, timeout_ms, columnar=columnar)[0]
+
+    profile = get_db_profile()
+    key = result_cache.key(profile, kind, sql_clean, limit)
+    cached = result_cache.lookup(profile, key, sql_clean, kind=kind)
+    if cached.hit:
+        logging.getLogger("orchestrator").info("SQL result served from cache (%s)", kind)
+        return cached.value
+    rows, target = _execute(sql_clean, timeout_ms, columnar=columnar)
+    # the markers come from the primary: a lagging replica's rows may predate
+    # a change they already show, and would be served as current until the TTL
+    if target == PRIMARY:
+        result_cache.put(key, rows, cached)
+    return rows
+
+
+def _execute(sql_clean: str, timeout_ms: Optional[int], *, columnar: bool = False) -> Tuple[Any, str]:
+    """
+    (rows, target): target is PRIMARY or the label of the replica that ran the query.
+    """
+    logger = logging.getLogger("orchestrator")
+
+    timeout_ms = int(timeout_ms or settings.PG_STATEMENT_TIMEOUT_MS)
+    key = history_key(sql_clean)
+    profile = key[0]
+    lifted = None
+    if settings.PG_LIFT_LITERALS and key not in unsafe_fingerprints:
+        lifted = lift_literals(sql_clean)
 
     logger.info("Executing SQL query")
     logger.debug("SQL: %s", sql_clean)
-    logger.debug("statement_timeout_ms=%s", settings.PG_STATEMENT_TIMEOUT_MS)
+    logger.debug("statement_timeout_ms=%s", timeout_ms)
 
+    start = time.perf_counter()
     try:
-        with psycopg.connect(settings.DATABASE_URL, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
+        # the request's DB profile (session db_profile); a replica if configured
+        with get_db_profile().routed_read_connection() as (target, conn):
+            with conn.cursor(row_factory=tuple_row if columnar else dict_row) as cur:
                 cur.execute(
                     "SELECT set_config('statement_timeout', %s, true);",
-                    (str(int(settings.PG_STATEMENT_TIMEOUT_MS)),)
+                    (str(timeout_ms),)
                 )
-                cur.execute(sql_clean)
+                if lifted is None:
+                    cur.execute(sql_clean)
+                    SQL_EXEC_MODE_TOTAL.labels(mode="inline").inc()
+                else:
+                    try:
+                        cur.execute(lifted.sql, lifted.params, prepare=True)
+                        SQL_EXEC_MODE_TOTAL.labels(mode="prepared").inc()
+                    except psycopg.Error as e:
+                        if not is_lifting_error(e):
+                            raise
+                        logger.info("lifted SQL rejected (%s), running it inline", e.sqlstate)
+                        unsafe_fingerprints.add(key)
+                        conn.rollback()
+                        cur.execute(
+                            "SELECT set_config('statement_timeout', %s, true);",
+                            (str(timeout_ms),)
+                        )
+                        cur.execute(sql_clean)
+                        SQL_EXEC_MODE_TOTAL.labels(mode="fallback").inc()
                 rows = list(cur.fetchall())
-                return rows
+                if columnar:
+                    rows = from_cursor(cur.description, rows, conn.adapters)
+        elapsed = time.perf_counter() - start
+        runtime_history.record(key, elapsed)
+        query_stats.record(profile, sql_clean, elapsed, rows=len(rows))
+        return rows, target
 
     except QueryCanceled as e:
+        elapsed = time.perf_counter() - start
+        runtime_history.record(key, elapsed, timeout_ms=timeout_ms)
+        query_stats.record(profile, sql_clean, elapsed, outcome="timeout")
         logger.warning(
             "SQL execution timed out (statement_timeout_ms=%s). Error: %s",
-            settings.PG_STATEMENT_TIMEOUT_MS,
+            timeout_ms,
             format_pg_error(e),
         )
         raise DBTimeoutError(format_pg_error(e)) from e
 
     except Exception:
+        query_stats.record(profile, sql_clean, time.perf_counter() - start, outcome="error")
         logger.exception("Unexpected database error while executing SQL")
         raise
 
@@ -60,11 +187,12 @@ def db_healthcheck() -> dict:
     Safe healthcheck: SELECT 1 + server version.
     """
     try:
-        with psycopg.connect(settings.DATABASE_URL) as conn:
+        profile = get_db_profile()
+        with profile.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute("SELECT 1;")
                 cur.execute("SHOW server_version;")
                 version = cur.fetchone()[0]
-        return {"ok": True, "server_version": version}
+        return {"ok": True, "server_version": version, "profile": profile.name}
     except Exception as e:
         return {"ok": False, "error": str(e)}
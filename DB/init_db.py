@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Dict
 import psycopg
 import chromadb
@@ -7,6 +8,9 @@ from chromadb.config import Settings
 
 # import these from your existing module
 from DB.build_vector_store import Section, build_chunks, save_to_chroma
+from DB.join_graph import JoinGraph
+from DB.schema_catalog import schema_fingerprint
+from store.single_flight import SyncSingleFlight
 from chromadb.types import Database, Tenant, Collection
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -83,6 +87,9 @@ QUERIES = {
 }
 
 
+_CATALOG_FLIGHTS = SyncSingleFlight("schema_catalog")
+
+
 def _fetch_section(conn: psycopg.Connection, section_name: str, sql: str) -> Section:
     with conn.cursor() as cur:
         cur.execute(sql)
@@ -104,15 +111,42 @@ def build_schema_context_from_db(
     *,
     statement_timeout_seconds: int = 30,
 ) -> Dict[str, Any]:
+    """
+    Loads the catalog. Concurrent loads of the same database share one set of
+    catalog queries (store/single_flight.py).
+    """
+    schema_full, _ = _CATALOG_FLIGHTS.do(
+        (pg_url, statement_timeout_seconds),
+        lambda: _load_schema_context(pg_url, statement_timeout_seconds),
+    )
+    return schema_full
+
+
+async def abuild_schema_context_from_db(pg_url: str, **kwargs: Any) -> Dict[str, Any]:
+    """
+    Async variant: the blocking catalog queries run in a worker thread.
+    """
+    return await asyncio.to_thread(build_schema_context_from_db, pg_url, **kwargs)
+
+
+def _load_schema_context(pg_url: str, statement_timeout_seconds: int) -> Dict[str, Any]:
     with psycopg.connect(pg_url) as conn:
-        with conn.cursor() as cur:
-            cur.execute(f"set statement_timeout = '{statement_timeout_seconds}s';")
+        return schema_context_from_conn(conn, statement_timeout_seconds=statement_timeout_seconds)
+
+
+def schema_context_from_conn(conn: psycopg.Connection, *, statement_timeout_seconds: int = 30) -> Dict[str, Any]:
+    """
+    Catalog queries on an existing connection (e.g. a pooled one, DB/profiles.py).
+    The timeout is transaction-local, so it does not leak into the pool.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT set_config('statement_timeout', %s, true);", (f"{int(statement_timeout_seconds)}s",))
 
-        tables = _fetch_all(conn, QUERIES["tables"])
-        columns = _fetch_all(conn, QUERIES["columns"])
-        table_comments = _fetch_all(conn, QUERIES["table_comments"])
-        column_comments = _fetch_all(conn, QUERIES["column_comments"])
-        fks = _fetch_all(conn, QUERIES["foreign_keys"])
+    tables = _fetch_all(conn, QUERIES["tables"])
+    columns = _fetch_all(conn, QUERIES["columns"])
+    table_comments = _fetch_all(conn, QUERIES["table_comments"])
+    column_comments = _fetch_all(conn, QUERIES["column_comments"])
+    fks = _fetch_all(conn, QUERIES["foreign_keys"])
 
     # индексы комментариев для быстрого маппинга
     tbl_desc: Dict[Tuple[str, str], Optional[str]] = {
@@ -157,10 +191,15 @@ def build_schema_context_from_db(
             "constraint": cn,
         })
 
-    return {
+    schema_full: Dict[str, Any] = {
         "tables": tables_map,
         "foreign_keys": foreign_keys,
     }
+    # cache key for rendered prompt fragments (see DB/schema_catalog.py)
+    schema_full["fingerprint"] = schema_fingerprint(schema_full)
+    # adjacency index for join-path lookups, built once per catalog load
+    schema_full["join_graph"] = JoinGraph(foreign_keys)
+    return schema_full
 
 
 
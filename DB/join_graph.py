@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class JoinEdge:
+    """
+    One FK constraint between two tables (fully-qualified "schema.table").
+    Multi-column FKs keep all column pairs in `columns`.
+    """
+    from_table: str
+    to_table: str
+    columns: Tuple[Tuple[str, str], ...]  # ((from_column, to_column), ...)
+    constraint: str
+
+    def other(self, table: str) -> str:
+        return self.to_table if table == self.from_table else self.from_table
+
+    def hint(self) -> str:
+        """
+        Compact join condition for prompts: a.x = b.y AND a.z = b.w
+        """
+        return " AND ".join(
+            f"{self.from_table}.{fc} = {self.to_table}.{tc}"
+            for fc, tc in self.columns
+        )
+
+
+class JoinGraph:
+    """
+    Undirected adjacency index over FK relationships from build_schema_context_from_db().
+
+    Shortest join paths are computed on demand with BFS; the BFS tree of every
+    source table is memoized, so repeated lookups are dictionary walks.
+    """
+
+    def __init__(self, foreign_keys: Iterable[Dict[str, Any]], max_cached_sources: int = 1024):
+        grouped: Dict[Tuple[str, str, str], List[Tuple[str, str]]] = {}
+        for fk in foreign_keys:
+            key = (fk["from"], fk["to"], fk.get("constraint") or "")
+            grouped.setdefault(key, []).append((fk["from_column"], fk["to_column"]))
+
+        self._adj: Dict[str, List[JoinEdge]] = {}
+        for (src, dst, cname), cols in grouped.items():
+            edge = JoinEdge(from_table=src, to_table=dst, columns=tuple(cols), constraint=cname)
+            self._adj.setdefault(src, []).append(edge)
+            if dst != src:
+                self._adj.setdefault(dst, []).append(edge)
+
+        self._max_cached_sources = max_cached_sources
+        self._bfs_cache: "OrderedDict[str, Dict[str, Optional[JoinEdge]]]" = OrderedDict()
+        self._bfs_lock = threading.Lock()
+
+    @classmethod
+    def from_schema(cls, schema_full: Dict[str, Any]) -> "JoinGraph":
+        return cls(schema_full.get("foreign_keys") or [])
+
+    def __contains__(self, table: str) -> bool:
+        return table in self._adj
+
+    def neighbors(self, table: str) -> List[JoinEdge]:
+        return self._adj.get(table, [])
+
+    def _bfs_tree(self, source: str) -> Dict[str, Optional[JoinEdge]]:
+        """
+        node -> edge used to reach it from `source` (None for the source itself).
+        """
+        # one graph lives in the shared schema_full (DB/init_db.py) and is used
+        # from concurrent request threads: the LRU moves/evictions need the lock
+        with self._bfs_lock:
+            tree = self._bfs_cache.get(source)
+            if tree is not None:
+                self._bfs_cache.move_to_end(source)
+                return tree
+
+        tree = {source: None}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            for edge in self._adj.get(node, []):
+                nxt = edge.other(node)
+                if nxt not in tree:
+                    tree[nxt] = edge
+                    queue.append(nxt)
+
+        with self._bfs_lock:
+            self._bfs_cache[source] = tree
+            if len(self._bfs_cache) > self._max_cached_sources:
+                self._bfs_cache.popitem(last=False)
+        return tree
+
+    def shortest_path(self, source: str, target: str) -> Optional[List[JoinEdge]]:
+        """
+        Edges of the shortest join path source -> target, [] if source == target,
+        None if the tables are not connected.
+        """
+        if source == target:
+            return []
+        tree = self._bfs_tree(source)
+        if target not in tree:
+            return None
+
+        path: List[JoinEdge] = []
+        node = target
+        while node != source:
+            edge = tree[node]
+            path.append(edge)
+            node = edge.other(node)
+        path.reverse()
+        return path
+
+    def connect(
+        self,
+        tables: Iterable[str],
+        *,
+        max_hops: int = 3,
+    ) -> Tuple[List[str], List[JoinEdge]]:
+        """
+        Greedy Steiner-tree approximation: connects the given tables with the fewest
+        extra (bridge) tables, attaching one table at a time by its shortest path to
+        the already connected set. Paths longer than `max_hops` are not used.
+
+        Returns (bridge_tables, join_edges).
+        """
+        wanted = list(dict.fromkeys(tables))
+        if len(wanted) < 2:
+            return [], []
+
+        connected: List[str] = [wanted[0]]
+        remaining = wanted[1:]
+        bridges: List[str] = []
+        edges: List[JoinEdge] = []
+
+        while remaining:
+            best: Optional[Tuple[str, str, List[JoinEdge]]] = None  # (start, target, path)
+            for target in remaining:
+                for start in connected:
+                    path = self.shortest_path(start, target)
+                    if path is None or len(path) > max_hops:
+                        continue
+                    if best is None or len(path) < len(best[2]):
+                        best = (start, target, path)
+
+            if best is None:
+                # the rest is unreachable from the connected set; start a new component
+                connected.append(remaining.pop(0))
+                continue
+
+            node, _, path = best
+            for edge in path:
+                node = edge.other(node)
+                if edge not in edges:
+                    edges.append(edge)
+                if node not in connected:
+                    connected.append(node)
+                    if node in remaining:
+                        remaining.remove(node)
+                    else:
+                        bridges.append(node)
+
+        return bridges, edges
+
+
+def join_hints(edges: Iterable[JoinEdge]) -> List[str]:
+    return [edge.hint() for edge in edges]
@@ -0,0 +1,304 @@
+"""
+DB profiles: named databases one orchestrator process can serve.
+
+    settings.DB_PROFILES = {"dev": "postgresql://...", "prod": "postgresql://..."}
+    # "default" is always settings.DATABASE_URL
+
+Each profile owns, lazily:
+- a connection pool (psycopg_pool; plain connections if it is not installed)
+- read replicas from DB_REPLICAS (DB/replicas.py) for read_connection()
+- the catalog (build_schema_context_from_db shape), cached for DB_CATALOG_TTL_S
+- a vector index namespace (Chroma collection "pg_schema_<profile>")
+
+The profile of a request comes from store.request_ctx.current_db_profile, set
+from the session's db_profile (set_db_profile tool). Profiles idle for longer
+than DB_PROFILE_IDLE_TTL_S close their pool and drop their caches; at most
+DB_MAX_OPEN_PROFILES pools are open at a time (least recently used idle one goes).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import psycopg
+
+from API.config import settings
+from DB.init_db import schema_context_from_conn
+from DB.replicas import PRIMARY, ReplicaSet
+from observability.metrics import DB_PROFILE_EVICTIONS_TOTAL, DB_PROFILES_OPEN
+from store.request_ctx import current_db_profile
+from store.single_flight import SyncSingleFlight
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:  # optional: without it every call opens its own connection
+    ConnectionPool = None
+
+logger = logging.getLogger("orchestrator")
+
+DEFAULT_PROFILE = "default"
+VECTOR_COLLECTION_PREFIX = "pg_schema"
+
+_CATALOG_FLIGHTS = SyncSingleFlight("profile_catalog")
+
+
+class UnknownDBProfileError(KeyError):
+    pass
+
+
+def _configure_connection(conn: psycopg.Connection) -> None:
+    conn.prepared_max = settings.PG_PREPARED_MAX
+
+
+def open_pool(dsn: str, name: str) -> Any:
+    """
+    Pool for one server (primary or replica); None without psycopg_pool.
+    """
+    if ConnectionPool is None:
+        return None
+    return ConnectionPool(
+        dsn,
+        min_size=settings.DB_POOL_MIN_SIZE,
+        max_size=settings.DB_POOL_MAX_SIZE,
+        max_idle=settings.DB_PROFILE_IDLE_TTL_S,
+        timeout=10.0,  # waiting for a connection; an unreachable replica fails over sooner
+        name=name,
+        configure=_configure_connection,
+        open=True,
+    )
+
+
+class DBProfile:
+    def __init__(self, name: str, dsn: str):
+        self.name = name
+        self.dsn = dsn
+        self.vector_namespace = f"{VECTOR_COLLECTION_PREFIX}_{name}"
+        self.last_used = time.monotonic()
+        self._pool: Any = None
+        self._in_use = 0
+        self._catalog: Optional[Dict[str, Any]] = None
+        self._catalog_loaded_at = 0.0
+        self._vector_store: Any = None
+        self._replicas: Optional[ReplicaSet] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._pool is not None or self._replicas is not None
+
+    @property
+    def has_cache(self) -> bool:
+        return self._catalog is not None or self._vector_store is not None
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    def _get_pool(self) -> Any:
+        with self._lock:
+            if self._pool is None and ConnectionPool is not None:
+                self._pool = open_pool(self.dsn, f"db:{self.name}")
+                DB_PROFILES_OPEN.inc()
+                logger.info("db_profile_opened", extra={"profile": self.name})
+            return self._pool
+
+    def _get_replicas(self) -> Optional[ReplicaSet]:
+        dsns = settings.DB_REPLICAS.get(self.name)
+        if not dsns:
+            return None
+        with self._lock:
+            if self._replicas is None:
+                self._replicas = ReplicaSet(
+                    self.name, dsns, open_pool=open_pool, primary_connection=self.connection,
+                )
+            return self._replicas
+
+    @contextmanager
+    def connection(self) -> Iterator[psycopg.Connection]:
+        """
+        A connection of this profile; the transaction is committed on success and
+        rolled back on error (same as `with psycopg.connect(...)`).
+        """
+        self.last_used = time.monotonic()
+        pool = self._get_pool()
+        with self._lock:
+            self._in_use += 1
+        try:
+            if pool is None:
+                with psycopg.connect(self.dsn) as conn:
+                    yield conn
+            else:
+                with pool.connection() as conn:
+                    yield conn
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self.last_used = time.monotonic()
+
+    @contextmanager
+    def read_connection(self) -> Iterator[psycopg.Connection]:
+        """
+        Connection for read-only work (generated SELECTs, catalog queries):
+        a healthy replica from DB_REPLICAS if configured, else the primary.
+        """
+        with self.routed_read_connection() as (_, conn):
+            yield conn
+
+    @contextmanager
+    def routed_read_connection(self) -> Iterator[Tuple[str, psycopg.Connection]]:
+        """
+        read_connection() plus where it went: PRIMARY or the replica label.
+        A replica may lag behind the primary (result cache, DB/executor.py).
+        """
+        replicas = self._get_replicas()
+        if replicas is None:
+            with self.connection() as conn:
+                yield PRIMARY, conn
+            return
+
+        self.last_used = time.monotonic()
+        with self._lock:
+            self._in_use += 1
+        try:
+            with replicas.routed_connection() as routed:
+                yield routed
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self.last_used = time.monotonic()
+
+    def read_dsn(self) -> str:
+        """
+        DSN for a dedicated long-running read connection (API/jobs.py): a
+        usable replica from DB_REPLICAS if configured, else the primary.
+        """
+        replicas = self._get_replicas()
+        candidates = replicas.candidates() if replicas is not None else []
+        return candidates[0].dsn if candidates else self.dsn
+
+    def schema_context(self, *, statement_timeout_seconds: int = 30) -> Dict[str, Any]:
+        """
+        Catalog of this profile, reloaded after DB_CATALOG_TTL_S; concurrent
+        reloads share one set of catalog queries.
+        """
+        self.last_used = time.monotonic()
+        ttl = settings.DB_CATALOG_TTL_S
+        catalog = self._catalog
+        if catalog is not None and ttl > 0 and time.monotonic() - self._catalog_loaded_at < ttl:
+            return catalog
+
+        def load() -> Dict[str, Any]:
+            with self.read_connection() as conn:
+                schema_full = schema_context_from_conn(conn, statement_timeout_seconds=statement_timeout_seconds)
+            self._catalog, self._catalog_loaded_at = schema_full, time.monotonic()
+            return schema_full
+
+        schema_full, _ = _CATALOG_FLIGHTS.do((self.name, self.dsn), load)
+        return schema_full
+
+    async def aschema_context(self, **kwargs: Any) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.schema_context, **kwargs)
+
+    def vector_store(self) -> Any:
+        """
+        Chroma store of this profile's catalog (collection = vector_namespace).
+        """
+        with self._lock:
+            if self._vector_store is None:
+                from RAG.chroma_store import ChromaStore
+
+                self._vector_store = ChromaStore(collection_name=self.vector_namespace, connection_string=self.dsn)
+            return self._vector_store
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+            replicas, self._replicas = self._replicas, None
+            self._catalog = None
+            self._vector_store = None
+        if replicas is not None:
+            replicas.close()
+        if pool is not None:
+            pool.close()
+            DB_PROFILES_OPEN.dec()
+            logger.info("db_profile_closed", extra={"profile": self.name})
+
+
+class ProfileRegistry:
+    """
+    DSNs are read from settings on every lookup, so DATABASE_URL / DB_PROFILES
+    changed at runtime (tests, benchmarks) replace the affected profile.
+    """
+
+    def __init__(self) -> None:
+        self._profiles: Dict[str, DBProfile] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def dsns() -> Dict[str, str]:
+        return {**settings.DB_PROFILES, DEFAULT_PROFILE: settings.DATABASE_URL}
+
+    def names(self) -> List[str]:
+        return sorted(self.dsns())
+
+    def get(self, name: Optional[str] = None) -> DBProfile:
+        name = name or DEFAULT_PROFILE
+        dsn = self.dsns().get(name)
+        if dsn is None:
+            raise UnknownDBProfileError(name)
+        stale = None
+        with self._lock:
+            profile = self._profiles.get(name)
+            if profile is None or profile.dsn != dsn:
+                stale = profile
+                profile = self._profiles[name] = DBProfile(name, dsn)
+        if stale is not None:
+            stale.close()
+        self.evict(keep=name)
+        return profile
+
+    def evict(self, *, keep: Optional[str] = None, now: Optional[float] = None) -> List[str]:
+        """
+        Closes idle profiles (no connection checked out) past the idle TTL, then the
+        least recently used idle ones above DB_MAX_OPEN_PROFILES. Returns closed names.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            candidates = [p for p in self._profiles.values() if p.name != keep and p.in_use == 0]
+            open_count = sum(1 for p in self._profiles.values() if p.is_open)
+
+        closed: List[str] = []
+        for p in sorted(candidates, key=lambda p: p.last_used):
+            idle = now - p.last_used > settings.DB_PROFILE_IDLE_TTL_S
+            over = p.is_open and open_count > settings.DB_MAX_OPEN_PROFILES
+            if not (idle or over):
+                continue
+            if p.is_open:
+                open_count -= 1
+            reason = "idle" if idle else "capacity"
+            if p.is_open or p.has_cache:
+                DB_PROFILE_EVICTIONS_TOTAL.labels(profile=p.name, reason=reason).inc()
+                closed.append(p.name)
+            p.close()
+        return closed
+
+    def close_all(self) -> None:
+        with self._lock:
+            profiles = list(self._profiles.values())
+        for p in profiles:
+            p.close()
+
+
+profile_registry = ProfileRegistry()
+
+
+def get_db_profile(name: Optional[str] = None) -> DBProfile:
+    """
+    Profile by name, or the current request's profile (current_db_profile).
+    """
+    return profile_registry.get(name or current_db_profile.get())
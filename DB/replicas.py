@@ -0,0 +1,236 @@
+"""
+Read-replica routing for one DB profile.
+
+    settings.DB_REPLICAS = {"default": ["postgresql://replica1/db", "postgresql://replica2/db"]}
+
+ReplicaSet.connection() hands out a connection to a healthy replica
+(round_robin or least_connections), and falls back to the primary when no
+replica is usable. A replica is usable when its last health check succeeded
+and, with DB_REPLICA_MAX_LAG_S, its replay lag is within the limit. Checks run
+in a background thread every DB_REPLICA_CHECK_INTERVAL_S (started by the first
+read), so routing only reads their last result and never waits for a connect
+timeout of a replica that is down. A replica that fails to connect is skipped
+for DB_REPLICA_RETRY_AFTER_S and the next one (then the primary) is tried.
+Query errors are not retried elsewhere: the SQL is the problem, not the host.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, ContextManager, Iterator, List, Optional, Tuple
+
+import psycopg
+from psycopg.conninfo import conninfo_to_dict
+
+from API.config import settings
+from observability.metrics import (
+    DB_QUERY_ERRORS_TOTAL,
+    DB_QUERY_LATENCY,
+    DB_READ_ROUTED_TOTAL,
+    DB_REPLICA_HEALTHY,
+    DB_REPLICA_LAG_SECONDS,
+)
+
+logger = logging.getLogger("orchestrator")
+
+PRIMARY = "primary"
+
+# lag is 0 on a primary and on a replica that has replayed everything it received
+# (pg_last_xact_replay_timestamp() alone grows while the primary is idle)
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def dsn_label(dsn: str) -> str:
+    """
+    host:port/dbname, without credentials (metric label, logs).
+    """
+    try:
+        d = conninfo_to_dict(dsn)
+    except Exception:
+        return "replica"
+    return f"{d.get('host') or 'localhost'}:{d.get('port') or 5432}/{d.get('dbname') or ''}"
+
+
+class Replica:
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self.label = dsn_label(dsn)
+        self.pool: Any = None
+        self.in_flight = 0
+        self.healthy = True  # optimistic until the first check
+        self.lag_s: Optional[float] = None
+        self.checked_at = 0.0
+        self.down_until = 0.0
+
+    def usable(self, now: float) -> bool:
+        return self.healthy and now >= self.down_until
+
+
+class ReplicaSet:
+    def __init__(
+        self,
+        profile: str,
+        dsns: List[str],
+        *,
+        open_pool: Callable[[str, str], Any],
+        primary_connection: Callable[[], ContextManager[psycopg.Connection]],
+    ):
+        self.profile = profile
+        self.replicas = [Replica(dsn) for dsn in dsns]
+        self._open_pool = open_pool
+        self._primary_connection = primary_connection
+        self._rr = itertools.count()
+        self._lock = threading.Lock()
+        self._checker: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ---------- health ----------
+
+    def check(self, replica: Replica) -> None:
+        """
+        Reachability + replay lag; direct connection with a short connect timeout.
+        """
+        replica.checked_at = time.monotonic()
+        try:
+            with psycopg.connect(replica.dsn, connect_timeout=2) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(LAG_SQL)
+                    replica.lag_s = float(cur.fetchone()[0] or 0)
+        except Exception as e:
+            replica.healthy = False
+            replica.down_until = replica.checked_at + settings.DB_REPLICA_RETRY_AFTER_S
+            DB_QUERY_ERRORS_TOTAL.labels(profile=self.profile, target=replica.label, kind="connect").inc()
+            logger.warning("db_replica_unhealthy", extra={"replica": replica.label, "error": str(e)})
+        else:
+            max_lag = settings.DB_REPLICA_MAX_LAG_S
+            replica.healthy = max_lag is None or replica.lag_s <= max_lag
+            DB_REPLICA_LAG_SECONDS.labels(profile=self.profile, target=replica.label).set(replica.lag_s)
+            if not replica.healthy:
+                logger.warning("db_replica_lagging", extra={"replica": replica.label, "lag_s": replica.lag_s})
+        DB_REPLICA_HEALTHY.labels(profile=self.profile, target=replica.label).set(int(replica.healthy))
+
+    def refresh(self) -> None:
+        """
+        Checks every replica once (the checker thread; tests).
+        """
+        for r in self.replicas:
+            self.check(r)
+
+    def _check_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning("db_replica_check_failed", extra={"profile": self.profile, "error": str(e)})
+            self._stop.wait(settings.DB_REPLICA_CHECK_INTERVAL_S)
+
+    def _ensure_checker(self) -> None:
+        with self._lock:
+            if self._checker is None and not self._stop.is_set():
+                self._checker = threading.Thread(
+                    target=self._check_loop, name=f"db-replica-check-{self.profile}", daemon=True
+                )
+                self._checker.start()
+
+    # ---------- routing ----------
+
+    def candidates(self) -> List[Replica]:
+        """
+        Usable replicas in the order they should be tried.
+        """
+        self._ensure_checker()
+        now = time.monotonic()
+        usable = [r for r in self.replicas if r.usable(now)]
+        if not usable:
+            return []
+        start = next(self._rr) % len(usable)
+        ordered = usable[start:] + usable[:start]
+        if settings.DB_REPLICA_POLICY == "least_connections":
+            # stable sort: round-robin order breaks ties
+            ordered.sort(key=lambda r: r.in_flight)
+        return ordered
+
+    def _pool(self, replica: Replica) -> Any:
+        with self._lock:
+            if replica.pool is None:
+                replica.pool = self._open_pool(replica.dsn, f"db:{self.profile}:{replica.label}")
+            return replica.pool
+
+    @contextmanager
+    def _observed(self, target: str) -> Iterator[None]:
+        start = time.monotonic()
+        try:
+            yield
+        except Exception:
+            DB_QUERY_ERRORS_TOTAL.labels(profile=self.profile, target=target, kind="query").inc()
+            raise
+        finally:
+            DB_QUERY_LATENCY.labels(profile=self.profile, target=target).observe(time.monotonic() - start)
+
+    def _enter(self, stack: ExitStack) -> Tuple[Optional[Replica], psycopg.Connection]:
+        """
+        Connection from the first replica that accepts one, else from the primary.
+        """
+        for replica in self.candidates():
+            pool = self._pool(replica)
+            try:
+                if pool is None:
+                    conn = stack.enter_context(psycopg.connect(replica.dsn, connect_timeout=5))
+                else:
+                    conn = stack.enter_context(pool.connection())
+            except Exception as e:
+                replica.down_until = time.monotonic() + settings.DB_REPLICA_RETRY_AFTER_S
+                DB_QUERY_ERRORS_TOTAL.labels(profile=self.profile, target=replica.label, kind="connect").inc()
+                logger.warning("db_replica_connect_failed", extra={"replica": replica.label, "error": str(e)})
+                continue
+            DB_READ_ROUTED_TOTAL.labels(profile=self.profile, target=replica.label, reason="replica").inc()
+            return replica, conn
+
+        reason = "failover" if self.replicas else "no_replicas"
+        DB_READ_ROUTED_TOTAL.labels(profile=self.profile, target=PRIMARY, reason=reason).inc()
+        return None, stack.enter_context(self._primary_connection())
+
+    @contextmanager
+    def routed_connection(self) -> Iterator[Tuple[str, psycopg.Connection]]:
+        """
+        (target, connection): target is the replica label, or PRIMARY on failover.
+        """
+        with ExitStack() as stack:
+            replica, conn = self._enter(stack)
+            if replica is None:
+                with self._observed(PRIMARY):
+                    yield PRIMARY, conn
+                return
+
+            with self._lock:
+                replica.in_flight += 1
+            try:
+                with self._observed(replica.label):
+                    yield replica.label, conn
+            finally:
+                with self._lock:
+                    replica.in_flight -= 1
+
+    @contextmanager
+    def connection(self) -> Iterator[psycopg.Connection]:
+        with self.routed_connection() as (_, conn):
+            yield conn
+
+    def close(self) -> None:
+        self._stop.set()  # the checker exits after its current check
+        with self._lock:
+            pools = [r.pool for r in self.replicas if r.pool is not None]
+            for r in self.replicas:
+                r.pool = None
+        for pool in pools:
+            pool.close()
@@ -0,0 +1,377 @@
+"""
+Result cache in front of run_sql / run_aggregate.
+
+Key: (DB profile, kind rows|columnar|aggregate, SQL text with comments/whitespace/case
+normalized but literals kept, limit) - identical queries from different users
+share one entry, different filter values do not.
+
+An entry lives for the smallest TTL of the tables it reads:
+    RESULT_CACHE_TTL_S                       default
+    RESULT_CACHE_TABLE_TTLS = {"ref.*": 3600, "ops.flights": 15}   fnmatch on schema.table / table
+and is dropped earlier when one of those tables changes
+(RESULT_CACHE_INVALIDATION):
+- pg_stat: write counters of pg_stat_user_tables on the primary, re-read at most
+  every RESULT_CACHE_MARKER_CHECK_S (the server itself publishes them with ~1 s delay)
+- notify:  LISTEN RESULT_CACHE_NOTIFY_CHANNEL on the primary; payload = changed
+  table ("schema.table" or "table"), empty or "*" = everything. E.g. a trigger:
+  PERFORM pg_notify('result_cache', TG_TABLE_SCHEMA || '.' || TG_TABLE_NAME);
+- none:    TTL only
+Tables are matched by name without schema, so a change may drop a little more
+than needed, never less. The markers are read before the query runs, so a
+change during the query invalidates the entry it produced. Only rows read from
+the primary are stored: a replica may not have replayed a change whose markers
+the primary already shows (DB/executor.py).
+
+Not cached at all (CacheLookup.cacheable=False):
+- SQL calling volatile / time-dependent functions (now(), current_date,
+  random(), ...): the same text gives another result a second later
+- pg_stat mode: SQL reading a relation without a pg_stat_user_tables row (views,
+  set-returning functions, catalogs) - nothing would ever invalidate it before the TTL
+
+Values are stored pickled: RESULT_CACHE_MAX_BYTES bounds the serialized size
+(LRU), bigger results than RESULT_CACHE_MAX_ENTRY_BYTES are not cached, and
+callers get their own copy.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import psycopg
+from psycopg import sql as pgsql
+
+from API.config import settings
+from DB.sql_fingerprint import tokenize_sql
+from observability.metrics import (
+    RESULT_CACHE_BYTES,
+    RESULT_CACHE_EVICTIONS_TOTAL,
+    RESULT_CACHE_REQUESTS_TOTAL,
+)
+
+logger = logging.getLogger("orchestrator")
+
+_TABLE_AFTER = {"from", "join"}
+
+# results depend on the clock, randomness or sequence state, not only on table contents
+VOLATILE_FUNCTIONS = {
+    "now", "current_date", "current_time", "current_timestamp", "localtime", "localtimestamp",
+    "clock_timestamp", "statement_timestamp", "transaction_timestamp", "timeofday", "age",
+    "random", "setseed", "gen_random_uuid", "uuid_generate_v4", "nextval", "currval", "lastval",
+    "txid_current", "pg_sleep",
+}
+
+MARKERS_SQL = """
+SELECT schemaname || '.' || relname,
+       n_tup_ins + n_tup_upd + n_tup_del, n_live_tup, n_mod_since_analyze
+FROM pg_stat_user_tables
+"""
+
+
+def canonical_sql(sql: str) -> str:
+    """
+    Comments dropped, whitespace collapsed, unquoted words lowercased; literals
+    and quoted identifiers kept as written.
+    """
+    out = []
+    for kind, text in tokenize_sql(sql):
+        if kind in ("comment", "space"):
+            out.append(" ")
+        elif kind == "word":
+            out.append(text.lower())
+        else:
+            out.append(text)
+    return " ".join("".join(out).split()).rstrip(" ;")
+
+
+def _unquote(text: str) -> str:
+    return text[1:-1].replace('""', '"') if text.startswith('"') else text.lower()
+
+
+def has_volatile_function(sql: str) -> bool:
+    return any(
+        kind == "word" and text.lower() in VOLATILE_FUNCTIONS for kind, text in tokenize_sql(sql)
+    )
+
+
+def cte_names(sql: str) -> List[str]:
+    """
+    Names defined by WITH: `name AS (`, `name (col, ...) AS (`, `AS [NOT] MATERIALIZED (`.
+    """
+    toks = [(k, t) for k, t in tokenize_sql(sql) if k not in ("space", "comment")]
+    names = []
+    for i, (kind, text) in enumerate(toks):
+        if kind != "word" or text.lower() != "as":
+            continue
+        j = i + 1
+        while j < len(toks) and toks[j][1].lower() in ("not", "materialized"):
+            j += 1
+        if j >= len(toks) or toks[j][1] != "(" or i == 0:
+            continue
+        k = i - 1
+        if toks[k][1] == ")":  # column list
+            depth = 0
+            while k >= 0:
+                depth += toks[k][1] == ")"
+                depth -= toks[k][1] == "("
+                if depth == 0:
+                    break
+                k -= 1
+            k -= 1
+        if k >= 0 and toks[k][0] in ("word", "ident"):
+            names.append(_unquote(toks[k][1]))
+    return names
+
+
+def referenced_tables(sql: str) -> List[str]:
+    """
+    Names after FROM / JOIN (and after commas in a FROM list), "schema.table"
+    or "table", without the query's CTE names. Functions in FROM are included.
+    """
+    tables: List[str] = []
+    expect = False
+    in_from = False
+    name: List[str] = []
+
+    def flush() -> None:
+        if name:
+            tables.append(".".join(name))
+            name.clear()
+
+    for kind, text in tokenize_sql(sql):
+        if kind in ("space", "comment"):
+            continue
+        if expect and kind in ("word", "ident"):
+            name.append(_unquote(text))
+            expect = False
+            continue
+        if name and text == ".":
+            expect = True
+            continue
+        flush()
+        expect = False
+        low = text.lower() if kind == "word" else text
+        if low in _TABLE_AFTER:
+            expect, in_from = True, True
+        elif low == "," and in_from:
+            expect = True
+        elif kind == "word" and low in ("where", "group", "order", "limit", "having", "select", "union"):
+            in_from = False
+    flush()
+    skip = {"lateral", "only", *cte_names(sql)}
+    return list(dict.fromkeys(t for t in tables if t not in skip))
+
+
+def _relname(table: str) -> str:
+    return table.rsplit(".", 1)[-1]
+
+
+def table_ttl(tables: List[str]) -> float:
+    """
+    Smallest TTL of the tables' groups; RESULT_CACHE_TTL_S for tables outside any group.
+    """
+    ttls = []
+    for table in tables:
+        ttl = settings.RESULT_CACHE_TTL_S
+        for pattern, group_ttl in settings.RESULT_CACHE_TABLE_TTLS.items():
+            p = pattern.lower()
+            if fnmatch.fnmatchcase(table.lower(), p) or fnmatch.fnmatchcase(_relname(table).lower(), p):
+                ttl = group_ttl
+                break
+        ttls.append(ttl)
+    return min(ttls, default=settings.RESULT_CACHE_TTL_S)
+
+
+class TableMarkers:
+    """
+    Change markers of one profile's tables: pg_stat counters or NOTIFY generations.
+    """
+
+    def __init__(self, profile: Any, mode: str):
+        self.profile = profile
+        self.mode = mode
+        self.versions: Dict[str, Any] = {}  # "schema.table" | "table" | "*" -> version
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+
+    def _refresh_pg_stat(self) -> None:
+        with self._lock:
+            if time.monotonic() - self.checked_at < settings.RESULT_CACHE_MARKER_CHECK_S:
+                return
+            self.checked_at = time.monotonic()
+            try:
+                # the primary: replicas do not see the primary's table statistics
+                with self.profile.connection() as conn:
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT set_config('statement_timeout', '1000', true);")
+                        cur.execute(MARKERS_SQL)
+                        rows = cur.fetchall()
+            except Exception as e:
+                logger.warning("result_cache: table markers unavailable (%s), not caching new results", e)
+                self.versions = {}
+                return
+            self.versions = {name.lower(): tuple(v) for name, *v in rows}
+
+    def _bump(self, table: str) -> None:
+        with self._lock:
+            self.versions[table] = self.versions.get(table, 0) + 1
+
+    def _listen(self) -> None:
+        channel = pgsql.Identifier(settings.RESULT_CACHE_NOTIFY_CHANNEL)
+        while True:
+            try:
+                with psycopg.connect(self.profile.dsn, autocommit=True) as conn:
+                    conn.execute(pgsql.SQL("LISTEN {}").format(channel))
+                    self._bump("*")  # whatever happened while not listening
+                    for note in conn.notifies():
+                        self._bump(note.payload.strip().lower() or "*")
+            except Exception as e:
+                logger.warning("result_cache: LISTEN failed (%s), retrying", e)
+                self._bump("*")
+                time.sleep(5.0)
+
+    def _ensure_listener(self) -> None:
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen, name=f"result-cache-listen-{self.profile.name}", daemon=True
+                )
+                self._listener.start()
+
+    def covers(self, tables: List[str]) -> bool:
+        """
+        pg_stat: every table has a marker (views, functions and catalogs do not).
+        """
+        if self.mode != "pg_stat":
+            return True
+        with self._lock:
+            known = {_relname(k) for k in self.versions}
+        return all(_relname(t).lower() in known for t in tables)
+
+    def snapshot(self, tables: List[str]) -> Tuple:
+        if self.mode == "pg_stat":
+            self._refresh_pg_stat()
+        elif self.mode == "notify":
+            self._ensure_listener()
+        else:
+            return ()
+        with self._lock:
+            versions = dict(self.versions)
+        rels = {_relname(t) for t in tables}
+        marks = tuple(sorted((k, v) for k, v in versions.items() if _relname(k) in rels))
+        return marks + ((("*", versions.get("*")),) if self.mode == "notify" else ())
+
+
+@dataclass
+class _Entry:
+    blob: bytes
+    expires_at: float
+    tables: List[str]
+    stamp: Tuple
+
+
+@dataclass
+class CacheLookup:
+    hit: bool
+    value: Any = None
+    stamp: Tuple = ()
+    tables: Tuple[str, ...] = ()
+    cacheable: bool = True
+
+
+class ResultCache:
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._markers: Dict[Tuple[str, str, str], TableMarkers] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(profile: Any, kind: str, sql: str, limit: Optional[int] = None) -> Hashable:
+        digest = hashlib.sha256(canonical_sql(sql).encode("utf-8")).hexdigest()
+        return profile.name, profile.dsn, kind, digest, limit
+
+    def _markers_for(self, profile: Any) -> TableMarkers:
+        mode = settings.RESULT_CACHE_INVALIDATION
+        mkey = (profile.name, profile.dsn, mode)
+        with self._lock:
+            markers = self._markers.get(mkey)
+            if markers is None:
+                markers = self._markers[mkey] = TableMarkers(profile, mode)
+            return markers
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry.blob)
+
+    def lookup(self, profile: Any, key: Hashable, sql: str, *, kind: str = "rows") -> CacheLookup:
+        if has_volatile_function(sql):
+            RESULT_CACHE_REQUESTS_TOTAL.labels(kind=kind, result="uncacheable").inc()
+            return CacheLookup(False, cacheable=False)
+        tables = referenced_tables(sql)
+        markers = self._markers_for(profile)
+        stamp = markers.snapshot(tables)
+        if not markers.covers(tables):
+            RESULT_CACHE_REQUESTS_TOTAL.labels(kind=kind, result="uncacheable").inc()
+            return CacheLookup(False, stamp=stamp, tables=tuple(tables), cacheable=False)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at <= time.monotonic():
+                    result = "expired"
+                elif entry.stamp != stamp:
+                    result = "invalidated"
+                else:
+                    self._entries.move_to_end(key)
+                    RESULT_CACHE_REQUESTS_TOTAL.labels(kind=kind, result="hit").inc()
+                    return CacheLookup(True, pickle.loads(entry.blob), stamp, tuple(tables))
+                self._drop(key)
+                RESULT_CACHE_BYTES.set(self.bytes)
+            else:
+                result = "miss"
+        RESULT_CACHE_REQUESTS_TOTAL.labels(kind=kind, result=result).inc()
+        return CacheLookup(False, None, stamp, tuple(tables))
+
+    def put(self, key: Hashable, value: Any, lookup: CacheLookup) -> bool:
+        """
+        Stores `value` with the markers seen by `lookup` (taken before the query ran).
+        """
+        ttl = table_ttl(list(lookup.tables))
+        if ttl <= 0 or not lookup.cacheable:
+            return False
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > min(self.max_entry_bytes, self.max_bytes):
+            return False
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = _Entry(blob, time.monotonic() + ttl, list(lookup.tables), lookup.stamp)
+            self.bytes += len(blob)
+            while self.bytes > self.max_bytes:
+                old_key = next(iter(self._entries))
+                self._drop(old_key)
+                RESULT_CACHE_EVICTIONS_TOTAL.inc()
+            RESULT_CACHE_BYTES.set(self.bytes)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            RESULT_CACHE_BYTES.set(0)
+
+
+result_cache = ResultCache(settings.RESULT_CACHE_MAX_BYTES, settings.RESULT_CACHE_MAX_ENTRY_BYTES)
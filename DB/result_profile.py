@@ -0,0 +1,122 @@
+"""
+Server-side profile of a generated query's full result, for the answer step.
+
+The preview holds the first rows only; for "how many / statistics"
+questions the LLM would extrapolate from them. One extra query wraps the SQL
+and lets Postgres aggregate everything:
+
+    WITH q(c0, c1) AS (<generated sql>)
+    SELECT count(*) AS n,
+           count(c0) AS c0_nonnull, count(DISTINCT c0) AS c0_distinct, min(c0) AS c0_min, ...,
+           (SELECT json_agg(t) FROM (SELECT c1 AS value, count(*) AS n FROM q
+                                     GROUP BY 1 ORDER BY 2 DESC, 1 LIMIT 5) t) AS c1_top
+    FROM q
+
+Columns are renamed positionally in the CTE, so duplicate or odd result column
+names do not matter. Which aggregates a column gets depends on its type
+(min/max: orderable types, avg: numbers, top values: text and bool). The query
+runs with RESULT_PROFILE_TIMEOUT_MS (capped by the request's DB budget); a
+failure only drops the profile.
+
+    {"row_count": 1234,
+     "columns": [{"name": "carrier", "type": "text", "nulls": 0, "distinct": 12,
+                  "min": "AA", "max": "UA", "top": [{"value": "DL", "n": 340}, ...]}, ...]}
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from API.config import settings
+from DB.executor import DBTimeoutError, run_aggregate
+from DB.format_pg_error import format_pg_error
+from observability.metrics import RESULT_PROFILE_TOTAL
+
+logger = logging.getLogger("orchestrator")
+
+NUMERIC_TYPES = {"int2", "int4", "int8", "numeric", "float4", "float8"}
+TEXT_TYPES = {"text", "varchar", "bpchar", "name", "citext"}
+TEMPORAL_TYPES = {"date", "time", "timetz", "timestamp", "timestamptz", "interval"}
+ORDERABLE_TYPES = NUMERIC_TYPES | TEXT_TYPES | TEMPORAL_TYPES
+DISTINCT_TYPES = ORDERABLE_TYPES | {"bool", "uuid", "jsonb", "money"}
+TOP_TYPES = TEXT_TYPES | {"bool"}
+
+
+def build_profile_sql(sql: str, types: List[str], *, top_k: int) -> str:
+    inner = sql.strip().rstrip(";")
+    names = [f"c{i}" for i in range(len(types))]
+    parts = ["count(*) AS n"]
+    for c, t in zip(names, types):
+        parts.append(f"count({c}) AS {c}_nonnull")
+        if t in DISTINCT_TYPES:
+            parts.append(f"count(DISTINCT {c}) AS {c}_distinct")
+        if t in ORDERABLE_TYPES:
+            parts.append(f"min({c}) AS {c}_min")
+            parts.append(f"max({c}) AS {c}_max")
+        if t in NUMERIC_TYPES:
+            parts.append(f"round(avg({c})::numeric, 4) AS {c}_avg")
+        if t in TOP_TYPES:
+            parts.append(
+                f"(SELECT json_agg(t) FROM (SELECT {c} AS value, count(*) AS n FROM q "
+                f"WHERE {c} IS NOT NULL GROUP BY 1 ORDER BY 2 DESC, 1 LIMIT {int(top_k)}) t) AS {c}_top"
+            )
+    select = ",\n       ".join(parts)
+    return f"WITH q({', '.join(names)}) AS (\n{inner}\n)\nSELECT {select}\nFROM q"
+
+
+def parse_profile(row: Dict[str, Any], columns: List[str], types: List[str]) -> Dict[str, Any]:
+    n = int(row.get("n") or 0)
+    out = []
+    for i, (name, t) in enumerate(zip(columns, types)):
+        c = f"c{i}"
+        col: Dict[str, Any] = {"name": name, "type": t or None, "nulls": n - int(row.get(f"{c}_nonnull") or 0)}
+        for key in ("distinct", "min", "max", "avg", "top"):
+            if f"{c}_{key}" in row:
+                col[key] = row[f"{c}_{key}"]
+        out.append(col)
+    return {"row_count": n, "columns": out}
+
+
+def should_profile(row_count: int, preview_limit: int) -> bool:
+    """
+    auto: only when the preview may be cut (a shorter preview is the whole result).
+    """
+    mode = settings.RESULT_PROFILE
+    if mode == "always":
+        return True
+    return mode == "auto" and row_count >= preview_limit
+
+
+def profile_result(
+    sql: str,
+    columns: List[str],
+    types: List[str],
+    *,
+    timeout_ms: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    The profile, or {"error": ...} if the query failed / timed out, or None when
+    the result has no columns.
+    """
+    if not columns:
+        return None
+    max_cols = settings.RESULT_PROFILE_MAX_COLUMNS
+    profiled, rest = columns[:max_cols], columns[max_cols:]
+    profile_types = [t or "" for t in types[:max_cols]]
+    profile_sql = build_profile_sql(sql, profile_types, top_k=settings.RESULT_PROFILE_TOP_K)
+    try:
+        row = run_aggregate(profile_sql, timeout_ms=timeout_ms or settings.RESULT_PROFILE_TIMEOUT_MS)
+    except DBTimeoutError:
+        RESULT_PROFILE_TOTAL.labels(outcome="timeout").inc()
+        return {"error": "profile query timed out"}
+    except Exception as e:
+        RESULT_PROFILE_TOTAL.labels(outcome="error").inc()
+        logger.warning("result profile query failed: %s", format_pg_error(e))
+        return {"error": format_pg_error(e)}
+
+    RESULT_PROFILE_TOTAL.labels(outcome="ok").inc()
+    profile = parse_profile(row, profiled, profile_types)
+    if rest:
+        profile["unprofiled_columns"] = rest
+    return profile
@@ -0,0 +1,65 @@
+"""
+JSON encoding of query results (psycopg rows) and tool payloads, in one pass.
+
+orjson encodes datetime/date/time, UUID, dataclasses and str/int/float/bool/None
+natively; the rest goes through _default:
+- Decimal   -> the exact JSON number ("12.30" stays 12.30, never a float);
+               NaN / Infinity -> string
+- bytes/memoryview -> hex, set -> list, dataclass (ColumnarResult) -> its
+               fields (stdlib path), anything else (timedelta, ...) -> str()
+Output is compact UTF-8 JSON (no indent, non-ASCII as is).
+
+Without orjson installed the stdlib json module is used with the same
+conversions, except that Decimals become strings (lossless, but quoted).
+
+    python -m benchmarks.row_encoding --rows 10000
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json, slower and Decimals as strings
+    orjson = None
+
+
+def _default(o: Any) -> Any:
+    if isinstance(o, Decimal):
+        if not o.is_finite():
+            return str(o)
+        if orjson is not None:
+            return orjson.Fragment(str(o))
+        return str(o)
+    if isinstance(o, (datetime, date, time)):  # stdlib json path
+        return o.isoformat()
+    if isinstance(o, (bytes, bytearray, memoryview)):
+        return bytes(o).hex()
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):  # stdlib path
+        return dataclasses.asdict(o)
+    return str(o)
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj, default=_default, option=_OPTIONS).decode("utf-8")
+
+else:
+
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":"))
+
+    def dumps_bytes(obj: Any) -> bytes:
+        return dumps(obj).encode("utf-8")
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+def schema_fingerprint(schema_full: Dict[str, Any]) -> str:
+    """
+    Stable hash of the catalog content (tables, columns, comments, FKs).
+    Same catalog -> same fingerprint, across requests and processes.
+    """
+    payload = json.dumps(
+        {
+            "tables": schema_full.get("tables") or {},
+            "foreign_keys": schema_full.get("foreign_keys") or [],
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def get_fingerprint(schema_full: Dict[str, Any]) -> str:
+    """
+    Fingerprint computed at catalog load time, or computed now for hand-built schemas.
+    """
+    return schema_full.get("fingerprint") or schema_fingerprint(schema_full)
+
+
+class FingerprintCache:
+    """
+    Derived artifacts of a catalog (rendered prompt text, per-table fragments, indexes),
+    memoized per schema fingerprint. Only the last `max_versions` catalog versions are kept,
+    so a schema change naturally retires the old entries.
+    """
+
+    def __init__(self, max_versions: int = 4):
+        self._max_versions = max_versions
+        self._data: "OrderedDict[str, Dict[Hashable, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, fingerprint: str, key: Hashable, build: Callable[[], T]) -> T:
+        with self._lock:
+            bucket = self._data.get(fingerprint)
+            if bucket is not None:
+                self._data.move_to_end(fingerprint)
+                if key in bucket:
+                    return bucket[key]
+
+        value = build()
+
+        with self._lock:
+            bucket = self._data.setdefault(fingerprint, {})
+            self._data.move_to_end(fingerprint)
+            bucket.setdefault(key, value)
+            while len(self._data) > self._max_versions:
+                self._data.popitem(last=False)
+            return bucket[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,126 @@
+"""
+On-disk spool of a full query result, written batch by batch (API/jobs.py).
+
+The file is NDJSON: a header line, then one line per fetched batch with the
+values stored column by column:
+
+    {"columns": ["carrier", "n"], "types": ["text", "int8"]}
+    {"n": 2, "data": [["SU", "S7"], [12, 9]]}
+    ...
+
+A batch never has to be held as row dicts, column names are not repeated, and
+a reader can skip whole batches by "n" without decoding the rest. Values are
+encoded with DB/row_encoding (exact Decimals); they come back as JSON types
+(dates as ISO strings; non-integer numbers as Decimal, digits kept). No
+Arrow/Parquet dependency: the reader hands out DB/columnar.ColumnarResult
+pages and CSV.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+from decimal import Decimal
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+from DB.columnar import ColumnarResult
+from DB.row_encoding import dumps_bytes
+
+SPOOL_FORMAT = "columnar-ndjson"
+
+
+class SpoolWriter:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.rows = 0
+        self.bytes = 0
+        self._f = open(path, "wb")
+
+    def write_header(self, columns: List[str], types: List[str]) -> None:
+        self._write({"columns": columns, "types": types})
+
+    def write_batch(self, rows: Sequence[Tuple[Any, ...]]) -> None:
+        if not rows:
+            return
+        self._write({"n": len(rows), "data": [list(col) for col in zip(*rows)]})
+        self.rows += len(rows)
+
+    def _write(self, obj: Any) -> None:
+        line = dumps_bytes(obj) + b"\n"
+        self._f.write(line)
+        self.bytes += len(line)
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self) -> "SpoolWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def _read_header(f: Any) -> Tuple[List[str], List[str]]:
+    header = json.loads(f.readline() or "{}")
+    columns = list(header.get("columns") or [])
+    return columns, list(header.get("types") or [""] * len(columns))
+
+
+def iter_batches(path: str) -> Iterator[List[Tuple[Any, ...]]]:
+    """
+    Rows of every batch, in order (header skipped).
+    """
+    with open(path, "rb") as f:
+        _read_header(f)
+        for line in f:
+            batch = json.loads(line, parse_float=Decimal)
+            yield list(zip(*batch["data"]))
+
+
+def read_spool(path: str, offset: int = 0, limit: Optional[int] = None) -> ColumnarResult:
+    """
+    Rows [offset, offset + limit) of the spooled result.
+    """
+    rows: List[Tuple[Any, ...]] = []
+    with open(path, "rb") as f:
+        columns, types = _read_header(f)
+        seen = 0
+        for line in f:
+            if limit is not None and len(rows) >= limit:
+                break
+            n = _batch_size(line)
+            if seen + n <= offset:
+                seen += n  # whole batch before the page: not decoded
+                continue
+            batch = list(zip(*json.loads(line, parse_float=Decimal)["data"]))
+            start = max(0, offset - seen)
+            end = None if limit is None else start + limit - len(rows)
+            rows.extend(batch[start:end])
+            seen += n
+    return ColumnarResult(columns, types, rows)
+
+
+def _batch_size(line: bytes) -> int:
+    # lines start with {"n":<int>, as written by SpoolWriter
+    head = line[:32]
+    if head.startswith(b'{"n":'):
+        return int(head[5:head.index(b",")])
+    return int(json.loads(line)["n"])
+
+
+def iter_csv(path: str) -> Iterator[str]:
+    """
+    The spooled result as CSV text chunks (header first, one chunk per batch).
+    """
+    with open(path, "rb") as f:
+        columns, _ = _read_header(f)
+    buf = io.StringIO()
+    ColumnarResult(columns).write_csv(buf)
+    yield buf.getvalue()
+    for rows in iter_batches(path):
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        yield buf.getvalue()
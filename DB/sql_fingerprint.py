@@ -0,0 +1,67 @@
+"""
+SQL fingerprints: the same query shape with different literals gets the same key.
+
+    normalize_sql("SELECT * FROM t WHERE id = 42 AND code IN ('a', 'b') LIMIT 10")
+    -> "select * from t where id = ? and code in (?) limit ?"
+
+Comments are dropped, string/number literals become ?, IN lists collapse to one ?,
+whitespace is collapsed, everything outside double-quoted identifiers is lowercased.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Iterator, Tuple
+
+_TOKEN_RE = re.compile(
+    r"""
+      (?P<comment>--[^\n]*|/\*.*?\*/)
+    | (?P<string>(?:[eEbBxXnN])?'(?:[^']|'')*')
+    | (?P<dollar>\$(?P<tag>\w*)\$.*?\$(?P=tag)\$)
+    | (?P<ident>"(?:[^"]|"")*")
+    | (?P<word>[A-Za-z_][\w$]*)
+    | (?P<number>(?<![\w$])\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|(?<![\w$])\.\d+(?:[eE][+-]?\d+)?)
+    | (?P<param>\$\d+|%s|%\(\w+\)s)
+    | (?P<space>\s+)
+    | (?P<other>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_IN_LIST_RE = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_VALUES_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+
+
+def tokenize_sql(sql: str) -> Iterator[Tuple[str, str]]:
+    """
+    (kind, text) pairs covering the whole text; kind is one of
+    comment | string | dollar | ident | word | number | param | space | other.
+    """
+    for m in _TOKEN_RE.finditer(sql or ""):
+        kind = m.lastgroup
+        if kind == "tag":  # inner group of a dollar-quoted string
+            kind = "dollar"
+        yield kind, m.group()
+
+
+def normalize_sql(sql: str) -> str:
+    out = []
+    for kind, text in tokenize_sql(sql):
+        if kind == "comment":
+            out.append(" ")
+        elif kind in ("string", "dollar", "number", "param"):
+            out.append("?")
+        elif kind == "space":
+            out.append(" ")
+        elif kind == "ident":
+            out.append(text)
+        else:
+            out.append(text.lower())
+    text = " ".join("".join(out).split())
+    text = _IN_LIST_RE.sub("in (?)", text)
+    text = _VALUES_RE.sub("(?)", text)
+    return text.rstrip(" ;")
+
+
+def sql_fingerprint(sql: str) -> str:
+    return hashlib.sha256(normalize_sql(sql).encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,148 @@
+"""
+Literal lifting for generated SQL: filter values become bind parameters, so the
+same query shape with different values is one server-side prepared statement.
+
+    lift_literals("SELECT * FROM f WHERE carrier = 'AA' AND dep > date '2024-01-01' LIMIT 10")
+    -> LiftedSQL("SELECT * FROM f WHERE carrier = %s AND dep > %s::date LIMIT 10", ["AA", "2024-01-01"])
+
+Only literals in WHERE / HAVING / JOIN ... ON are lifted; the SELECT list,
+GROUP BY / ORDER BY (ordinals!), LIMIT / OFFSET and escape/dollar-quoted strings
+stay inline. SQL that already has placeholders is not touched. Whatever the
+server still cannot type (e.g. `CASE ... THEN 'x'` in a filter) fails with a
+type-resolution error (42P18 / 42883 / 42725 / 42804); run_sql then runs the
+original text and stops lifting that fingerprint (see is_lifting_error /
+unsafe_fingerprints).
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, List, Optional
+
+from DB.sql_fingerprint import tokenize_sql
+
+LIFT_CLAUSES = {"where", "having", "on"}
+CLAUSE_WORDS = LIFT_CLAUSES | {
+    "select", "from", "join", "using", "group", "order", "limit", "offset", "fetch",
+    "window", "partition", "returning", "values", "set", "union", "intersect", "except",
+}
+# type 'literal' -> %s::type
+TYPED_LITERALS = {"date", "time", "timestamp", "timestamptz", "interval"}
+
+
+@dataclass
+class LiftedSQL:
+    sql: str  # psycopg placeholders (%s), literal % escaped
+    params: List[Any] = field(default_factory=list)
+
+
+def _string_value(text: str) -> str:
+    return text[1:-1].replace("''", "'")
+
+
+def _number_value(text: str) -> Any:
+    if text.isdigit():
+        return int(text)
+    return Decimal(text)
+
+
+def lift_literals(sql: str) -> Optional[LiftedSQL]:
+    """
+    None when there is nothing to lift or the text is not liftable.
+    """
+    out: List[str] = []
+    params: List[Any] = []
+    clause = "select"
+    stack: List[str] = []
+    last_word: Optional[str] = None  # previous significant token if it was a word
+    last_word_at = -1  # its index in out
+
+    for kind, text in tokenize_sql(sql):
+        if kind == "param":
+            return None
+        if kind in ("space", "comment"):
+            out.append(text.replace("%", "%%"))
+            continue
+
+        if kind == "word":
+            low = text.lower()
+            if low in CLAUSE_WORDS:
+                clause = low
+            out.append(text)
+            last_word, last_word_at = low, len(out) - 1
+            continue
+
+        lifted = clause in LIFT_CLAUSES
+        if kind == "string" and lifted and text[0] == "'":
+            if last_word in TYPED_LITERALS:
+                # date '2024-01-01' -> %s::date (a bare placeholder is a syntax error there)
+                del out[last_word_at:]
+                out.append(f"%s::{last_word}")
+            else:
+                out.append("%s")
+            params.append(_string_value(text))
+        elif kind == "number" and lifted:
+            out.append("%s")
+            params.append(_number_value(text))
+        else:
+            if text == "(":
+                stack.append(clause)
+            elif text == ")" and stack:
+                clause = stack.pop()
+            out.append(text.replace("%", "%%"))
+        last_word = None
+
+    if not params:
+        return None
+    return LiftedSQL("".join(out), params)
+
+
+# what a placeholder can cause where a literal worked: an untyped parameter
+# resolves no function / several functions / no type, or the wrong type
+LIFTING_SQLSTATES = {
+    "42P18",  # indeterminate_datatype
+    "42883",  # undefined_function
+    "42725",  # ambiguous_function
+    "42804",  # datatype_mismatch
+}
+
+
+def is_lifting_error(exc: BaseException) -> bool:
+    """
+    Only the type-resolution errors above are retried inline. Undefined
+    columns/tables, syntax and privilege errors (the rest of class 42) fail
+    the same way with literals: they are the query's own error and go back
+    to the caller unchanged.
+    """
+    return getattr(exc, "sqlstate", None) in LIFTING_SQLSTATES
+
+
+class UnsafeFingerprints:
+    """
+    Fingerprints whose lifted form failed; bounded, process-local.
+    """
+
+    def __init__(self, max_keys: int = 4096):
+        self._max_keys = max_keys
+        self._keys: "OrderedDict[Any, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key: Any) -> None:
+        with self._lock:
+            self._keys[key] = None
+            self._keys.move_to_end(key)
+            while len(self._keys) > self._max_keys:
+                self._keys.popitem(last=False)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._keys
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+
+unsafe_fingerprints = UnsafeFingerprints()
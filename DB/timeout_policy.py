@@ -0,0 +1,208 @@
+"""
+Adaptive statement_timeout for generated SQL.
+
+The timeout of an attempt is
+    estimate * PG_TIMEOUT_HEADROOM, clamped to [PG_TIMEOUT_MIN_MS, PG_TIMEOUT_MAX_MS]
+where the estimate comes from
+- history: recent runtimes of the same SQL fingerprint (DB/sql_fingerprint.py) on this DB profile
+- explain: EXPLAIN total cost * PG_TIMEOUT_MS_PER_COST when there is no history;
+  never below PG_STATEMENT_TIMEOUT_MS: the cost factor is a guess until calibrated,
+  and a timeout sends correct SQL to the LLM fixer, so it may only raise the default
+- default: PG_STATEMENT_TIMEOUT_MS when neither is available
+After a timeout in the same request the next attempt gets at least
+previous timeout * PG_TIMEOUT_ESCALATION. Every attempt is also capped by what
+is left of the request's DB time budget (PG_REQUEST_DB_BUDGET_MS); when less
+than PG_TIMEOUT_MIN_MS is left there is no next attempt.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, Optional, Tuple
+
+from API.config import settings
+from DB.profiles import get_db_profile
+from DB.sql_fingerprint import sql_fingerprint
+from observability.metrics import SQL_DB_BUDGET_EXHAUSTED_TOTAL, SQL_STATEMENT_TIMEOUT_MS
+
+HistoryKey = Tuple[str, str]  # (db profile, sql fingerprint)
+
+
+class _Samples:
+    def __init__(self, window: int):
+        self.ok: Deque[float] = deque(maxlen=window)  # seconds
+        self.timed_out_ms: int = 0  # largest timeout this shape has hit, decays on success
+        self.explain_ms: Optional[float] = None
+
+
+class RuntimeHistory:
+    """
+    Recent runtimes per (profile, fingerprint); bounded LRU, process-local.
+    """
+
+    def __init__(self, max_keys: int = 4096, window: int = 20):
+        self._max_keys = max_keys
+        self._window = window
+        self._data: "OrderedDict[HistoryKey, _Samples]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: HistoryKey) -> _Samples:
+        s = self._data.get(key)
+        if s is None:
+            s = self._data[key] = _Samples(self._window)
+            while len(self._data) > self._max_keys:
+                self._data.popitem(last=False)
+        self._data.move_to_end(key)
+        return s
+
+    def record(self, key: HistoryKey, seconds: float, *, timeout_ms: Optional[int] = None) -> None:
+        """
+        timeout_ms is set when the run was cancelled: the runtime is only known to exceed it.
+        A successful run halves the remembered timeout (dropped once the run itself
+        took longer), so a shape that got fast again stops starting above it.
+        """
+        with self._lock:
+            s = self._get(key)
+            if timeout_ms is None:
+                s.ok.append(seconds)
+                s.timed_out_ms //= 2
+                if s.timed_out_ms <= seconds * 1000:
+                    s.timed_out_ms = 0
+            else:
+                s.timed_out_ms = max(s.timed_out_ms, int(timeout_ms))
+
+    def record_explain(self, key: HistoryKey, estimate_ms: float) -> None:
+        with self._lock:
+            self._get(key).explain_ms = estimate_ms
+
+    def estimate(self, key: HistoryKey) -> Tuple[Optional[float], Optional[int], Optional[float]]:
+        """
+        (slowest recent runtime ms, largest timeout hit ms, cached EXPLAIN estimate ms)
+        """
+        with self._lock:
+            s = self._data.get(key)
+            if s is None:
+                return None, None, None
+            slowest = max(s.ok) * 1000 if s.ok else None
+            return slowest, s.timed_out_ms or None, s.explain_ms
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+runtime_history = RuntimeHistory()
+
+
+def history_key(sql: str) -> HistoryKey:
+    return get_db_profile().name, sql_fingerprint(sql)
+
+
+def explain_estimate_ms(sql: str) -> Optional[float]:
+    """
+    Planner total cost converted to ms; None if EXPLAIN fails (the real run reports the error).
+    """
+    try:
+        with get_db_profile().read_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT set_config('statement_timeout', '1000', true);")
+                cur.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+                plan = cur.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return float(plan[0]["Plan"]["Total Cost"]) * settings.PG_TIMEOUT_MS_PER_COST
+    except Exception:
+        return None
+
+
+@dataclass
+class TimeoutChoice:
+    timeout_ms: int
+    source: str  # history | explain | default | static
+    estimate_ms: Optional[float] = None
+    escalated: bool = False
+
+
+class DBTimeBudget:
+    """
+    DB time of one request across its attempts.
+    """
+
+    def __init__(self, total_ms: Optional[int] = None):
+        self.total_ms = settings.PG_REQUEST_DB_BUDGET_MS if total_ms is None else total_ms
+        self.used_ms = 0.0
+        self.last_timeout_ms: Optional[int] = None
+        self._started: Optional[float] = None
+
+    @property
+    def remaining_ms(self) -> float:
+        return max(0.0, self.total_ms - self.used_ms)
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+
+    def stop(self) -> float:
+        """
+        Charges the time since start(); returns it in seconds.
+        """
+        elapsed = time.perf_counter() - (self._started or time.perf_counter())
+        self.used_ms += elapsed * 1000
+        self._started = None
+        return elapsed
+
+    def timed_out(self, timeout_ms: int) -> None:
+        self.last_timeout_ms = max(self.last_timeout_ms or 0, timeout_ms)
+
+
+def choose_timeout(sql: str, budget: DBTimeBudget) -> Optional[TimeoutChoice]:
+    """
+    Timeout for the next attempt of `sql` (final text, LIMIT applied), or None
+    when the request's DB budget is exhausted.
+    """
+    lo, hi = settings.PG_TIMEOUT_MIN_MS, settings.PG_TIMEOUT_MAX_MS
+
+    if not settings.PG_TIMEOUT_ADAPTIVE:
+        choice = TimeoutChoice(settings.PG_STATEMENT_TIMEOUT_MS, "static")
+    else:
+        key = history_key(sql)
+        slowest_ms, timed_out_ms, explain_ms = runtime_history.estimate(key)
+        if slowest_ms is not None or timed_out_ms is not None:
+            # a shape that already timed out starts above the limit it hit
+            base = max(
+                (slowest_ms or 0.0) * settings.PG_TIMEOUT_HEADROOM,
+                (timed_out_ms or 0) * settings.PG_TIMEOUT_ESCALATION,
+            )
+            choice = TimeoutChoice(int(base), "history", slowest_ms)
+        else:
+            if explain_ms is None and settings.PG_TIMEOUT_EXPLAIN:
+                explain_ms = explain_estimate_ms(sql)
+                if explain_ms is not None:
+                    runtime_history.record_explain(key, explain_ms)
+            if explain_ms is not None:
+                choice = TimeoutChoice(
+                    max(int(explain_ms * settings.PG_TIMEOUT_HEADROOM), settings.PG_STATEMENT_TIMEOUT_MS),
+                    "explain",
+                    explain_ms,
+                )
+            else:
+                choice = TimeoutChoice(settings.PG_STATEMENT_TIMEOUT_MS, "default")
+        choice.timeout_ms = min(max(choice.timeout_ms, lo), hi)
+
+    if budget.last_timeout_ms is not None:
+        escalated = int(budget.last_timeout_ms * settings.PG_TIMEOUT_ESCALATION)
+        if escalated > choice.timeout_ms:
+            choice.timeout_ms, choice.escalated = min(escalated, max(hi, choice.timeout_ms)), True
+
+    if budget.remaining_ms < lo:
+        SQL_DB_BUDGET_EXHAUSTED_TOTAL.inc()
+        return None
+    choice.timeout_ms = int(min(choice.timeout_ms, budget.remaining_ms))
+
+    SQL_STATEMENT_TIMEOUT_MS.labels(source=choice.source, escalated=str(choice.escalated).lower()).observe(
+        choice.timeout_ms
+    )
+    return choice
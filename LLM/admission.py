@@ -0,0 +1,212 @@
+"""
+Admission control for LLM backends.
+
+One Ollama host serves all traffic; a /chat fans out to several sequential and
+sometimes concurrent LLM calls. Without a limit, bursts overload the GPU host and
+every request slows down together. Every chat model from make_llm() is wrapped in
+AdmittedChatModel:
+
+- per-backend concurrency limit (LLM_MAX_CONCURRENCY slots per provider/host)
+- bounded wait queue (LLM_MAX_QUEUE), ordered by priority, then arrival:
+  interactive chat first, background work (batch, reindexing, jobs) after it.
+  Priority is taken from a contextvar, see llm_priority().
+- LLMOverloadedError when the queue is full (429) or a call waited longer
+  than LLM_QUEUE_TIMEOUT_S (503). Both carry a Retry-After estimate; main.py
+  turns them into HTTP responses.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatResult
+
+from observability.metrics import (
+    LLM_ADMISSION_REJECTED_TOTAL,
+    LLM_INFLIGHT_CALLS,
+    LLM_QUEUE_DEPTH,
+    LLM_QUEUE_WAIT_SECONDS,
+)
+
+logger = logging.getLogger("orchestrator")
+
+PRIORITIES = {"interactive": 0, "background": 10}
+
+current_llm_priority: ContextVar[str] = ContextVar("current_llm_priority", default="interactive")
+
+
+@contextmanager
+def llm_priority(name: str) -> Iterator[None]:
+    """
+    with llm_priority("background"): ...  — LLM calls inside queue behind interactive ones.
+    """
+    if name not in PRIORITIES:
+        raise ValueError(f"Unknown LLM priority: {name}")
+    token = current_llm_priority.set(name)
+    try:
+        yield
+    finally:
+        current_llm_priority.reset(token)
+
+
+class LLMOverloadedError(RuntimeError):
+    def __init__(self, backend: str, reason: str, status_code: int, retry_after_s: int):
+        super().__init__(f"LLM backend {backend} is overloaded ({reason}), retry after {retry_after_s}s")
+        self.backend = backend
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after_s = retry_after_s
+
+
+class AdmissionController:
+    """
+    Counting semaphore with a bounded priority queue. Not thread-safe: used from
+    the single asyncio event loop of the app (sync calls bypass it).
+    """
+
+    def __init__(self, backend: str, max_concurrent: int, max_queue: int, queue_timeout_s: float):
+        self.backend = backend
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout_s = queue_timeout_s
+
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._avg_call_s = 2.0  # EWMA of call duration, for Retry-After
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, fut in self._waiters if not fut.done())
+
+    def retry_after_s(self) -> int:
+        waves = (self.queued + self._active) / self.max_concurrent
+        return max(1, int(waves * self._avg_call_s + 0.999))
+
+    def _reject(self, reason: str, status_code: int) -> LLMOverloadedError:
+        LLM_ADMISSION_REJECTED_TOTAL.labels(backend=self.backend, reason=reason).inc()
+        return LLMOverloadedError(self.backend, reason, status_code, self.retry_after_s())
+
+    def _update_gauges(self) -> None:
+        LLM_QUEUE_DEPTH.labels(backend=self.backend).set(self.queued)
+        LLM_INFLIGHT_CALLS.labels(backend=self.backend).set(self._active)
+
+    async def acquire(self, priority: str = "interactive") -> None:
+        start = time.perf_counter()
+        try:
+            if self._active < self.max_concurrent and not self.queued:
+                self._active += 1
+                return
+
+            if self.queued >= self.max_queue:
+                raise self._reject("queue_full", 429)
+
+            fut = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (PRIORITIES.get(priority, 0), next(self._seq), fut))
+            self._update_gauges()
+            try:
+                await asyncio.wait_for(asyncio.shield(fut), timeout=self.queue_timeout_s)
+            except asyncio.TimeoutError:
+                if fut.done() and not fut.cancelled():
+                    return  # slot was granted right at the deadline
+                fut.cancel()
+                raise self._reject("queue_timeout", 503)
+            except asyncio.CancelledError:
+                if fut.done() and not fut.cancelled():
+                    self.release()  # granted, but the caller went away
+                else:
+                    fut.cancel()
+                raise
+        finally:
+            LLM_QUEUE_WAIT_SECONDS.labels(backend=self.backend, priority=priority).observe(
+                time.perf_counter() - start
+            )
+            self._update_gauges()
+
+    def release(self, call_s: Optional[float] = None) -> None:
+        if call_s is not None:
+            self._avg_call_s = 0.8 * self._avg_call_s + 0.2 * call_s
+
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)  # slot handed over, _active unchanged
+                self._update_gauges()
+                return
+        self._active -= 1
+        self._update_gauges()
+
+
+_CONTROLLERS: Dict[str, AdmissionController] = {}
+
+
+def get_controller(backend: str, max_concurrent: int, max_queue: int, queue_timeout_s: float) -> AdmissionController:
+    """
+    One controller per backend (provider + host), shared by all models on it.
+    """
+    ctl = _CONTROLLERS.get(backend)
+    if ctl is None:
+        ctl = _CONTROLLERS[backend] = AdmissionController(backend, max_concurrent, max_queue, queue_timeout_s)
+    return ctl
+
+
+class AdmittedChatModel(BaseChatModel):
+    """
+    Chat model wrapper: every async generation waits for a slot of `controller`.
+    bind()/bind_tools() keep the wrapper as the bound runnable, so agent calls
+    are admitted too.
+    """
+    inner: BaseChatModel
+    controller: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return f"admitted-{self.inner._llm_type}"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"backend": self.controller.backend, **self.inner._identifying_params}
+
+    @property
+    def model(self) -> Optional[str]:
+        return getattr(self.inner, "model", None) or getattr(self.inner, "model_name", None)
+
+    def bind_tools(self, tools: Any, **kwargs: Any):
+        # provider-specific tool conversion, but bound to the wrapper
+        return self.bind(**self.inner.bind_tools(tools, **kwargs).kwargs)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return self.inner._generate(messages, stop=stop, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await self.controller.acquire(current_llm_priority.get())
+        start = time.perf_counter()
+        try:
+            return await self.inner._agenerate(messages, stop=stop, **kwargs)
+        finally:
+            self.controller.release(time.perf_counter() - start)
+
+
+def unwrap_llm(llm: Any) -> Any:
+    """
+    The provider client behind AdmittedChatModel / RunnableBinding.
+    """
+    while True:
+        if isinstance(llm, AdmittedChatModel):
+            llm = llm.inner
+        elif hasattr(llm, "bound") and hasattr(llm, "kwargs"):
+            llm = llm.bound
+        else:
+            return llm
@@ -35,3 +35,18 @@ AGENT_EXECUTOR = AgentExecutor(
     max_iterations=8,
     handle_parsing_errors=True,
 )
+
+# Same agent, but db_query_chain output is returned as-is instead of being
+# paraphrased by one more LLM turn; API/chat.py renders it from a template.
+TEMPLATE_TOOLS = [
+    t.model_copy(update={"return_direct": True}) if t.name == "db_query_chain" else t
+    for t in TOOLS
+]
+
+AGENT_EXECUTOR_TEMPLATE = AgentExecutor(
+    agent=AGENT,
+    tools=TEMPLATE_TOOLS,
+    verbose=False,
+    max_iterations=8,
+    handle_parsing_errors=True,
+)
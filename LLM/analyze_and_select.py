@@ -0,0 +1,112 @@
+"""
+Combined "analyze + select tables" stage (settings.PIPELINE_MODE="combined").
+
+The two-call path runs analyze_query() and then select_relevant_schema_with_llm();
+the analysis is only used to pick tables. Here one LLM call returns both the
+analysis fields and the table pick, over a candidate list pre-filtered with the
+BM25 index (RAG/lexical_index.py) instead of the whole-database brief.
+
+The reply is validated with AnalyzeSelectResult (LLM/response_models.py). If it
+does not validate after repair, the lexical ranking is used for the table pick
+(same fallback as the two-call path).
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from DB.schema_catalog import FingerprintCache, get_fingerprint
+from LLM.response_models import AnalyzeSelectResult
+from LLM.select_relevant_schema_with_llm import (
+    build_selected_schema,
+    render_schema_brief,
+    schema_lexical_index,
+)
+from LLM.structured import StructuredOutputError, ainvoke_structured, parse_model
+from prompts.analyze_select import ANALYZE_SELECT_PROMPT
+
+logger = logging.getLogger("orchestrator")
+
+_PROMPT_CACHE = FingerprintCache()
+
+
+def candidate_tables(
+    schema_full: Dict[str, Any],
+    user_text: str,
+    max_candidates: int = 40,
+) -> List[str]:
+    """
+    Tables shown to the combined prompt. Small catalogs are shown whole;
+    otherwise the top BM25 hits for the raw user request.
+    Returns [] when the whole catalog should be used.
+    """
+    tables = schema_full.get("tables") or {}
+    if len(tables) <= max_candidates:
+        return []
+    hits = schema_lexical_index(schema_full).search([user_text], top_k=max_candidates)
+    return [f"{s}.{t}" for (s, t), _ in hits if f"{s}.{t}" in tables]
+
+
+def parse_analyze_select(raw: str) -> Optional[AnalyzeSelectResult]:
+    try:
+        return parse_model(raw, AnalyzeSelectResult)
+    except ValueError:
+        return None
+
+
+def _system_prompt(schema_full: Dict[str, Any], max_tables: int) -> str:
+    return _PROMPT_CACHE.get_or_build(
+        get_fingerprint(schema_full),
+        ("analyze_select_system_prompt", max_tables),
+        lambda: ANALYZE_SELECT_PROMPT.format(max_tables=max_tables).strip(),
+    )
+
+
+async def analyze_and_select(
+    llm,
+    user_text: str,
+    schema_full: Dict[str, Any],
+    *,
+    max_tables: int = 20,
+    max_candidates: int = 40,
+    max_join_hops: int = 3,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Returns (analysis, schema_selected) — same shapes as
+    analyze_query() and select_relevant_schema_with_llm().
+    """
+    candidates = candidate_tables(schema_full, user_text, max_candidates)
+    brief = render_schema_brief(schema_full, candidates or None)
+
+    try:
+        parsed, raw = await ainvoke_structured(
+            llm,
+            [
+                SystemMessage(content=_system_prompt(schema_full, max_tables)),
+                HumanMessage(content=f"candidate tables:\n{brief}\n\nuser request: {user_text.strip()}"),
+            ],
+            AnalyzeSelectResult,
+            "analyze_select",
+        )
+        analysis = parsed.analysis()
+        selection = parsed.selection()
+    except StructuredOutputError as e:
+        logger.warning("analyze_select: reply did not validate, using lexical fallback")
+        raw = e.raw
+        analysis = {"search_queries": [user_text], "keywords": []}
+        selection = {}
+
+    schema_selected = build_selected_schema(
+        schema_full,
+        analysis,
+        selection,
+        llm_raw=raw,
+        max_tables=max_tables,
+        max_join_hops=max_join_hops,
+        mode="llm_analyze_select",
+    )
+    schema_selected["retrieval_debug"]["candidates"] = len(candidates) or len(schema_full["tables"])
+    return analysis, schema_selected
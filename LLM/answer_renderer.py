@@ -0,0 +1,145 @@
+"""
+Final answer for db_query_chain results.
+
+- render_db_answer: deterministic, no LLM — short header + markdown table of the
+  row preview + the SQL. Default answer mode (settings.DEFAULT_ANSWER_MODE="template").
+- summarize_db_result: the LLM paraphrase, used for answer_mode="llm" and as an
+  optional follow-up (summarize_last_result tool); it is given answer_context(payload).
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from DB.columnar import payload_table
+from LLM.utils import llm_model_name, record_llm_usage
+from prompts.answer import DB_ANSWER_PROMPT
+
+MAX_TABLE_COLUMNS = 12
+MAX_CELL_CHARS = 60
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    text = " ".join(str(value).split()).replace("|", "\\|")
+    if len(text) > MAX_CELL_CHARS:
+        text = text[: MAX_CELL_CHARS - 1] + "…"
+    return text
+
+
+def render_markdown_table(rows: Sequence[Any], columns: Optional[List[str]] = None) -> str:
+    """
+    rows are dicts, or sequences in the order of `columns` (columnar results).
+    """
+    if not rows:
+        return ""
+    if columns is None:
+        columns = list(rows[0].keys())
+        rows = [[r.get(c) for c in columns] for r in rows]
+    hidden = len(columns) - MAX_TABLE_COLUMNS
+    shown = columns[:MAX_TABLE_COLUMNS]
+
+    lines = [
+        "| " + " | ".join(_cell(c) for c in shown) + " |",
+        "| " + " | ".join("---" for _ in shown) + " |",
+    ]
+    for row in rows:
+        lines.append("| " + " | ".join(_cell(v) for v in row[:MAX_TABLE_COLUMNS]) + " |")
+    if hidden > 0:
+        lines.append(f"\n_{hidden} more columns not shown._")
+    return "\n".join(lines)
+
+
+def _header(payload: Dict[str, Any], rows: Sequence[Any], preview_limit: int) -> str:
+    n = len(rows)
+    total = (payload.get("profile") or {}).get("row_count")
+    if n == 0:
+        text = "The query ran successfully but returned no rows."
+    elif total is not None and total > n:
+        text = f"Here are the first {n} of {total} rows."
+    elif total is not None:
+        text = f"Found {n} row{'s' if n != 1 else ''}."
+    elif n >= preview_limit:
+        text = f"Here are the first {n} rows."
+    else:
+        text = f"Found {n} row{'s' if n != 1 else ''}."
+
+    attempts = len(payload.get("attempts") or [])
+    if attempts:
+        text += f" (SQL was corrected {attempts} time{'s' if attempts != 1 else ''}.)"
+    return text
+
+
+def render_db_answer(payload: Dict[str, Any], preview_limit: int = 10) -> str:
+    """
+    payload is the db_query_chain result: {"ok", "sql", "rows_preview" | "result", "attempts", "error", ...}
+    """
+    if not payload.get("ok"):
+        parts = [f"I couldn't get the data: {payload.get('error') or 'unknown error'}"]
+        attempts = payload.get("attempts") or []
+        last_sql: Optional[str] = payload.get("sql") or (attempts[-1].get("sql") if attempts else None)
+        if last_sql:
+            parts.append(f"Last tried SQL:\n```sql\n{last_sql}\n```")
+        parts.append("Try narrowing the request (filters, time range) or rephrasing it.")
+        return "\n\n".join(parts)
+
+    columns, rows = payload_table(payload)
+    parts = [_header(payload, rows, preview_limit)]
+    table = render_markdown_table(rows, columns)
+    if table:
+        parts.append(table)
+    parts.append(f"```sql\n{payload.get('sql', '')}\n```")
+    return "\n\n".join(parts)
+
+
+def answer_context(payload: Dict[str, Any], sample_rows: int = 3) -> Dict[str, Any]:
+    """
+    What the LLM answer step sees. With a result profile: the SQL, the profile
+    over the full result and a few sample rows, so totals/statistics come from
+    Postgres instead of being extrapolated from the preview. Otherwise the
+    payload without the retrieval debug fields.
+    """
+    if not payload.get("ok") or not isinstance(payload.get("profile"), dict) or "error" in payload["profile"]:
+        return {k: v for k, v in payload.items() if k not in ("analysis", "schema_selected")}
+    columns, rows = payload_table(payload)
+    return {
+        "ok": True,
+        "sql": payload.get("sql"),
+        "profile": payload["profile"],
+        "sample_rows": [dict(zip(columns, row)) for row in rows[:sample_rows]],
+    }
+
+
+def parse_db_payload(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the db_query_chain payload if `text` is its JSON output, else None.
+    """
+    try:
+        obj = json.loads(text)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(obj, dict) and obj.get("mode") == "db_query_chain":
+        return obj
+    return None
+
+
+async def summarize_db_result(llm: Any, user_text: str, result_json: str) -> str:
+    res = await llm.ainvoke([
+        SystemMessage(content=DB_ANSWER_PROMPT),
+        HumanMessage(
+            content=(
+                "User request:\n"
+                f"{user_text}\n\n"
+                "Query result (JSON):\n"
+                f"{result_json}"
+            )
+        ),
+    ])
+    record_llm_usage(res, llm_model_name(llm), "db_answer")
+    return res.content or ""
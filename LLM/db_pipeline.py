@@ -0,0 +1,138 @@
+"""
+db_query_chain pipeline without the session side effects:
+catalog -> analyze/select tables -> generate + execute SQL (with fixes).
+
+Identical concurrent questions (same normalized text, model, temperature,
+schema fingerprint and pipeline mode) are coalesced: one run, every caller gets
+its result. Session writes (last_sql, history) stay in the tool, per caller.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Optional
+
+from API.config import settings
+from DB.profiles import get_db_profile
+from DB.schema_catalog import get_fingerprint
+from LLM.admission import unwrap_llm
+from LLM.analyze_and_select import analyze_and_select
+from LLM.query_analyze import analyze_query
+from LLM.select_relevant_schema_with_llm import select_relevant_schema_with_llm
+from LLM.sql_pipeline import execute_with_retries, generate_sql
+from LLM.utils import llm_model_name, normalize_question
+from observability.timing import stage_timer
+from store.single_flight import SingleFlight
+
+logger = logging.getLogger("orchestrator")
+
+_PIPELINE_FLIGHTS = SingleFlight("db_pipeline")
+
+
+async def _select_schema(llm: Any, user_text: str, schema_full: Dict[str, Any]) -> tuple:
+    """
+    (analysis, selected schema) per PIPELINE_MODE.
+    """
+    if settings.PIPELINE_MODE == "combined":
+        # one LLM call: analysis + table selection over BM25 candidates
+        with stage_timer("analyze_select"):
+            analysis, schema_selected = await analyze_and_select(
+                llm, user_text, schema_full, max_candidates=settings.COMBINED_MAX_CANDIDATES,
+            )
+    else:
+        with stage_timer("analyze"):
+            analysis = await analyze_query(llm, user_text)
+        logger.info("analyzed query was executed")
+        with stage_timer("select_tables"):
+            schema_selected = await select_relevant_schema_with_llm(llm, analysis, schema_full)
+    logger.info("llm has selected relevant schemas")
+    return analysis, schema_selected
+
+
+async def _run(llm: Any, user_text: str, schema_full: Dict[str, Any], max_attempts: int) -> Dict[str, Any]:
+    analysis, schema_selected = await _select_schema(llm, user_text, schema_full)
+
+    exec_res = await execute_with_retries(
+        llm=llm,
+        user_text=user_text,
+        schema_context=schema_selected,
+        max_attempts=max_attempts,
+    )
+    logger.info("llm tryes to execute sql")
+
+    return {
+        "mode": "db_query_chain",
+        "analysis": analysis,
+        "schema_selected": schema_full.get("retrieval_debug", {}),
+        **exec_res,
+    }
+
+
+def pipeline_key(llm: Any, user_text: str, schema_full: Dict[str, Any], max_attempts: int) -> tuple:
+    return (
+        get_db_profile().name,
+        normalize_question(user_text),
+        llm_model_name(llm),
+        getattr(unwrap_llm(llm), "temperature", None),
+        get_fingerprint(schema_full),
+        settings.PIPELINE_MODE,
+        max_attempts,
+    )
+
+
+async def run_db_pipeline(
+    llm: Any,
+    user_text: str,
+    *,
+    max_attempts: int = 5,
+    schema_full: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    schema_full may be passed by callers that run many questions against one
+    catalog (API/batch.py); otherwise it is loaded here.
+    """
+    if schema_full is None:
+        # catalog of the request's DB profile, cached per profile; concurrent loads share one query set
+        with stage_timer("catalog"):
+            schema_full = await get_db_profile().aschema_context()
+    if not schema_full.get("tables"):
+        return {
+            "mode": "db_query_chain",
+            "ok": False,
+            "error": "No tables found in database schema.",
+        }
+
+    if not settings.SINGLE_FLIGHT_ENABLED:
+        return await _run(llm, user_text, schema_full, max_attempts)
+
+    payload, shared = await _PIPELINE_FLIGHTS.do(
+        pipeline_key(llm, user_text, schema_full, max_attempts),
+        lambda: _run(llm, user_text, schema_full, max_attempts),
+    )
+    if shared:
+        logger.info("db_pipeline_coalesced", extra={"user_text": user_text})
+    # callers get their own top-level dict; nested values are read-only by convention
+    return dict(payload)
+
+
+async def generate_db_sql(
+    llm: Any,
+    user_text: str,
+    *,
+    max_attempts: int = 3,
+    schema_full: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    The same analysis and table selection, but the SQL is only checked with
+    EXPLAIN, not executed: API/jobs.py runs it afterwards with the job timeout.
+    Not coalesced (jobs are few and long).
+    """
+    if schema_full is None:
+        with stage_timer("catalog"):
+            schema_full = await get_db_profile().aschema_context()
+    if not schema_full.get("tables"):
+        return {"ok": False, "error": "No tables found in database schema."}
+
+    analysis, schema_selected = await _select_schema(llm, user_text, schema_full)
+    gen_res = await generate_sql(llm, user_text, schema_selected, max_attempts=max_attempts)
+    return {"mode": "db_query_job", "analysis": analysis, **gen_res}
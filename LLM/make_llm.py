@@ -1,27 +1,45 @@
 from langchain_ollama import ChatOllama
 from API.config import settings
 from langchain_openai import ChatOpenAI
+from LLM.admission import AdmittedChatModel, get_controller
+
+
+def _admitted(llm, backend: str):
+    if not settings.LLM_ADMISSION_ENABLED:
+        return llm
+    controller = get_controller(
+        backend,
+        max_concurrent=settings.LLM_MAX_CONCURRENCY,
+        max_queue=settings.LLM_MAX_QUEUE,
+        queue_timeout_s=settings.LLM_QUEUE_TIMEOUT_S,
+    )
+    return AdmittedChatModel(inner=llm, controller=controller)
+
 
 def make_llm(model: str | None = None, temperature: float | None = None):
     provider = settings.LLM_PROVIDER.lower()
     temp = temperature if temperature is not None else settings.DEFAULT_TEMPERATURE
 
     if provider == "ollama":
-        return ChatOllama(
+        llm = ChatOllama(
             model=model or settings.DEFAULT_LLM_MODEL,
             temperature=temp,
             base_url=settings.OLLAMA_BASE_URL,
+            keep_alive=settings.OLLAMA_KEEP_ALIVE,
+            num_ctx=settings.OLLAMA_NUM_CTX,
         )
+        return _admitted(llm, f"ollama:{settings.OLLAMA_BASE_URL}")
 
     if provider == "openai":
         if not settings.OPENAI_API_KEY:
             raise RuntimeError("OPENAI_API_KEY is not set")
 
-        return ChatOpenAI(
+        llm = ChatOpenAI(
             model= settings.OPENAI_MODEL,
             temperature=temp,
             api_key=settings.OPENAI_API_KEY,
             base_url=settings.OPENAI_BASE_URL,  # None is OK
         )
+        return _admitted(llm, f"openai:{settings.OPENAI_BASE_URL or 'api.openai.com'}")
 
     raise ValueError(f"Unknown LLM_PROVIDER: {settings.LLM_PROVIDER}")
\ No newline at end of file
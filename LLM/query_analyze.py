@@ -1,6 +1,9 @@
 from pydantic import BaseModel
 from fastapi import APIRouter
 from LLM.utils import to_lc_messages
+from LLM.response_models import QueryAnalysis
+from LLM.structured import StructuredOutputError, ainvoke_structured
+from LLM.admission import LLMOverloadedError
 from LLM.make_llm import make_llm
 from store.SessionStore import ChatMessage,ChatRequest
 from typing import Any, Dict, List, Optional
@@ -10,7 +13,6 @@ from observability.metrics import LLM_LATENCY,LLM_ERRORS_TOTAL
 import time
 import logging
 from API.config import settings
-import json
 from typing import Dict, Any
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_ollama import ChatOllama
@@ -45,11 +47,12 @@ async def query_analyze(req: ChatRequest, request: Request):
 
     llm_start = time.perf_counter()
     try:
-        res = await llm.ainvoke(prompt)
-        raw = (res.content or "").strip()
-        analysis = json.loads(raw)
-    except json.JSONDecodeError:
+        parsed, _ = await ainvoke_structured(llm, prompt, QueryAnalysis, "query_analyze")
+        analysis = parsed.model_dump()
+    except StructuredOutputError:
         raise HTTPException(status_code=500, detail="LLM returned non-JSON response")
+    except LLMOverloadedError:
+        raise
     except Exception as e:
         LLM_ERRORS_TOTAL.labels(model=settings.DEFAULT_LLM_MODEL, mode="query_analyze", error_type=type(e).__name__).inc()
         raise HTTPException(status_code=500, detail=str(e))
@@ -74,23 +77,13 @@ async def query_analyze(req: ChatRequest, request: Request):
 
 
 async def analyze_query(llm: ChatOllama, user_text: str) -> Dict[str, Any]:
-    res = await llm.ainvoke([
-        SystemMessage(content=QUERY_ANALYZER_PROMPT),
-        HumanMessage(content=f"user request: {user_text.strip()}"),
-    ])
-
-    raw = (res.content or "").strip()
-    clean_js = extract_json(raw)
-
-    try:
-        return json.loads(clean_js)
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Query analyzer returned invalid JSON: {clean_js}") from e
-
-
-def extract_json(text: str) -> str:
-    start = text.find("{")
-    end = text.rfind("}")
-    if start == -1 or end == -1:
-        raise ValueError("No JSON object found")
-    return text[start:end+1]
+    parsed, _ = await ainvoke_structured(
+        llm,
+        [
+            SystemMessage(content=QUERY_ANALYZER_PROMPT),
+            HumanMessage(content=f"user request: {user_text.strip()}"),
+        ],
+        QueryAnalysis,
+        "query_analyze",
+    )
+    return parsed.model_dump()
@@ -0,0 +1,99 @@
+"""
+Pydantic models for every JSON-producing LLM stage.
+
+They are used twice: as the JSON schema sent to the provider (Ollama `format`,
+OpenAI `response_format`, see LLM/structured.py) and to validate the reply.
+Defaults are lenient on purpose — a missing optional field is not worth a retry.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+
+class LLMReply(BaseModel):
+    """
+    Base for LLM replies: explicit nulls fall back to field defaults,
+    unknown keys are kept (callers used to get the raw dict).
+    """
+    model_config = ConfigDict(extra="allow")
+
+    @model_validator(mode="before")
+    @classmethod
+    def _drop_nulls(cls, data: Any) -> Any:
+        if isinstance(data, dict):
+            return {
+                k: v for k, v in data.items()
+                if v is not None or k not in cls.model_fields or cls.model_fields[k].is_required()
+            }
+        return data
+
+
+class Entity(LLMReply):
+    type: str = "generic"
+    value: Any = None
+    aliases: List[str] = Field(default_factory=list)
+    confidence: Optional[float] = None
+
+
+class QueryAnalysis(LLMReply):
+    """
+    QUERY_ANALYZER_PROMPT
+    """
+    intent: str = "unknown"
+    entities: List[Entity] = Field(default_factory=list)
+    time_range: Dict[str, Any] = Field(default_factory=dict)
+    metrics: Dict[str, Any] = Field(default_factory=dict)
+    keywords: List[str] = Field(default_factory=list)
+    search_queries: List[str] = Field(default_factory=list)
+
+
+class TableSelection(LLMReply):
+    """
+    select_relevant_schema_with_llm() system prompt
+    """
+    tables: List[str] = Field(default_factory=list)
+    also_consider: List[str] = Field(default_factory=list)
+    reason: str = ""
+    confidence: Optional[float] = None
+
+
+class AnalyzeSelectResult(QueryAnalysis, TableSelection):
+    """
+    ANALYZE_SELECT_PROMPT: analysis fields + table selection in one reply.
+    """
+
+    def analysis(self) -> Dict[str, Any]:
+        return self.model_dump(include=set(QueryAnalysis.model_fields))
+
+    def selection(self) -> Dict[str, Any]:
+        return self.model_dump(include=set(TableSelection.model_fields))
+
+
+class SqlGeneration(LLMReply):
+    """
+    SQL_GENERATOR_PROMPT
+    """
+    sql_preview: str = ""
+    sql_full: str = ""
+    notes: str = ""
+
+
+class SqlFix(LLMReply):
+    """
+    SQL_FIXER_PROMPT
+    """
+    sql: str = ""
+    fix_notes: str = ""
+
+
+class RouteClassification(LLMReply):
+    """
+    DB_CLASSIFIER_PROMPT
+    """
+    is_db_request: bool = False
+    confidence: float = 0.0
+    reason: str = ""
+    rewrite: str = ""
@@ -0,0 +1,156 @@
+"""
+Fast-path router in front of the tool-calling agent.
+
+The agent spends one LLM round-trip only to pick a tool and another one to turn
+the tool JSON into prose. For clear data requests we skip both:
+a tiny classifier call (DB_CLASSIFIER_PROMPT, cached per normalized message)
+decides, and confident DB requests go straight to db_query_chain, whose result
+is rendered by LLM/answer_renderer.py.
+Ambiguous turns (follow-ups, chat, low confidence) still go to the agent.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from API.config import settings
+from DB.row_encoding import dumps as dumps_json
+from LLM.admission import LLMOverloadedError
+from LLM.answer_renderer import answer_context, parse_db_payload, render_db_answer, summarize_db_result
+from LLM.make_llm import make_llm
+from LLM.response_models import RouteClassification
+from LLM.structured import StructuredOutputError, ainvoke_structured
+from LLM.utils import normalize_question
+from observability.metrics import ROUTER_DECISIONS_TOTAL
+from prompts.classifier import DB_CLASSIFIER_PROMPT
+from tools.llm_tools import db_query_chain
+
+logger = logging.getLogger("orchestrator")
+
+
+@dataclass
+class RouteDecision:
+    is_db_request: bool
+    confidence: float
+    reason: str = ""
+    cached: bool = False
+
+    @property
+    def route(self) -> str:
+        if self.is_db_request and self.confidence >= settings.ROUTER_MIN_CONFIDENCE:
+            return "db"
+        return "agent"
+
+
+class _DecisionCache:
+    """
+    Small LRU: normalized user message -> RouteDecision.
+    """
+
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._data: "OrderedDict[str, RouteDecision]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[RouteDecision]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: RouteDecision) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self._max_size:
+                self._data.popitem(last=False)
+
+
+_CACHE = _DecisionCache(settings.ROUTER_CACHE_SIZE)
+_ROUTER_LLM = None
+
+
+def _router_llm():
+    global _ROUTER_LLM
+    if _ROUTER_LLM is None:
+        _ROUTER_LLM = make_llm(settings.ROUTER_LLM_MODEL, 0)
+    return _ROUTER_LLM
+
+
+async def classify_request(user_text: str, llm: Any = None) -> RouteDecision:
+    key = normalize_question(user_text)
+    cached = _CACHE.get(key)
+    if cached is not None:
+        ROUTER_DECISIONS_TOTAL.labels(route=cached.route, cached="true").inc()
+        return RouteDecision(cached.is_db_request, cached.confidence, cached.reason, cached=True)
+
+    llm = llm or _router_llm()
+    try:
+        # no repair round-trip: an unsure router just hands over to the agent
+        parsed, _ = await ainvoke_structured(
+            llm,
+            [
+                SystemMessage(content=DB_CLASSIFIER_PROMPT),
+                HumanMessage(content=user_text),
+            ],
+            RouteClassification,
+            "route",
+            repair_attempts=0,
+        )
+        decision = RouteDecision(parsed.is_db_request, parsed.confidence, parsed.reason)
+    except StructuredOutputError:
+        decision = RouteDecision(is_db_request=False, confidence=0.0, reason="unparseable router output")
+    _CACHE.put(key, decision)
+    ROUTER_DECISIONS_TOTAL.labels(route=decision.route, cached="false").inc()
+    return decision
+
+
+async def answer_db_request(user_text: str, answer_mode: str, llm: Any = None) -> str:
+    """
+    Fast path: runs db_query_chain directly. answer_mode="template" renders the result
+    without an LLM; "llm" phrases it in one LLM call.
+    """
+    tool_output = await db_query_chain.ainvoke({"user_text": user_text})
+    payload = parse_db_payload(tool_output)
+
+    if answer_mode == "template" and payload is not None:
+        return render_db_answer(payload)
+
+    llm = llm or make_llm(settings.DEFAULT_LLM_MODEL, settings.DEFAULT_TEMPERATURE)
+    result_json = dumps_json(answer_context(payload)) if payload is not None else tool_output
+    return await summarize_db_result(llm, user_text, result_json)
+
+
+async def route_request(user_text: str, answer_mode: str) -> Optional[str]:
+    """
+    Returns the answer if the fast path handled the request, None to fall back to the agent.
+    Follow-ups that need chat history are expected to be classified as unsure -> agent.
+    """
+    if not settings.FAST_PATH_ROUTER:
+        return None
+
+    try:
+        decision = await classify_request(user_text)
+    except LLMOverloadedError:
+        raise  # 429/503 for the client (main.py); the agent would only queue another LLM call
+    except Exception:
+        logger.exception("router classification failed; falling back to agent")
+        return None
+
+    logger.info("route_decision", extra={
+        "route": decision.route,
+        "confidence": decision.confidence,
+        "cached": decision.cached,
+        "reason": decision.reason,
+    })
+    if decision.route != "db":
+        return None
+
+    return await answer_db_request(user_text, answer_mode)
@@ -1,60 +1,95 @@
 
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import json
 from langchain_core.messages import SystemMessage, HumanMessage
+from RAG.lexical_index import LexicalIndex, rank_tables_lexically
+from DB.join_graph import JoinGraph, join_hints
+from DB.schema_catalog import FingerprintCache, get_fingerprint
+from LLM.response_models import TableSelection
+from LLM.structured import StructuredOutputError, ainvoke_structured
 
 
-def _safe_json_loads(s: str) -> Optional[dict]:
-    try:
-        return json.loads(s)
-    except Exception:
-        return None
+# rendered brief, per-table lines and lexical index, per catalog version
+_SCHEMA_CACHE = FingerprintCache()
 
 
+def _render_table_line(fq: str, t: Dict[str, Any]) -> str:
+    cols = t["columns"][:12]
+    cols_s = ", ".join(f'{c["name"]}:{c["type"]}' for c in cols)
+    desc = (t.get("description") or "").strip()
+    if desc:
+        return f"- {fq} — {desc} | cols: {cols_s}"
+    return f"- {fq} | cols: {cols_s}"
 
-async def select_relevant_schema_with_llm(
-    llm,
-    analysis: dict,
+
+def _table_lines(schema_full: Dict[str, Any]) -> Dict[str, str]:
+    return _SCHEMA_CACHE.get_or_build(
+        get_fingerprint(schema_full),
+        "table_lines",
+        lambda: {fq: _render_table_line(fq, t) for fq, t in schema_full["tables"].items()},
+    )
+
+
+def _render_brief(
     schema_full: Dict[str, Any],
-    *,
-    max_tables: int = 20,
-) -> Dict[str, Any]:
+    tables: Optional[List[str]] = None,
+) -> str:
+    table_lines = _table_lines(schema_full)
+    fqs = list(schema_full["tables"].keys()) if tables is None else tables
+    lines = [table_lines[fq] for fq in fqs if fq in table_lines]
+
+    fks = schema_full.get("foreign_keys") or []
+    if tables is not None:
+        subset = set(tables)
+        fks = [fk for fk in fks if fk["from"] in subset and fk["to"] in subset]
+    if fks:
+        lines.append("\nForeign keys:")
+        for fk in fks[:200]:
+            lines.append(
+                f'- {fk["from"]}.{fk["from_column"]} -> '
+                f'{fk["to"]}.{fk["to_column"]}'
+            )
+
+    return "\n".join(lines)
+
+
+def render_schema_brief(
+    schema_full: Dict[str, Any],
+    tables: Optional[Iterable[str]] = None,
+) -> str:
+    """
+    One line per table (+ FK list) for table selection prompts.
+    The whole-database brief is rendered once per schema fingerprint; a brief for
+    a subset of tables is assembled from the cached per-table lines.
+    """
+    if tables is None:
+        return _SCHEMA_CACHE.get_or_build(
+            get_fingerprint(schema_full),
+            "brief",
+            lambda: _render_brief(schema_full),
+        )
+    return _render_brief(schema_full, list(tables))
+
+
+def schema_lexical_index(schema_full: Dict[str, Any]) -> LexicalIndex:
+    """
+    BM25 index over the whole catalog, built once per schema fingerprint.
+    """
+    return _SCHEMA_CACHE.get_or_build(
+        get_fingerprint(schema_full),
+        "lexical_index",
+        lambda: LexicalIndex.from_schema_full(schema_full),
+    )
+
 
-    def render_schema_brief(schema_full: Dict[str, Any]) -> str:
-        lines = []
-        for fq, t in schema_full["tables"].items():
-            cols = t["columns"][:12]
-            cols_s = ", ".join(f'{c["name"]}:{c["type"]}' for c in cols)
-            desc = (t.get("description") or "").strip()
-            if desc:
-                lines.append(f"- {fq} — {desc} | cols: {cols_s}")
-            else:
-                lines.append(f"- {fq} | cols: {cols_s}")
-
-        if schema_full.get("foreign_keys"):
-            lines.append("\nForeign keys:")
-            for fk in schema_full["foreign_keys"][:200]:
-                lines.append(
-                    f'- {fk["from"]}.{fk["from_column"]} -> '
-                    f'{fk["to"]}.{fk["to_column"]}'
-                )
-
-        return "\n".join(lines)
-
-    schema_text = render_schema_brief(schema_full)
-
-    system_prompt = """
+def _build_select_system_prompt(schema_text: str, max_tables: int) -> str:
+    return f"""
 You are an expert SQL architect.
 
 Your job is to select which database tables are relevant
-for answering a user request.
+for answering a user request, described by the analysis JSON in the user message.
 
 You MUST return valid JSON and nothing else.
-""".strip()
-
-    human_prompt = f"""
-analysis (JSON):
-{json.dumps(analysis, ensure_ascii=False)}
 
 database schema:
 {schema_text}
@@ -73,25 +108,69 @@ Rules:
 - If unsure, include fewer tables
 """.strip()
 
-    # 🔹 ВОТ ЗДЕСЬ НУЖНАЯ ЧАСТЬ 🔹
-    res = await llm.ainvoke([
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=human_prompt),
-    ])
-
-    # LangChain может вернуть AIMessage или строку
-    llm_text = (
-        res.content
-        if hasattr(res, "content")
-        else str(res)
+
+async def select_relevant_schema_with_llm(
+    llm,
+    analysis: dict,
+    schema_full: Dict[str, Any],
+    *,
+    max_tables: int = 20,
+    max_join_hops: int = 3,
+) -> Dict[str, Any]:
+
+    # static part first (instructions + whole-database schema): byte-identical across
+    # requests for the same catalog, so Ollama/OpenAI can reuse the cached prompt prefix
+    system_prompt = _SCHEMA_CACHE.get_or_build(
+        get_fingerprint(schema_full),
+        ("select_system_prompt", max_tables),
+        lambda: _build_select_system_prompt(render_schema_brief(schema_full), max_tables),
     )
 
-    # --- дальше без изменений ---
+    human_prompt = f"""
+analysis (JSON):
+{json.dumps(analysis, ensure_ascii=False)}
+""".strip()
+
     try:
-        obj = json.loads(llm_text)
-    except Exception:
-        obj = {}
+        parsed, llm_text = await ainvoke_structured(
+            llm,
+            [
+                SystemMessage(content=system_prompt),
+                HumanMessage(content=human_prompt),
+            ],
+            TableSelection,
+            "select_tables",
+        )
+        obj = parsed.model_dump()
+    except StructuredOutputError as e:
+        # unusable reply -> build_selected_schema() ranks tables lexically
+        llm_text, obj = e.raw, {}
+
+    return build_selected_schema(
+        schema_full,
+        analysis,
+        obj,
+        llm_raw=llm_text,
+        max_tables=max_tables,
+        max_join_hops=max_join_hops,
+    )
 
+
+def build_selected_schema(
+    schema_full: Dict[str, Any],
+    analysis: Dict[str, Any],
+    obj: Dict[str, Any],
+    *,
+    llm_raw: str = "",
+    max_tables: int = 20,
+    max_join_hops: int = 3,
+    mode: str = "llm_schema_select",
+) -> Dict[str, Any]:
+    """
+    Turns an LLM table pick ({"tables", "also_consider", "reason", "confidence"})
+    into schema_context: unknown names dropped, lexical fallback, FK bridge tables,
+    join hints. Shared by the two-call path and LLM/analyze_and_select.py.
+    """
     requested = obj.get("tables") or []
     also = obj.get("also_consider") or []
 
@@ -100,14 +179,29 @@ Rules:
     picked = [t for t in requested if t in all_tables]
     picked_also = [t for t in also if t in all_tables and t not in picked]
 
+    fallback = None
+    if not picked:
+        # LLM gave nothing usable: rank tables by exact identifier overlap
+        # instead of dumping arbitrary first N tables into the prompt
+        picked = rank_tables_lexically(
+            schema_full, analysis, top_k=max_tables, index=schema_lexical_index(schema_full),
+        )
+        fallback = "lexical"
     if not picked:
         picked = list(all_tables)[:max_tables]
+        fallback = "first_n"
+
+    # add bridge tables so that every picked table is reachable by FK joins
+    graph = schema_full.get("join_graph") or JoinGraph.from_schema(schema_full)
+    bridges, join_edges = graph.connect(picked, max_hops=max_join_hops)
+    bridges = [t for t in bridges if t in all_tables]
+    picked_with_bridges = picked + bridges
 
-    keep = set(picked) | set(picked_also)
+    keep = set(picked_with_bridges) | set(picked_also)
 
     filtered_tables = {
         fq: schema_full["tables"][fq]
-        for fq in picked
+        for fq in picked_with_bridges
     }
 
     filtered_fks = [
@@ -118,12 +212,16 @@ Rules:
     return {
         "tables": filtered_tables,
         "foreign_keys": filtered_fks,
+        "join_hints": join_hints(join_edges),
+        "fingerprint": get_fingerprint(schema_full),
         "retrieval_debug": {
-            "mode": "llm_schema_select",
-            "llm_raw": llm_text,
+            "mode": mode,
+            "llm_raw": llm_raw,
             "picked": picked,
             "picked_also": picked_also,
+            "bridges": bridges,
             "confidence": obj.get("confidence"),
             "reason": obj.get("reason"),
+            "fallback": fallback,
         },
     }
@@ -1,14 +1,22 @@
+import asyncio
 from langchain_core.messages import SystemMessage, HumanMessage
-from DB.executor import run_sql, DBTimeoutError
+from DB.executor import check_sql, run_sql, enforce_limit, DBTimeoutError
+from DB.result_profile import profile_result, should_profile
+from DB.timeout_policy import DBTimeBudget, choose_timeout
 from prompts.sql_generator import SQL_GENERATOR_PROMPT
 from prompts.sql_fixer import SQL_FIXER_PROMPT
 from langchain_core.language_models import BaseChatModel
 import re
-import json
 import psycopg
 from psycopg.errors import Error as PsycopgError
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from DB.format_pg_error import format_pg_error
+from RAG.schema_prompt import render_schema_for_prompt
+from API.config import settings
+from LLM.response_models import SqlFix, SqlGeneration
+from LLM.structured import ainvoke_structured
+from observability.metrics import SQL_TIMEOUTS_TOTAL
+from observability.timing import stage_timer
 
 
 
@@ -20,83 +28,59 @@ def _is_select_only(sql: str) -> bool:
     return not any(re.search(rf"\b{b}\b", s) for b in banned)
 
 
-def _extract_json(text: str) -> str:
-    text = (text or "").strip()
-
-    # remove markdown fences if present
-    if text.startswith("```"):
-        text = text.split("```", 1)[1]
-        text = text.rsplit("```", 1)[0]
-
-    # fallback: extract first JSON object
-    start = text.find("{")
-    end = text.rfind("}")
-    if start != -1 and end != -1 and end > start:
-        return text[start:end + 1]
-
-    return text
-
-
 async def _llm_generate(
     llm: BaseChatModel,
     user_text: str,
-    schema_context: Dict[str, Any],
+    schema_text: str,
 ) -> Dict[str, Any]:
-    res = await llm.ainvoke([
-        SystemMessage(content=SQL_GENERATOR_PROMPT),
-        HumanMessage(
-            content=(
-                "User request:\n"
-                f"{user_text}\n\n"
-                "schema_context:\n"
-                f"{json.dumps(schema_context, ensure_ascii=False)}"
-            )
-        ),
-    ])
-
-    raw = (res.content or "").strip()
-    clean = _extract_json(raw)
-
-    try:
-        return json.loads(clean)
-    except json.JSONDecodeError as e:
-        raise ValueError(
-            f"SQL generator returned invalid JSON.\nRaw:\n{raw}"
-        ) from e
+    parsed, _ = await ainvoke_structured(
+        llm,
+        [
+            SystemMessage(content=SQL_GENERATOR_PROMPT),
+            # schema first, request last: same-schema prompts share a cacheable prefix
+            HumanMessage(
+                content=(
+                    "schema_context:\n"
+                    f"{schema_text}\n\n"
+                    "User request:\n"
+                    f"{user_text}"
+                )
+            ),
+        ],
+        SqlGeneration,
+        "sql_generate",
+    )
+    return parsed.model_dump()
 
 
 async def _llm_fix(
     llm: BaseChatModel,
     user_text: str,
-    schema_context: Dict[str, Any],
+    schema_text: str,
     prev_sql: str,
     error_text: str,
 ) -> Dict[str, Any]:
-    res = await llm.ainvoke([
-        SystemMessage(content=SQL_FIXER_PROMPT),
-        HumanMessage(
-            content=(
-                "User request:\n"
-                f"{user_text}\n\n"
-                "Schema context:\n"
-                f"{json.dumps(schema_context, ensure_ascii=False)}\n\n"
-                "Previous SQL:\n"
-                f"{prev_sql}\n\n"
-                "Database error:\n"
-                f"{error_text}"
-            )
-        ),
-    ])
-
-    raw = (res.content or "").strip()
-    clean = _extract_json(raw)
-
-    try:
-        return json.loads(clean)
-    except json.JSONDecodeError as e:
-        raise ValueError(
-            f"SQL fixer returned invalid JSON.\nRaw:\n{raw}"
-        ) from e
+    parsed, _ = await ainvoke_structured(
+        llm,
+        [
+            SystemMessage(content=SQL_FIXER_PROMPT),
+            HumanMessage(
+                content=(
+                    "Schema context:\n"
+                    f"{schema_text}\n\n"
+                    "User request:\n"
+                    f"{user_text}\n\n"
+                    "Previous SQL:\n"
+                    f"{prev_sql}\n\n"
+                    "Database error:\n"
+                    f"{error_text}"
+                )
+            ),
+        ],
+        SqlFix,
+        "sql_fix",
+    )
+    return parsed.model_dump()
 
 
 
@@ -109,21 +93,46 @@ async def execute_with_retries(
     max_attempts: int = 5,
     preview_limit: int = 10,
     max_timeouts: int = 2,
+    columnar: Optional[bool] = None,
 ) -> Dict[str, Any]:
     """
+    schema_context is the selected schema (select_relevant_schema_with_llm output or
+    RAG build_schema_context output); it is serialized for the prompt once, in
+    settings.SCHEMA_PROMPT_FORMAT, and reused by every fix attempt.
+
+    Every execution gets its own statement_timeout (DB/timeout_policy.py): estimated
+    per SQL fingerprint, escalated after a timeout, capped by the request's DB budget.
+    When the preview may be cut (RESULT_PROFILE), one more wrapped query profiles
+    the full result (count, distinct, min/max, top values) within what is left of it.
+
     Returns:
     {
       "ok": bool,
       "sql": "...",
-      "rows_preview": [...],
-      "attempts": [...],
+      "rows_preview": [...],      # or, with columnar (default settings.RESULT_COLUMNAR):
+      "result": {"columns": [...], "types": [...], "rows": [[...], ...]},  # DB/columnar.py
+      "profile": {"row_count", "columns": [...]},  # aggregates over the full result, DB/result_profile.py
+      "timeout_ms": int,
+      "attempts": [{"sql", "error", "timeout_ms", "timeout_source", "db_ms", ...}],
       "error": "..."
     }
     """
     attempts = []
     timeouts = 0
+    budget = DBTimeBudget()
+    if columnar is None:
+        columnar = settings.RESULT_COLUMNAR
 
-    gen = await _llm_generate(llm, user_text, schema_context)
+    with stage_timer("schema_render"):
+        schema_text = render_schema_for_prompt(
+            schema_context,
+            fmt=settings.SCHEMA_PROMPT_FORMAT,
+            token_budget=settings.SCHEMA_PROMPT_TOKEN_BUDGET,
+            query=user_text,
+        )
+
+    with stage_timer("sql_generate"):
+        gen = await _llm_generate(llm, user_text, schema_text)
 
     sql = gen.get("sql_preview") or gen.get("sql") or gen.get("sql_full") or ""
     if not sql:
@@ -137,20 +146,54 @@ async def execute_with_retries(
                 "attempts": attempts,
             }
 
-        try:
-            rows = run_sql(sql, limit=preview_limit)
+        # may EXPLAIN a new fingerprint: a DB round-trip, kept off the event loop
+        choice = await asyncio.to_thread(choose_timeout, enforce_limit(sql, preview_limit), budget)
+        if choice is None:
             return {
+                "ok": False,
+                "error": "Query time budget exhausted. Please narrow filters or time range.",
+                "attempts": attempts,
+            }
+        attempt = {
+            "sql": sql,
+            "timeout_ms": choice.timeout_ms,
+            "timeout_source": choice.source,
+        }
+
+        budget.start()
+        try:
+            with stage_timer("sql_execute"):
+                rows = run_sql(sql, limit=preview_limit, timeout_ms=choice.timeout_ms, columnar=True)
+            budget.stop()
+            out = {
                 "ok": True,
                 "sql": sql,
-                "rows_preview": rows[:10],
+                **({"result": rows.head(10)} if columnar else {"rows_preview": rows.head(10).to_dicts()}),
+                "timeout_ms": choice.timeout_ms,
                 "attempts": attempts,
             }
+            if should_profile(len(rows), preview_limit) and budget.remaining_ms >= settings.PG_TIMEOUT_MIN_MS:
+                with stage_timer("result_profile"):
+                    timeout_ms = int(min(settings.RESULT_PROFILE_TIMEOUT_MS, budget.remaining_ms))
+                    budget.start()
+                    try:
+                        profile = await asyncio.to_thread(
+                            profile_result, sql, rows.columns, rows.types, timeout_ms=timeout_ms,
+                        )
+                    finally:
+                        budget.stop()
+                if profile is not None:
+                    out["profile"] = profile
+            return out
 
         except DBTimeoutError as e:
+            attempt["db_ms"] = round(budget.stop() * 1000, 1)
+            budget.timed_out(choice.timeout_ms)
+            SQL_TIMEOUTS_TOTAL.labels(source=choice.source).inc()
             timeouts += 1
             err = str(e)
 
-            attempts.append({"sql": sql, "error": err})
+            attempts.append({**attempt, "error": err})
 
             if timeouts >= max_timeouts:
                 return {
@@ -159,16 +202,19 @@ async def execute_with_retries(
                     "attempts": attempts,
                 }
 
-            fixed = await _llm_fix(llm, user_text, schema_context, sql, err)
+            with stage_timer("sql_fix"):
+                fixed = await _llm_fix(llm, user_text, schema_text, sql, err)
             sql = fixed.get("sql") or sql
             attempts[-1]["fix_notes"] = fixed.get("fix_notes", "")
 
         except Exception as e:
+            attempt["db_ms"] = round(budget.stop() * 1000, 1)
             err = format_pg_error(e)
-            attempts.append({"sql": sql, "error": err})
+            attempts.append({**attempt, "error": err})
 
             if is_llm_fixable_sql_error(e):
-                fixed = await _llm_fix(llm, user_text, schema_context, sql, err)
+                with stage_timer("sql_fix"):
+                    fixed = await _llm_fix(llm, user_text, schema_text, sql, err)
                 sql = fixed.get("sql") or sql
                 attempts[-1]["fix_notes"] = fixed.get("fix_notes", "")
             else:
@@ -184,6 +230,63 @@ async def execute_with_retries(
         "attempts": attempts,
     }
 
+async def generate_sql(
+    llm: BaseChatModel,
+    user_text: str,
+    schema_context: Dict[str, Any],
+    max_attempts: int = 3,
+) -> Dict[str, Any]:
+    """
+    Like execute_with_retries, but the SQL is only planned (EXPLAIN), not run:
+    for queries executed later with a longer timeout (API/jobs.py). Planning
+    errors go through the same LLM fixes.
+
+    Returns {"ok": bool, "sql": "...", "attempts": [{"sql", "error", ...}], "error": "..."}
+    """
+    attempts = []
+    with stage_timer("schema_render"):
+        schema_text = render_schema_for_prompt(
+            schema_context,
+            fmt=settings.SCHEMA_PROMPT_FORMAT,
+            token_budget=settings.SCHEMA_PROMPT_TOKEN_BUDGET,
+            query=user_text,
+        )
+
+    with stage_timer("sql_generate"):
+        gen = await _llm_generate(llm, user_text, schema_text)
+
+    sql = gen.get("sql_full") or gen.get("sql") or gen.get("sql_preview") or ""
+    if not sql:
+        return {"ok": False, "error": "LLM returned empty SQL.", "attempts": attempts}
+
+    for _ in range(max_attempts):
+        if not _is_select_only(sql):
+            return {
+                "ok": False,
+                "error": "Refused: only SELECT or WITH queries are allowed.",
+                "attempts": attempts,
+            }
+        try:
+            with stage_timer("sql_check"):
+                await asyncio.to_thread(check_sql, sql)
+            return {"ok": True, "sql": sql, "attempts": attempts}
+        except Exception as e:
+            err = format_pg_error(e)
+            attempts.append({"sql": sql, "error": err})
+            if not is_llm_fixable_sql_error(e):
+                return {"ok": False, "error": err, "attempts": attempts}
+            with stage_timer("sql_fix"):
+                fixed = await _llm_fix(llm, user_text, schema_text, sql, err)
+            sql = fixed.get("sql") or sql
+            attempts[-1]["fix_notes"] = fixed.get("fix_notes", "")
+
+    return {
+        "ok": False,
+        "error": "Failed after all retry attempts.",
+        "attempts": attempts,
+    }
+
+
 def is_llm_fixable_sql_error(e: Exception) -> bool:
     """
     True if the error is likely caused by invalid SQL and can be fixed by rewriting it.
@@ -0,0 +1,133 @@
+"""
+Structured (JSON) output for LLM stages.
+
+- bind_structured(): asks the provider for JSON natively
+    ollama: format=<JSON schema>        (settings.LLM_STRUCTURED_OUTPUT="schema")
+            format="json"               ("json")
+    openai: response_format=json_schema ("schema")
+            response_format=json_object ("json")
+  Other chat models (tests, benchmarks) are used as-is.
+- ainvoke_structured(): invoke + validate with the stage's pydantic model.
+  An invalid reply is sent back once (LLM_JSON_REPAIR_ATTEMPTS) with the
+  validation error; if it is still invalid, StructuredOutputError is raised.
+  Every invalid reply is counted in orchestrator_llm_json_parse_failures_total{stage}.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, List, Optional, Tuple, Type, TypeVar
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from pydantic import BaseModel, ValidationError
+
+from API.config import settings
+from LLM.admission import unwrap_llm
+from LLM.utils import llm_model_name, record_llm_usage
+from observability.metrics import LLM_JSON_PARSE_FAILURES_TOTAL
+
+logger = logging.getLogger("orchestrator")
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class StructuredOutputError(ValueError):
+    def __init__(self, stage: str, raw: str, error: str):
+        super().__init__(f"{stage}: LLM returned invalid JSON ({error}).\nRaw:\n{raw}")
+        self.stage = stage
+        self.raw = raw
+
+
+def extract_json(text: str) -> str:
+    """
+    Outermost {...} of a reply; tolerates markdown fences and text around the object.
+    With native JSON mode this is a no-op, it stays for providers without it.
+    """
+    text = (text or "").strip()
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end == -1 or end < start:
+        raise ValueError("No JSON object found")
+    return text[start:end + 1]
+
+
+def parse_model(raw: str, model: Type[M]) -> M:
+    return model.model_validate_json(extract_json(raw))
+
+
+def _provider(llm: Any) -> Optional[str]:
+    name = type(unwrap_llm(llm)).__name__
+    if name == "ChatOllama":
+        return "ollama"
+    if name in ("ChatOpenAI", "AzureChatOpenAI"):
+        return "openai"
+    return None
+
+
+def bind_structured(llm: Any, model: Type[BaseModel]) -> Any:
+    mode = (settings.LLM_STRUCTURED_OUTPUT or "off").lower()
+    provider = _provider(llm)
+    if mode == "off" or provider is None:
+        return llm
+
+    if provider == "ollama":
+        return llm.bind(format=model.model_json_schema() if mode == "schema" else "json")
+
+    if mode == "schema":
+        return llm.bind(response_format={
+            "type": "json_schema",
+            "json_schema": {"name": model.__name__, "schema": model.model_json_schema()},
+        })
+    return llm.bind(response_format={"type": "json_object"})
+
+
+async def ainvoke_structured(
+    llm: Any,
+    messages: List[BaseMessage],
+    model: Type[M],
+    stage: str,
+    *,
+    repair_attempts: Optional[int] = None,
+) -> Tuple[M, str]:
+    """
+    Returns (validated model, raw reply text).
+    """
+    if repair_attempts is None:
+        repair_attempts = settings.LLM_JSON_REPAIR_ATTEMPTS
+    model_name = llm_model_name(llm)
+    bound = bind_structured(llm, model)
+
+    history = list(messages)
+    for attempt in range(repair_attempts + 1):
+        res = await bound.ainvoke(history)
+        record_llm_usage(res, model_name, stage if attempt == 0 else f"{stage}_repair")
+        raw = (res.content or "").strip()
+        try:
+            return parse_model(raw, model), raw
+        except ValueError as e:  # ValidationError is a ValueError too
+            LLM_JSON_PARSE_FAILURES_TOTAL.labels(stage=stage).inc()
+            error = _short_error(e)
+            logger.warning("llm_json_invalid", extra={
+                "stage": stage,
+                "attempt": attempt,
+                "error": error,
+            })
+
+        history = history + [
+            AIMessage(content=raw),
+            HumanMessage(content=(
+                f"Your reply is not valid JSON for the required shape: {error}\n"
+                "Return ONLY the corrected JSON object."
+            )),
+        ]
+
+    raise StructuredOutputError(stage, raw, error)
+
+
+def _short_error(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(p) for p in err['loc']) or '<root>'}: {err['msg']}"
+            for err in e.errors()[:5]
+        )
+    return str(e)[:200]
@@ -1,6 +1,17 @@
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, BaseMessage
-from typing import List
+from typing import Any, Dict, Iterator, List, Optional
 from store.SessionStore import ChatMessage
+from observability.metrics import LLM_PROMPT_TOKENS_TOTAL
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import re
+
+logger = logging.getLogger("orchestrator")
+
+# per-request token totals (evaluation, benchmarks); see collect_llm_usage()
+_usage: ContextVar[Optional[Counter]] = ContextVar("llm_usage", default=None)
 
 
 def to_lc_messages(msgs: List[ChatMessage]) -> List[BaseMessage]:
@@ -12,4 +23,64 @@ def to_lc_messages(msgs: List[ChatMessage]) -> List[BaseMessage]:
             out.append(HumanMessage(content=m.content))
         else:
             out.append(AIMessage(content=m.content))
-    return out
\ No newline at end of file
+    return out
+
+
+def normalize_question(text: str) -> str:
+    """
+    Cache/coalescing key for a user question: case, whitespace and surrounding punctuation ignored.
+    """
+    text = " ".join((text or "").lower().split())
+    return re.sub(r"^[\W_]+|[\W_]+$", "", text)
+
+
+def llm_model_name(llm: Any) -> str:
+    return getattr(llm, "model", None) or getattr(llm, "model_name", None) or type(llm).__name__
+
+
+@contextmanager
+def collect_llm_usage() -> Iterator[Counter]:
+    """
+    Sums record_llm_usage() results of every LLM call made inside the block:
+    {"calls", "prompt_tokens", "cached_tokens", "output_tokens"}.
+    """
+    usage: Counter = Counter()
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+
+def record_llm_usage(res: Any, model: str, mode: str) -> Dict[str, int]:
+    """
+    Reads token usage from an AIMessage and exports prompt/cached token counters.
+    Cached tokens are only known if the provider reports them
+    (OpenAI: usage.prompt_tokens_details.cached_tokens -> input_token_details.cache_read).
+    """
+    usage = getattr(res, "usage_metadata", None) or {}
+    prompt_tokens = int(usage.get("input_tokens") or 0)
+    cached_tokens = int((usage.get("input_token_details") or {}).get("cache_read") or 0)
+
+    if prompt_tokens:
+        LLM_PROMPT_TOKENS_TOTAL.labels(model=model, mode=mode, kind="total").inc(prompt_tokens)
+        LLM_PROMPT_TOKENS_TOTAL.labels(model=model, mode=mode, kind="cached").inc(cached_tokens)
+        logger.info("llm_usage", extra={
+            "model": model,
+            "mode": mode,
+            "prompt_tokens": prompt_tokens,
+            "cached_tokens": cached_tokens,
+            "cached_share": round(cached_tokens / prompt_tokens, 3),
+            "output_tokens": int(usage.get("output_tokens") or 0),
+        })
+
+    out = {
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "output_tokens": int(usage.get("output_tokens") or 0),
+    }
+    collected = _usage.get()
+    if collected is not None:
+        collected.update(out)
+        collected["calls"] += 1
+    return out
@@ -1,16 +1,33 @@
 # app/rag/chroma_store.py
 
-from typing import Dict, List, Optional
+import threading
+from typing import Dict, List, Optional, Tuple
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 from sentence_transformers import SentenceTransformer
 from DB.init_db import build_chroma_from_pg_url
 from API.config import settings
+from RAG.lexical_index import LexicalIndex
+from store.single_flight import SyncSingleFlight
 
 DEFAULT_PERSIST_DIR = "./chroma_db"
 DEFAULT_COLLECTION = "pg_schema"
 DEFAULT_EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
+# identical concurrent query batches are encoded once
+_EMBED_FLIGHTS = SyncSingleFlight("embedding")
+
+# one embedding model per process, shared by the stores of all DB profiles
+_EMBEDDERS: Dict[str, SentenceTransformer] = {}
+_EMBEDDERS_LOCK = threading.Lock()
+
+
+def _shared_embedder(model_name: str) -> SentenceTransformer:
+    with _EMBEDDERS_LOCK:
+        if model_name not in _EMBEDDERS:
+            _EMBEDDERS[model_name] = SentenceTransformer(model_name)
+        return _EMBEDDERS[model_name]
+
 
 class ChromaStore:
     def __init__(
@@ -27,11 +44,23 @@ class ChromaStore:
 
         self._collection = build_chroma_from_pg_url(
         connection_string,
-        persist_dir=DEFAULT_PERSIST_DIR,
-        collection_name=DEFAULT_COLLECTION,
+        persist_dir=self.persist_dir,
+        collection_name=self.collection_name,  # per DB profile: DB/profiles.py
         reset_collection=True,  # recommended if you rerun often
     )
-        self._embedder = SentenceTransformer(self.embedding_model)
+        self._embedder = _shared_embedder(self.embedding_model)
+        # lexical index is built once, from the same chunks as the vector index
+        self._lexical = self._build_lexical_index()
+
+    def _build_lexical_index(self) -> LexicalIndex:
+        res = self._collection.get(include=["documents", "metadatas"])
+        docs = res.get("documents") or []
+        metas = res.get("metadatas") or []
+        return LexicalIndex.from_chunks(zip(docs, metas))
+
+    @property
+    def lexical_index(self) -> LexicalIndex:
+        return self._lexical
 
     def count(self) -> int:
         return self._collection.count()
@@ -45,11 +74,7 @@ class ChromaStore:
         """
         Semantic search by precomputed embeddings.
         """
-        embeddings = self._embedder.encode(
-            queries,
-            normalize_embeddings=True,
-            show_progress_bar=False,
-        ).tolist()
+        embeddings = self.embed(queries)
 
         return self._collection.query(
             query_embeddings=embeddings,
@@ -58,6 +83,28 @@ class ChromaStore:
             include=["documents", "metadatas", "distances"],
         )
 
+    def embed(self, queries: List[str]) -> List[List[float]]:
+        def encode() -> List[List[float]]:
+            return self._embedder.encode(
+                queries,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            ).tolist()
+
+        embeddings, _ = _EMBED_FLIGHTS.do((self.embedding_model, tuple(queries)), encode)
+        return embeddings
+
+    def lexical_search(
+        self,
+        queries: List[str],
+        n_results: int = 10,
+    ) -> List[Tuple[Tuple[str, str], float]]:
+        """
+        BM25 search over table/column/comment tokens.
+        Returns [((schema_name, table_name), score)] sorted by score desc.
+        """
+        return self._lexical.search(queries, top_k=n_results)
+
     @staticmethod
     def _normalize_where(where: dict) -> dict:
         if any(k.startswith("$") for k in where.keys()):
@@ -0,0 +1,228 @@
+# app/rag/lexical_index.py
+"""
+Lexical (BM25) index over schema identifiers and comments.
+
+Vector search over MiniLM embeddings is good at fuzzy matches ("timetable" ~ "schedule"),
+but it often ranks exact identifiers like `carrier_code` or `FlightSchedules` too low.
+This index complements it:
+
+- documents are tables: table name + column names + table/column comments
+- identifiers are split on snake_case and camelCase (`FlightSchedules` -> flight, schedules),
+  the whole identifier is kept as a token too, so exact hits score higher
+- scoring is classic Okapi BM25
+- results are fused with vector rankings via reciprocal rank fusion (RRF)
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+
+TableKey = Tuple[str, str]  # (schema_name, table_name)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def split_identifier(word: str) -> List[str]:
+    """
+    `FlightSchedules` -> ["flight", "schedules"], `carrier_code` -> ["carrier", "code"].
+    Non-ASCII words (e.g. Russian comments) are only lowercased.
+    """
+    parts: List[str] = []
+    for sub in word.split("_"):
+        if not sub:
+            continue
+        if sub.isascii():
+            parts.extend(p.lower() for p in _CAMEL_RE.findall(sub))
+        else:
+            parts.append(sub.lower())
+    return parts
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into lexical tokens. Compound identifiers produce both
+    the whole identifier and its parts: `carrier_code` -> carrier_code, carrier, code.
+    """
+    tokens: List[str] = []
+    for word in _WORD_RE.findall(text or ""):
+        parts = split_identifier(word)
+        whole = word.lower()
+        if len(parts) > 1 or (parts and parts[0] != whole):
+            tokens.append(whole)
+        tokens.extend(parts)
+    return tokens
+
+
+def lexical_queries_from_analysis(analysis: Dict[str, Any]) -> List[str]:
+    """
+    Everything from the query analyzer output that may contain exact identifiers:
+    search_queries, keywords, entity values and aliases.
+    """
+    queries: List[str] = list(analysis.get("search_queries") or [])
+    keywords = analysis.get("keywords") or []
+    if keywords:
+        queries.append(" ".join(str(k) for k in keywords))
+    for ent in analysis.get("entities") or []:
+        if not isinstance(ent, dict):
+            continue
+        values = [ent.get("value")] + list(ent.get("aliases") or [])
+        queries.extend(str(v) for v in values if v)
+    return [q for q in queries if str(q).strip()]
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hashable]],
+    k: int = 60,
+) -> List[Tuple[Hashable, float]]:
+    """
+    RRF: score(d) = sum over rankings of 1 / (k + rank(d)), rank starting at 1.
+    Returns [(key, score)] sorted by score desc (ties keep first-seen order).
+    """
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+
+
+class LexicalIndex:
+    """
+    Inverted index with BM25 scoring. Documents are tables keyed by (schema, table).
+    Built once, read-only afterwards.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[TableKey, int]] = defaultdict(dict)
+        self._doc_len: Dict[TableKey, int] = {}
+        self._summaries: Dict[TableKey, str] = {}
+        self._avg_len = 0.0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    # ---------- building ----------
+
+    def _add_document(self, key: TableKey, tokens: List[str]) -> None:
+        for tok, tf in Counter(tokens).items():
+            self._postings[tok][key] = tf
+        self._doc_len[key] = len(tokens)
+
+    def _finalize(self) -> None:
+        self._avg_len = (sum(self._doc_len.values()) / len(self._doc_len)) if self._doc_len else 0.0
+
+    @classmethod
+    def from_chunks(
+        cls,
+        chunks: Iterable[Tuple[str, Dict[str, Any]]],
+        **kwargs: Any,
+    ) -> "LexicalIndex":
+        """
+        Builds the index from build_chunks() output (or documents+metadatas read back from Chroma).
+        """
+        tokens_by_table: Dict[TableKey, List[str]] = defaultdict(list)
+        summaries: Dict[TableKey, str] = {}
+
+        for text, meta in chunks:
+            meta = meta or {}
+            ctype = meta.get("chunk_type")
+            if ctype == "fk":
+                key = (str(meta.get("from_schema") or ""), str(meta.get("from_table") or ""))
+            else:
+                key = (str(meta.get("schema_name") or ""), str(meta.get("table_name") or ""))
+            if not key[0] or not key[1]:
+                continue
+
+            if ctype == "table_summary":
+                summaries[key] = text
+                # table name itself is the strongest signal
+                tokens_by_table[key].extend(tokenize(key[1]) * 2)
+
+            tokens_by_table[key].extend(tokenize(text))
+
+        index = cls(**kwargs)
+        for key, toks in tokens_by_table.items():
+            index._add_document(key, toks)
+        index._summaries = summaries
+        index._finalize()
+        return index
+
+    @classmethod
+    def from_schema_full(cls, schema_full: Dict[str, Any], **kwargs: Any) -> "LexicalIndex":
+        """
+        Builds the index from build_schema_context_from_db() output.
+        """
+        index = cls(**kwargs)
+        for t in (schema_full.get("tables") or {}).values():
+            key = (str(t.get("schema") or ""), str(t.get("name") or ""))
+            toks = tokenize(key[1]) * 3
+            toks.extend(tokenize(t.get("description") or ""))
+            for c in t.get("columns") or []:
+                toks.extend(tokenize(c.get("name") or ""))
+                toks.extend(tokenize(c.get("description") or ""))
+            index._add_document(key, toks)
+        index._finalize()
+        return index
+
+    # ---------- querying ----------
+
+    def summary(self, key: TableKey) -> str:
+        return self._summaries.get(key, "")
+
+    def _idf(self, tok: str) -> float:
+        n = len(self._doc_len)
+        df = len(self._postings.get(tok, ()))
+        return math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+
+    def score(self, query: str) -> Dict[TableKey, float]:
+        scores: Dict[TableKey, float] = {}
+        if not self._doc_len:
+            return scores
+        for tok in set(tokenize(query)):
+            postings = self._postings.get(tok)
+            if not postings:
+                continue
+            idf = self._idf(tok)
+            for key, tf in postings.items():
+                norm = 1.0 - self.b + self.b * self._doc_len[key] / (self._avg_len or 1.0)
+                scores[key] = scores.get(key, 0.0) + idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        return scores
+
+    def search(self, queries: Iterable[str], top_k: int = 10) -> List[Tuple[TableKey, float]]:
+        """
+        Scores every query and keeps the best score per table (same as vector dedupe by table).
+        """
+        best: Dict[TableKey, float] = {}
+        for q in queries:
+            for key, s in self.score(q).items():
+                if s > best.get(key, 0.0):
+                    best[key] = s
+        ranked = sorted(best.items(), key=lambda kv: kv[1], reverse=True)
+        return ranked[:top_k]
+
+
+def rank_tables_lexically(
+    schema_full: Dict[str, Any],
+    analysis: Dict[str, Any],
+    top_k: int,
+    index: Optional[LexicalIndex] = None,
+) -> List[str]:
+    """
+    Fully-qualified table names from schema_full ranked by BM25 over analysis terms.
+    Used instead of an arbitrary `list(all_tables)[:N]` when LLM table selection fails.
+    """
+    index = index or LexicalIndex.from_schema_full(schema_full)
+    hits = index.search(lexical_queries_from_analysis(analysis), top_k=top_k)
+    tables = schema_full.get("tables") or {}
+    out = []
+    for (schema, table), _ in hits:
+        fq = f"{schema}.{table}"
+        if fq in tables:
+            out.append(fq)
+    return out
@@ -11,7 +11,9 @@ Assumptions about your indexed chunks (based on your build_chunks()):
 
 Workflow:
 1) Semantic search ONLY across table_summary chunks using analysis["search_queries"].
-2) Pick top-N tables by best (lowest) distance.
+   In hybrid mode a BM25 search over table/column/comment tokens (search_queries, keywords,
+   entities) runs too, and both rankings are fused with reciprocal rank fusion.
+2) Pick top-N tables by best (lowest) distance / best fused score.
 3) For each selected table:
    - fetch all column chunks by metadata
    - fetch outgoing fk chunks by metadata
@@ -24,7 +26,9 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 
+from DB.profiles import get_db_profile
 from RAG.chroma_store import ChromaStore
+from RAG.lexical_index import lexical_queries_from_analysis, reciprocal_rank_fusion
 import logging
 
 
@@ -35,6 +39,9 @@ class RetrievalConfig:
     per_query_summaries: int = 8        # how many summaries to fetch per search query
     max_columns_per_table: int = 150    # safety cap
     max_fks_per_table: int = 120        # safety cap
+    hybrid: bool = True                 # fuse vector ranking with BM25 ranking
+    per_query_lexical: int = 8          # how many tables to take from the lexical index
+    rrf_k: int = 60                     # reciprocal rank fusion constant
 
 
 def _safe_str(x: Any) -> str:
@@ -57,6 +64,37 @@ def _best_by_table(flat: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return out
 
 
+def _matches_where(key: Tuple[str, str], extra_where: Optional[Dict[str, Any]]) -> bool:
+    """
+    extra_where (Chroma metadata filter) applied to a lexical hit (schema, table).
+    Only schema_name / table_name conditions with $eq/$ne/$in/$nin can be checked
+    here; a filter on anything else excludes lexical hits altogether.
+    """
+    if not extra_where:
+        return True
+    values = {"schema_name": key[0], "table_name": key[1]}
+    for field, cond in extra_where.items():
+        if field not in values:
+            return False
+        value = values[field]
+        if not isinstance(cond, dict):
+            cond = {"$eq": cond}
+        for op, arg in cond.items():
+            if op == "$eq":
+                ok = value == arg
+            elif op == "$ne":
+                ok = value != arg
+            elif op == "$in":
+                ok = value in arg
+            elif op == "$nin":
+                ok = value not in arg
+            else:
+                return False
+            if not ok:
+                return False
+    return True
+
+
 def retrieve_table_candidates(
     chroma: ChromaStore,
     analysis: Dict[str, Any],
@@ -69,7 +107,8 @@ def retrieve_table_candidates(
       "schema_name": "...",
       "table_name": "...",
       "summary_doc": "...",
-      "dist": 0.123
+      "dist": 0.123,          # None if the table was found only lexically
+      "score": 0.032          # RRF score (hybrid mode only)
     }, ...]
     """
     search_queries = analysis.get("search_queries") or []
@@ -100,7 +139,36 @@ def retrieve_table_candidates(
             })
 
     best = _best_by_table(flat)
-    return best[: cfg.top_tables]
+    if not cfg.hybrid:
+        return best[: cfg.top_tables]
+
+    lexical_hits = chroma.lexical_search(
+        lexical_queries_from_analysis(analysis),
+        n_results=cfg.per_query_lexical,
+    )
+    # the BM25 index is not filtered by Chroma: same restriction as the vector query
+    lexical_hits = [(key, score) for key, score in lexical_hits if _matches_where(key, extra_where)]
+
+    vector_by_key = {
+        (_safe_str(it["schema_name"]), _safe_str(it["table_name"])): it
+        for it in best
+    }
+    fused = reciprocal_rank_fusion(
+        [list(vector_by_key.keys()), [key for key, _ in lexical_hits]],
+        k=cfg.rrf_k,
+    )
+
+    out: List[Dict[str, Any]] = []
+    for key, score in fused[: cfg.top_tables]:
+        hit = vector_by_key.get(key)
+        out.append({
+            "schema_name": key[0],
+            "table_name": key[1],
+            "summary_doc": hit["summary_doc"] if hit else chroma.lexical_index.summary(key),
+            "dist": hit["dist"] if hit else None,
+            "score": score,
+        })
+    return out
 
 
 def _first_table_comment_text(chroma: ChromaStore, schema: str, table: str) -> str:
@@ -169,13 +237,14 @@ def _outgoing_fks_for_table(chroma: ChromaStore, schema: str, table: str, limit:
 
 
 def build_schema_context(
-    chroma: ChromaStore,
+    chroma: Optional[ChromaStore],
     analysis: Dict[str, Any],
     cfg: RetrievalConfig = RetrievalConfig(),
     extra_where: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
     """
-    Main entry point. Returns:
+    Main entry point. chroma=None uses the vector store of the request's DB
+    profile (its own collection, DBProfile.vector_namespace). Returns:
     {
       "tables": [
         {
@@ -188,10 +257,13 @@ def build_schema_context(
       ],
       "relationships": [...],         # flattened FK list
       "retrieval_debug": {
-        "selected_tables": [{"schema_name":"...","table_name":"...","dist":0.12}]
+        "selected_tables": [{"schema_name":"...","table_name":"...","dist":0.12,"score":0.03}]
       }
     }
     """
+    if chroma is None:
+        chroma = get_db_profile().vector_store()
+
     table_candidates = retrieve_table_candidates(
         chroma=chroma,
         analysis=analysis,
@@ -212,7 +284,8 @@ def build_schema_context(
         schema_context["retrieval_debug"]["selected_tables"].append({
             "schema_name": schema,
             "table_name": table,
-            "dist": float(cand["dist"]),
+            "dist": None if cand.get("dist") is None else float(cand["dist"]),
+            "score": cand.get("score"),
         })
 
         description = _first_table_comment_text(chroma, schema, table)
@@ -267,9 +340,12 @@ def compact_for_prompt(schema_context: Dict[str, Any]) -> Dict[str, Any]:
         # вообще что-то пошло не так
         return {"tables": [], "relationships": []}
 
-    return {
+    out = {
         "tables": tables_out,
         "relationships": schema_context.get("relationships", []),
     }
+    if schema_context.get("join_hints"):
+        out["join_hints"] = schema_context["join_hints"]
+    return out
 
 
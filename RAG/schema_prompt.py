@@ -0,0 +1,311 @@
+# app/rag/schema_prompt.py
+"""
+Serializes schema_context for SQL generator/fixer prompts.
+
+Two formats:
+- "json":    json.dumps(compact_for_prompt(...)) — the original format
+- "compact": DDL-like text, much cheaper in tokens:
+
+    -- schema aliases (expand in SQL): @1=flight_operations
+    TABLE @1.FlightSchedules -- planned flights
+      id int8, carrier_code varchar (IATA airline code), departure_at timestamptz, ... +12 more
+    JOINS
+      @1.FlightSchedules.carrier_id = @1.Carriers.id
+
+Token-budget mode drops the least relevant columns first (not join keys, not
+columns matching the user request), until the estimated size fits the budget.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from DB.schema_catalog import FingerprintCache
+from RAG.lexical_index import tokenize
+from RAG.schema_context import compact_for_prompt
+
+
+SCHEMA_ALIAS_MIN_LEN = 8  # shorter schema names (e.g. "public") are cheaper than an alias
+
+_TYPE_ABBREVIATIONS = {
+    "character varying": "varchar",
+    "character": "char",
+    "timestamp without time zone": "timestamp",
+    "timestamp with time zone": "timestamptz",
+    "time without time zone": "time",
+    "time with time zone": "timetz",
+    "double precision": "float8",
+    "integer": "int",
+    "smallint": "int2",
+    "bigint": "int8",
+    "boolean": "bool",
+    "USER-DEFINED": "enum",
+}
+
+_DOC_TYPE_RE = re.compile(r"\btype=(.+?)\s+nullable=")
+_DOC_DESC_RE = re.compile(r"\bdescription=(.*)$")
+_KEY_LIKE_RE = re.compile(r"(^|_)(id|code|key)$", re.IGNORECASE)
+
+# rendered table blocks per schema fingerprint (schema_context["fingerprint"])
+_FRAGMENT_CACHE = FingerprintCache()
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap tokenizer-free estimate (~4 chars per token for English/SQL text).
+    """
+    return (len(text) + 3) // 4
+
+
+def _short_type(t: Optional[str]) -> str:
+    t = (t or "").strip()
+    return _TYPE_ABBREVIATIONS.get(t, t)
+
+
+def _one_line(text: Optional[str], limit: int = 160) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _normalize_tables(schema_context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Accepts both shapes used in the repo:
+    - select_relevant_schema_with_llm(): {"tables": {"s.t": {"schema","name","description","columns":[{name,type,description}]}}}
+    - RAG build_schema_context():        {"tables": [{"name":"s.t","description","columns":[{column_name, doc}]}]}
+    Returns [{"schema","name","description","columns":[{"name","type","description"}]}].
+    """
+    tables = schema_context.get("tables") or []
+    iterable = tables.values() if isinstance(tables, dict) else tables
+
+    out: List[Dict[str, Any]] = []
+    for t in iterable:
+        if t.get("schema") is not None:
+            schema, name = t.get("schema") or "", t.get("name") or ""
+        else:
+            schema, _, name = (t.get("name") or "").rpartition(".")
+
+        columns = []
+        for c in t.get("columns") or []:
+            if isinstance(c, str):
+                columns.append({"name": c, "type": "", "description": ""})
+            elif c.get("name"):
+                columns.append({
+                    "name": c["name"],
+                    "type": c.get("type") or "",
+                    "description": c.get("description") or "",
+                })
+            elif c.get("column_name"):
+                doc = c.get("doc") or ""
+                m_type = _DOC_TYPE_RE.search(doc)
+                m_desc = _DOC_DESC_RE.search(doc)
+                columns.append({
+                    "name": c["column_name"],
+                    "type": m_type.group(1) if m_type else "",
+                    "description": m_desc.group(1) if m_desc else "",
+                })
+
+        out.append({
+            "schema": schema,
+            "name": name,
+            "description": t.get("description") or "",
+            "columns": columns,
+        })
+    return out
+
+
+def _join_columns(schema_context: Dict[str, Any]) -> Set[Tuple[str, str]]:
+    """
+    (schema.table, column) pairs used by FKs / join hints; never dropped by the budget.
+    """
+    keys: Set[Tuple[str, str]] = set()
+    for fk in schema_context.get("foreign_keys") or []:
+        keys.add((fk["from"], fk["from_column"]))
+        keys.add((fk["to"], fk["to_column"]))
+    for rel in schema_context.get("relationships") or []:
+        for side in (rel.get("from"), rel.get("to")):
+            if side and side.count(".") >= 2:
+                table, _, col = side.rpartition(".")
+                keys.add((table, col))
+    for hint in schema_context.get("join_hints") or []:
+        for cond in hint.split(" AND "):
+            for side in cond.split(" = "):
+                table, _, col = side.strip().rpartition(".")
+                keys.add((table, col))
+    return keys
+
+
+def _schema_aliases(tables: List[Dict[str, Any]]) -> Dict[str, str]:
+    counts = Counter(t["schema"] for t in tables)
+    aliases: Dict[str, str] = {}
+    for schema, n in counts.most_common():
+        if schema and n >= 2 and len(schema) >= SCHEMA_ALIAS_MIN_LEN:
+            aliases[schema] = f"@{len(aliases) + 1}"
+    return aliases
+
+
+def _render_column(c: Dict[str, Any]) -> str:
+    out = c["name"]
+    if c["type"]:
+        out += f" {_short_type(c['type'])}"
+    cdesc = _one_line(c["description"], limit=100)
+    if cdesc:
+        out += f" ({cdesc})"
+    return out
+
+
+def render_table_block(
+    table: Dict[str, Any],
+    aliases: Dict[str, str],
+    columns: Optional[List[Dict[str, Any]]] = None,
+) -> str:
+    """
+    One table as DDL-like text. `columns` overrides table["columns"] (budget mode).
+    """
+    schema = aliases.get(table["schema"], table["schema"])
+    fq = f"{schema}.{table['name']}" if schema else table["name"]
+    desc = _one_line(table["description"])
+    header = f"TABLE {fq}" + (f" -- {desc}" if desc else "")
+
+    shown = table["columns"] if columns is None else columns
+    cols = ", ".join(_render_column(c) for c in shown)
+    hidden = len(table["columns"]) - len(shown)
+    if hidden > 0:
+        cols += f", ... +{hidden} more"
+    return f"{header}\n  {cols}" if cols else header
+
+
+def _render_joins(schema_context: Dict[str, Any], aliases: Dict[str, str]) -> List[str]:
+    hints = list(schema_context.get("join_hints") or [])
+    if not hints:
+        for fk in schema_context.get("foreign_keys") or []:
+            hints.append(f'{fk["from"]}.{fk["from_column"]} = {fk["to"]}.{fk["to_column"]}')
+        for rel in schema_context.get("relationships") or []:
+            if rel.get("from") and rel.get("to"):
+                hints.append(f'{rel["from"]} = {rel["to"]}')
+
+    out = []
+    for h in dict.fromkeys(hints):
+        for schema, alias in aliases.items():
+            h = re.sub(rf"(?<![\w.]){re.escape(schema)}\.", f"{alias}.", h)
+        out.append(f"  {h}")
+    return out
+
+
+def _apply_budget(
+    tables: List[Dict[str, Any]],
+    aliases: Dict[str, str],
+    fixed_tokens: int,
+    token_budget: int,
+    keep_columns: Set[Tuple[str, str]],
+    query_tokens: Set[str],
+) -> List[List[Dict[str, Any]]]:
+    """
+    Returns the kept columns per table. Drops lowest-relevance columns first:
+    relevance = join key > matches the request > has description or looks like a key >
+    earlier ordinal position.
+    Each table keeps at least one column.
+    """
+    total = fixed_tokens + sum(
+        estimate_tokens(render_table_block(t, aliases)) for t in tables
+    )
+    if total <= token_budget:
+        return [list(t["columns"]) for t in tables]
+
+    candidates = []
+    for ti, t in enumerate(tables):
+        fq = f"{t['schema']}.{t['name']}"
+        for pos, c in enumerate(t["columns"]):
+            if (fq, c["name"]) in keep_columns:
+                continue
+            relevance = 0
+            if query_tokens & set(tokenize(c["name"])):
+                relevance += 2
+            if c["description"] or _KEY_LIKE_RE.search(c["name"]):
+                relevance += 1
+            candidates.append((relevance, -pos, ti, pos))
+    candidates.sort()
+
+    dropped: Set[Tuple[int, int]] = set()
+    left = [len(t["columns"]) for t in tables]
+    for _, _, ti, pos in candidates:
+        if total <= token_budget:
+            break
+        if left[ti] <= 1:
+            continue
+        dropped.add((ti, pos))
+        left[ti] -= 1
+        total -= estimate_tokens(_render_column(tables[ti]["columns"][pos]) + ", ")
+
+    return [
+        [c for pos, c in enumerate(t["columns"]) if (ti, pos) not in dropped]
+        for ti, t in enumerate(tables)
+    ]
+
+
+def render_schema_compact(
+    schema_context: Dict[str, Any],
+    *,
+    token_budget: Optional[int] = None,
+    query: str = "",
+) -> str:
+    tables = _normalize_tables(schema_context)
+    aliases = _schema_aliases(tables)
+
+    header = []
+    if aliases:
+        header.append(
+            "-- schema aliases (expand in SQL): "
+            + ", ".join(f"{a}={s}" for s, a in aliases.items())
+        )
+    joins = _render_joins(schema_context, aliases)
+    footer = ["JOINS", *joins] if joins else []
+
+    columns_per_table: Iterable[Optional[List[Dict[str, Any]]]] = [None] * len(tables)
+    if token_budget:
+        fixed = estimate_tokens("\n".join(header + footer))
+        columns_per_table = _apply_budget(
+            tables,
+            aliases,
+            fixed_tokens=fixed,
+            token_budget=token_budget,
+            keep_columns=_join_columns(schema_context),
+            query_tokens=set(tokenize(query)),
+        )
+
+    fingerprint = schema_context.get("fingerprint")
+    blocks = []
+    for t, cols in zip(tables, columns_per_table):
+        if fingerprint and cols is None:
+            alias = aliases.get(t["schema"])
+            blocks.append(_FRAGMENT_CACHE.get_or_build(
+                fingerprint,
+                ("table_block", t["schema"], t["name"], alias),
+                lambda t=t: render_table_block(t, aliases),
+            ))
+        else:
+            blocks.append(render_table_block(t, aliases, cols))
+    return "\n".join(header + blocks + footer)
+
+
+def render_schema_json(schema_context: Dict[str, Any]) -> str:
+    return json.dumps(compact_for_prompt(schema_context), ensure_ascii=False)
+
+
+def render_schema_for_prompt(
+    schema_context: Dict[str, Any],
+    *,
+    fmt: str = "compact",
+    token_budget: Optional[int] = None,
+    query: str = "",
+) -> str:
+    """
+    Entry point for prompt builders. fmt: "compact" | "json".
+    """
+    if fmt == "json":
+        return render_schema_json(schema_context)
+    if fmt == "compact":
+        return render_schema_compact(schema_context, token_budget=token_budget, query=query)
+    raise ValueError(f"Unknown schema prompt format: {fmt}")
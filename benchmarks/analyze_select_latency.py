@@ -0,0 +1,95 @@
+"""
+Latency of table selection: two-call path (analyze_query + select_relevant_schema_with_llm)
+vs the combined single call (LLM/analyze_and_select.py).
+
+By default the fake chat model (benchmarks/fake_llm.py) is used: every call costs
+    --call-ms  +  prompt_tokens / --prefill-tps  +  output_tokens / --decode-tps
+which is how a local Ollama model behaves (fixed overhead, prefill, decode).
+With --live the configured provider (make_llm) is called for real.
+
+Usage:
+    python -m benchmarks.analyze_select_latency
+    python -m benchmarks.analyze_select_latency --tables 200 --runs 10
+    python -m benchmarks.analyze_select_latency --live --pg-url postgresql://...
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any, Dict, List
+
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks.schema_prompt_tokens import synthetic_schema
+from LLM.analyze_and_select import analyze_and_select
+from LLM.query_analyze import analyze_query
+from LLM.select_relevant_schema_with_llm import select_relevant_schema_with_llm
+
+QUESTIONS = [
+    "How many flights were delayed per carrier yesterday?",
+    "Show booking fares for passenger tickets by route",
+    "List aircraft schedule with gate and terminal",
+]
+
+async def _two_call(llm: Any, question: str, schema_full: Dict[str, Any]) -> None:
+    analysis = await analyze_query(llm, question)
+    await select_relevant_schema_with_llm(llm, analysis, schema_full)
+
+
+async def _combined(llm: Any, question: str, schema_full: Dict[str, Any], max_candidates: int) -> None:
+    await analyze_and_select(llm, question, schema_full, max_candidates=max_candidates)
+
+
+async def _measure(fn, runs: int) -> List[float]:
+    out = []
+    for i in range(runs):
+        start = time.perf_counter()
+        await fn(QUESTIONS[i % len(QUESTIONS)])
+        out.append(time.perf_counter() - start)
+    return out
+
+
+def _fmt(samples: List[float]) -> str:
+    return f"p50={statistics.median(samples) * 1000:8.1f} ms  max={max(samples) * 1000:8.1f} ms"
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    if args.pg_url:
+        from DB.init_db import build_schema_context_from_db
+        schema_full = build_schema_context_from_db(args.pg_url)
+    else:
+        schema_full = synthetic_schema(n_tables=args.tables)
+
+    llm: Any
+    if args.live:
+        from LLM.make_llm import make_llm
+        llm = make_llm(None, 0)
+    else:
+        llm = FakeChatModel(call_ms=args.call_ms, prefill_tps=args.prefill_tps, decode_tps=args.decode_tps)
+
+    two = await _measure(lambda q: _two_call(llm, q, schema_full), args.runs)
+    one = await _measure(lambda q: _combined(llm, q, schema_full, args.max_candidates), args.runs)
+
+    print(f"tables={len(schema_full['tables'])} runs={args.runs} llm={'live' if args.live else 'simulated'}")
+    print(f"two_call  {_fmt(two)}")
+    print(f"combined  {_fmt(one)}")
+    print(f"saved     {1 - statistics.median(one) / statistics.median(two):.0%} (p50)")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pg-url", default=None)
+    ap.add_argument("--tables", type=int, default=120)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--max-candidates", type=int, default=40)
+    ap.add_argument("--live", action="store_true")
+    ap.add_argument("--call-ms", type=float, default=300.0)
+    ap.add_argument("--prefill-tps", type=float, default=1500.0)
+    ap.add_argument("--decode-tps", type=float, default=40.0)
+    asyncio.run(main_async(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+End-to-end benchmark of the db pipeline (what db_query_chain runs):
+catalog -> analyze -> select tables -> generate SQL -> execute (-> fix).
+
+- LLM: benchmarks.fake_llm.FakeChatModel, deterministic, with configurable latency
+  (--llm-ms / --prefill-tps / --decode-tps / --jitter); --live uses make_llm()
+- DB: a real Postgres; --tables N creates a bench_* schema with N generated tables
+  (benchmarks.pg_fixture). Use a dedicated database.
+
+Reports, per concurrency level: throughput, p50/p95/p99 of the whole request and
+of every stage (observability/timing.py), error count, and memory high-water marks
+(ru_maxrss; Python heap peak with --tracemalloc).
+
+Baselines:
+    python -m benchmarks.e2e --pg-url ... --save-baseline bench.json
+    python -m benchmarks.e2e --pg-url ... --baseline bench.json --tolerance 0.2
+The second run exits with code 1 if a p95 got slower or throughput dropped
+by more than the tolerance.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+from API.config import settings
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks.pg_fixture import create_bench_database
+from benchmarks.schema_prompt_tokens import synthetic_schema
+from LLM.db_pipeline import run_db_pipeline
+from observability.timing import collect_stage_timings
+
+QUESTIONS = [
+    "List flight schedule records",
+    "Show carrier airport routes",
+    "How many bookings per passenger fare",
+    "Show delay status by gate and terminal",
+    "List aircraft crew schedule",
+    "Show ticket fare codes",
+    "Which routes have the most flights",
+    "Show passenger booking status",
+]
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    Nearest-rank percentile, p in [0, 100].
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(p / 100 * len(ordered) + 0.4999)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "n": len(values),
+    }
+
+
+async def run_level(llm: Any, concurrency: int, n_requests: int) -> Dict[str, Any]:
+    sem = asyncio.Semaphore(concurrency)
+    totals: List[float] = []
+    stages: Dict[str, List[float]] = {}
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with sem:
+            with collect_stage_timings() as timings:
+                start = time.perf_counter()
+                try:
+                    payload = await run_db_pipeline(llm, QUESTIONS[i % len(QUESTIONS)])
+                    errors += not payload.get("ok")
+                except Exception:
+                    errors += 1
+                totals.append(time.perf_counter() - start)
+            for stage, seconds in timings.totals().items():
+                stages.setdefault(stage, []).append(seconds)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(n_requests)])
+    wall = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": n_requests,
+        "errors": errors,
+        "throughput_rps": round(n_requests / wall, 3) if wall else 0.0,
+        "total": summarize(totals),
+        "stages": {stage: summarize(v) for stage, v in sorted(stages.items())},
+    }
+
+
+def _rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def compare_to_baseline(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Regressions as human-readable lines: p95 (total and per stage) slower than
+    baseline * (1 + tolerance), or throughput below baseline * (1 - tolerance).
+    """
+    problems: List[str] = []
+    base_levels = {lvl["concurrency"]: lvl for lvl in baseline.get("levels", [])}
+    for lvl in current.get("levels", []):
+        base = base_levels.get(lvl["concurrency"])
+        if base is None:
+            continue
+        c = lvl["concurrency"]
+        if lvl["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            problems.append(f"c={c} throughput {lvl['throughput_rps']} < baseline {base['throughput_rps']}")
+
+        pairs = [("total", lvl["total"], base["total"])]
+        pairs += [(s, v, base["stages"][s]) for s, v in lvl["stages"].items() if s in base.get("stages", {})]
+        for name, cur, old in pairs:
+            # sub-millisecond stages are noise
+            if cur["p95_ms"] > max(old["p95_ms"] * (1 + tolerance), old["p95_ms"] + 1.0):
+                problems.append(f"c={c} {name} p95 {cur['p95_ms']} ms > baseline {old['p95_ms']} ms")
+    return problems
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(f"tables={report['tables']} llm={report['llm']} rss_max={report['memory']['rss_max_mb']} MB"
+          + (f" heap_peak={report['memory']['heap_peak_mb']} MB" if report["memory"].get("heap_peak_mb") else ""))
+    for lvl in report["levels"]:
+        t = lvl["total"]
+        print(f"\nconcurrency={lvl['concurrency']} requests={lvl['requests']} errors={lvl['errors']} "
+              f"throughput={lvl['throughput_rps']} req/s")
+        print(f"  {'stage':<16} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'n':>6}")
+        for name, s in [("total", t)] + list(lvl["stages"].items()):
+            print(f"  {name:<16} {s['p50_ms']:>10} {s['p95_ms']:>10} {s['p99_ms']:>10} {s['n']:>6}")
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    settings.DATABASE_URL = args.pg_url
+    # every request must do the full work: no coalescing of repeated questions
+    settings.SINGLE_FLIGHT_ENABLED = args.single_flight
+
+    if args.tables:
+        create_bench_database(args.pg_url, synthetic_schema(n_tables=args.tables), rows_per_table=args.rows)
+
+    if args.live:
+        from LLM.make_llm import make_llm
+        llm = make_llm(None, 0)
+    else:
+        llm = FakeChatModel(call_ms=args.llm_ms, prefill_tps=args.prefill_tps,
+                            decode_tps=args.decode_tps, jitter=args.jitter)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    levels = []
+    for c in args.concurrency:
+        levels.append(await run_level(llm, c, args.requests or c * 4))
+
+    memory: Dict[str, Optional[float]] = {"rss_max_mb": _rss_mb()}
+    if args.tracemalloc:
+        memory["heap_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        tracemalloc.stop()
+
+    report = {
+        "tables": args.tables,
+        "llm": "live" if args.live else f"fake({args.llm_ms}ms)",
+        "pipeline_mode": settings.PIPELINE_MODE,
+        "levels": levels,
+        "memory": memory,
+    }
+    _print_report(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nbaseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare_to_baseline(report, baseline, args.tolerance)
+        if problems:
+            print("\nREGRESSIONS vs baseline:")
+            for p in problems:
+                print(f"  {p}")
+            return 1
+        print("\nno regressions vs baseline")
+    return 0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pg-url", required=True)
+    ap.add_argument("--tables", type=int, default=40, help="create N bench tables first (0: use the DB as is)")
+    ap.add_argument("--rows", type=int, default=100)
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    ap.add_argument("--requests", type=int, default=0, help="per level (default 4 x concurrency)")
+    ap.add_argument("--live", action="store_true")
+    ap.add_argument("--llm-ms", type=float, default=50.0)
+    ap.add_argument("--prefill-tps", type=float, default=20000.0)
+    ap.add_argument("--decode-tps", type=float, default=400.0)
+    ap.add_argument("--jitter", type=float, default=0.1)
+    ap.add_argument("--single-flight", action="store_true")
+    ap.add_argument("--tracemalloc", action="store_true")
+    ap.add_argument("--save-baseline", default=None)
+    ap.add_argument("--baseline", default=None)
+    ap.add_argument("--tolerance", type=float, default=0.2)
+    sys.exit(asyncio.run(main_async(ap.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Deterministic fake chat model for benchmarks, evaluation and CI.
+
+Replies are canned but schema-aware, so the whole db pipeline runs for real
+(analysis -> table selection -> SQL that executes against the benchmark DB):
+- classifier:        always a confident DB request
+- analyzer:          words of the request as keywords/search_queries
+- table selection:   brief lines ("- schema.table ...") with the largest word overlap
+- SQL generator:     SELECT * FROM the first table of schema_context, LIMIT 10
+- SQL fixer:         the same, for the first table
+Unknown prompts get a plain text reply.
+
+Latency model (like a local Ollama model):
+    call_ms + prompt_tokens / prefill_tps + output_tokens / decode_tps, +-jitter
+and usage_metadata is filled, so token metrics work.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+from RAG.lexical_index import tokenize
+from RAG.schema_prompt import estimate_tokens
+
+_BRIEF_LINE_RE = re.compile(r"^- ([\w.]+)(.*)$", re.MULTILINE)
+_TABLE_BLOCK_RE = re.compile(r"^TABLE ([@\w.]+)", re.MULTILINE)
+_ALIASES_RE = re.compile(r"^-- schema aliases \(expand in SQL\): (.+)$", re.MULTILINE)
+_REQUEST_RE = re.compile(r"(?:user request|User request):\s*\n?(.+)", re.IGNORECASE)
+
+
+def _request_words(text: str) -> List[str]:
+    m = _REQUEST_RE.search(text)
+    words = tokenize(m.group(1) if m else text)
+    return [w for w in dict.fromkeys(words) if len(w) > 2][:8]
+
+
+def _rank_brief_tables(text: str, words: List[str], k: int) -> List[str]:
+    wanted = set(words)
+    scored = []
+    for pos, (fq, rest) in enumerate(_BRIEF_LINE_RE.findall(text)):
+        overlap = len(wanted & set(tokenize(fq + " " + rest)))
+        scored.append((-overlap, pos, fq))
+    return [fq for _, _, fq in sorted(scored)[:k]]
+
+
+def _first_table_sql(text: str) -> str:
+    m = _TABLE_BLOCK_RE.search(text)
+    if not m:
+        return "SELECT 1 AS value LIMIT 10"
+    fq = m.group(1)
+    a = _ALIASES_RE.search(text)
+    if a:
+        for pair in a.group(1).split(", "):
+            alias, _, schema = pair.partition("=")
+            if fq.startswith(alias + "."):
+                fq = schema + fq[len(alias):]
+    schema, _, table = fq.rpartition(".")
+    target = f'"{schema}"."{table}"' if schema else f'"{table}"'
+    return f"SELECT * FROM {target} LIMIT 10"
+
+
+class FakeChatModel(BaseChatModel):
+    call_ms: float = 300.0
+    prefill_tps: float = 1500.0
+    decode_tps: float = 40.0
+    jitter: float = 0.0  # +-fraction of the computed delay
+    seed: int = 7
+    tables_per_pick: int = 3
+    # stage -> reply text, overrides the canned reply (stages: route, analyze,
+    # select_tables, analyze_select, sql_generate, sql_fix, text)
+    replies: Dict[str, str] = {}
+
+    _rnd: random.Random = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rnd = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    @property
+    def model(self) -> str:
+        return "fake"
+
+    @staticmethod
+    def stage(messages: List[BaseMessage]) -> str:
+        system = str(messages[0].content) if messages else ""
+        if "router/classifier" in system:
+            return "route"
+        if "In ONE step" in system:
+            return "analyze_select"
+        if "select which database tables" in system:
+            return "select_tables"
+        if "extract structured intent" in system:
+            return "analyze"
+        if "SQL generator for PostgreSQL" in system:
+            return "sql_generate"
+        if "You fix a PostgreSQL SQL query" in system:
+            return "sql_fix"
+        return "text"
+
+    def reply(self, messages: List[BaseMessage]) -> str:
+        stage = self.stage(messages)
+        if stage in self.replies:
+            return self.replies[stage]
+
+        text = "\n".join(str(m.content) for m in messages)
+        words = _request_words(text)
+        analysis = {
+            "intent": "list",
+            "entities": [],
+            "time_range": {"type": "none", "from": None, "to": None, "raw": ""},
+            "metrics": {"type": "none", "value": None, "dimension": None},
+            "keywords": words,
+            "search_queries": [" ".join(words)],
+        }
+
+        if stage == "route":
+            return json.dumps({"is_db_request": True, "confidence": 0.95, "reason": "fake", "rewrite": ""})
+        if stage == "analyze":
+            return json.dumps(analysis)
+        if stage == "select_tables":
+            analysis_words = tokenize(text.split("analysis (JSON):", 1)[-1])
+            tables = _rank_brief_tables(text, analysis_words, self.tables_per_pick)
+            return json.dumps({"tables": tables, "also_consider": [], "reason": "fake", "confidence": 0.8})
+        if stage == "analyze_select":
+            tables = _rank_brief_tables(text, words, self.tables_per_pick)
+            return json.dumps({**analysis, "tables": tables, "also_consider": [], "reason": "fake", "confidence": 0.8})
+        if stage == "sql_generate":
+            sql = _first_table_sql(text)
+            return json.dumps({"sql_preview": sql, "sql_full": sql, "notes": "fake"})
+        if stage == "sql_fix":
+            return json.dumps({"sql": _first_table_sql(text), "fix_notes": "fake"})
+        return "Here is the answer."
+
+    def _result(self, messages: List[BaseMessage]) -> "tuple[ChatResult, float]":
+        reply = self.reply(messages)
+        prompt_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        output_tokens = estimate_tokens(reply)
+        delay = self.call_ms / 1000 + prompt_tokens / self.prefill_tps + output_tokens / self.decode_tps
+        if self.jitter:
+            delay *= 1 + self._rnd.uniform(-self.jitter, self.jitter)
+
+        message = AIMessage(
+            content=reply,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": prompt_tokens + output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)]), max(0.0, delay)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        result, delay = self._result(messages)
+        time.sleep(delay)
+        return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        result, delay = self._result(messages)
+        await asyncio.sleep(delay)
+        return result
@@ -0,0 +1,154 @@
+"""
+Creates a benchmark database from a schema_full dict
+(build_schema_context_from_db() shape, e.g. benchmarks.schema_prompt_tokens.synthetic_schema()).
+
+- every schema is created as "<prefix><schema>" (default prefix "bench_"); only
+  schemas with this prefix are ever dropped, but use a dedicated database anyway
+- tables get `rows_per_table` generated rows (ids 1..N, so id -> id FKs hold)
+- table/column comments and FKs are created, so the catalog queries in
+  DB/init_db.py see the same structure as in production
+
+Usage:
+    python -m benchmarks.pg_fixture --pg-url postgresql://... --tables 200 --rows 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+from typing import Any, Dict, List
+
+import psycopg
+from psycopg import sql
+
+_VALUE_EXPR = {
+    "integer": "(g % 1000)",
+    "bigint": "g",
+    "smallint": "(g % 100)",
+    "numeric": "(g * 1.5)",
+    "double precision": "(g * 0.25)",
+    "boolean": "(g % 2 = 0)",
+    "date": "(date '2024-01-01' + (g % 365))",
+    "timestamp with time zone": "(timestamptz '2024-01-01' + g * interval '1 hour')",
+    "timestamp without time zone": "(timestamp '2024-01-01' + g * interval '1 hour')",
+}
+
+
+def prefixed(schema_full: Dict[str, Any], prefix: str = "bench_") -> Dict[str, Any]:
+    """
+    Same catalog with every schema renamed to prefix + schema.
+    """
+    def fq(name: str) -> str:
+        schema, _, table = name.partition(".")
+        return f"{prefix}{schema}.{table}"
+
+    tables = {}
+    for name, t in schema_full["tables"].items():
+        t = copy.deepcopy(t)
+        t["schema"] = prefix + t["schema"]
+        tables[fq(name)] = t
+    fks = [{**fk, "from": fq(fk["from"]), "to": fq(fk["to"])} for fk in schema_full.get("foreign_keys") or []]
+    return {"tables": tables, "foreign_keys": fks}
+
+
+def _value(col: Dict[str, Any]) -> sql.Composable:
+    if col["name"] == "id":
+        return sql.SQL("g")
+    expr = _VALUE_EXPR.get(col["type"])
+    if expr is None:  # text-like
+        return sql.SQL("({} || g)").format(sql.Literal(col["name"][:12] + "_"))
+    return sql.SQL(expr)
+
+
+def ddl_statements(schema_full: Dict[str, Any], rows_per_table: int) -> List[sql.Composable]:
+    stmts: List[sql.Composable] = []
+    for schema in sorted({t["schema"] for t in schema_full["tables"].values()}):
+        stmts.append(sql.SQL("CREATE SCHEMA {}").format(sql.Identifier(schema)))
+
+    for t in schema_full["tables"].values():
+        ident = sql.Identifier(t["schema"], t["name"])
+        cols = sql.SQL(", ").join(
+            sql.SQL("{} {}{}").format(
+                sql.Identifier(c["name"]),
+                sql.SQL(c["type"]),
+                sql.SQL(" PRIMARY KEY") if c["name"] == "id"
+                else sql.SQL(" NOT NULL") if c.get("nullable", True) is False
+                else sql.SQL(""),
+            )
+            for c in t["columns"]
+        )
+        stmts.append(sql.SQL("CREATE TABLE {} ({})").format(ident, cols))
+        stmts.append(sql.SQL("INSERT INTO {} SELECT {} FROM generate_series(1, {}) AS g").format(
+            ident,
+            sql.SQL(", ").join(_value(c) for c in t["columns"]),
+            sql.Literal(rows_per_table),
+        ))
+        if t.get("description"):
+            stmts.append(sql.SQL("COMMENT ON TABLE {} IS {}").format(ident, sql.Literal(t["description"])))
+        for c in t["columns"]:
+            if c.get("description"):
+                stmts.append(sql.SQL("COMMENT ON COLUMN {}.{} IS {}").format(
+                    ident, sql.Identifier(c["name"]), sql.Literal(c["description"]),
+                ))
+
+    # FKs last: all rows are in place, creation order does not matter
+    for fk in schema_full.get("foreign_keys") or []:
+        src_schema, _, src = fk["from"].partition(".")
+        dst_schema, _, dst = fk["to"].partition(".")
+        stmts.append(sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} FOREIGN KEY ({}) REFERENCES {} ({})").format(
+            sql.Identifier(src_schema, src),
+            sql.Identifier(fk["constraint"]),
+            sql.Identifier(fk["from_column"]),
+            sql.Identifier(dst_schema, dst),
+            sql.Identifier(fk["to_column"]),
+        ))
+    return stmts
+
+
+def drop_bench_schemas(conn: psycopg.Connection, prefix: str = "bench_") -> None:
+    rows = conn.execute(
+        "SELECT nspname FROM pg_namespace WHERE nspname LIKE %s",
+        (prefix.replace("_", r"\_") + "%",),
+    ).fetchall()
+    for (schema,) in rows:
+        conn.execute(sql.SQL("DROP SCHEMA {} CASCADE").format(sql.Identifier(schema)))
+
+
+def create_bench_database(
+    pg_url: str,
+    schema_full: Dict[str, Any],
+    *,
+    rows_per_table: int = 100,
+    prefix: str = "bench_",
+) -> Dict[str, Any]:
+    """
+    (Re)creates the prefixed schemas and returns the prefixed schema_full.
+    """
+    bench = prefixed(schema_full, prefix)
+    with psycopg.connect(pg_url) as conn:
+        drop_bench_schemas(conn, prefix)
+        for stmt in ddl_statements(bench, rows_per_table):
+            conn.execute(stmt)
+    return bench
+
+
+def main() -> None:
+    from benchmarks.schema_prompt_tokens import synthetic_schema
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pg-url", required=True)
+    ap.add_argument("--tables", type=int, default=40)
+    ap.add_argument("--rows", type=int, default=100)
+    ap.add_argument("--drop", action="store_true", help="only drop the bench_ schemas")
+    args = ap.parse_args()
+
+    if args.drop:
+        with psycopg.connect(args.pg_url) as conn:
+            drop_bench_schemas(conn)
+        return
+    bench = create_bench_database(args.pg_url, synthetic_schema(n_tables=args.tables), rows_per_table=args.rows)
+    print(f"created {len(bench['tables'])} tables, {len(bench['foreign_keys'])} FKs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Encoding a query result for the agent: the previous path
+    json.loads(json.dumps(payload, default=json_default))   # make_json_safe
+    json.dumps(..., indent=2)                                # _json
+vs DB/row_encoding.dumps (one orjson pass, exact Decimals, compact), and the
+same rows as a ColumnarResult (DB/columnar.py: column names once, tuple rows),
+including the Python memory held by the rows.
+
+Rows are synthetic psycopg-like dicts: int, text, Decimal, date, timestamptz,
+UUID, bool and NULLs.
+
+Usage:
+    python -m benchmarks.row_encoding
+    python -m benchmarks.row_encoding --rows 10000 --runs 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+import tracemalloc
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, List
+
+from DB.columnar import ColumnarResult
+from DB.row_encoding import dumps, orjson
+
+
+def _legacy_default(o: Any):
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    if isinstance(o, Decimal):
+        return float(o)
+    if isinstance(o, set):
+        return list(o)
+    return str(o)
+
+
+def legacy_encode(payload: Dict[str, Any]) -> str:
+    safe = json.loads(json.dumps(payload, default=_legacy_default, ensure_ascii=False))
+    return json.dumps(safe, ensure_ascii=False, indent=2)
+
+
+def make_rows(n: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    carriers = ["SU", "S7", "U6", "DP", "FV"]
+    return [
+        {
+            "flight_id": i,
+            "carrier": rnd.choice(carriers),
+            "flight_no": f"{rnd.choice(carriers)}{rnd.randint(100, 9999)}",
+            "fare": Decimal(rnd.randint(100, 9_999_999)) / 100,
+            "flight_date": (start + timedelta(days=i % 365)).date(),
+            "departed_at": start + timedelta(minutes=17 * i),
+            "booking_ref": uuid.UUID(int=rnd.getrandbits(128)),
+            "delayed": rnd.random() < 0.2,
+            "gate": None if rnd.random() < 0.3 else f"A{rnd.randint(1, 40)}",
+        }
+        for i in range(n)
+    ]
+
+
+def _held_bytes(build: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def _measure(fn: Callable[[], str], runs: int) -> List[float]:
+    fn()  # warm-up
+    out = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - start)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    payload = {"ok": True, "sql": "SELECT ...", "rows_preview": make_rows(args.rows), "attempts": []}
+    columnar = ColumnarResult.from_dicts(payload["rows_preview"])
+    columnar_payload = {"ok": True, "sql": "SELECT ...", "result": columnar, "attempts": []}
+    legacy_text, new_text, columnar_text = legacy_encode(payload), dumps(payload), dumps(columnar_payload)
+
+    # exactness: the new output keeps every Decimal digit
+    fares = [r["fare"] for r in payload["rows_preview"]]
+    decoded = json.loads(new_text, parse_float=Decimal)["rows_preview"]
+    exact = sum(Decimal(str(r["fare"])) == f for r, f in zip(decoded, fares))
+
+    print(f"rows={args.rows} runs={args.runs} encoder={'orjson' if orjson else 'json (orjson not installed)'}")
+    print(f"{'path':<28} {'p50 ms':>9} {'min ms':>9} {'bytes':>11}")
+    for name, fn, text in [
+        ("make_json_safe + indent=2", lambda: legacy_encode(payload), legacy_text),
+        ("row_encoding.dumps", lambda: dumps(payload), new_text),
+        ("row_encoding.dumps columnar", lambda: dumps(columnar_payload), columnar_text),
+    ]:
+        times = _measure(fn, args.runs)
+        print(f"{name:<28} {statistics.median(times) * 1000:>9.1f} {min(times) * 1000:>9.1f} {len(text.encode()):>11}")
+    print(f"exact Decimals: {exact}/{len(fares)}")
+
+    dict_mem = _held_bytes(lambda: make_rows(args.rows))
+    tuple_mem = _held_bytes(lambda: ColumnarResult.from_dicts(make_rows(args.rows)))
+    print(f"rows in memory: dicts {dict_mem / 1e6:.1f} MB, columnar {tuple_mem / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Compares prompt size of schema_context serializations:
+- json:            today's json.dumps(compact_for_prompt(schema_selected)) — column names only
+- json_full:       json.dumps(schema_selected) — same information as "compact" (types, comments, FKs)
+- compact:         DDL-like text (RAG/schema_prompt.py)
+- compact+budget:  compact text with SCHEMA_PROMPT_TOKEN_BUDGET-style column dropping
+
+Usage:
+    python -m benchmarks.schema_prompt_tokens                       # synthetic schema
+    python -m benchmarks.schema_prompt_tokens --pg-url postgresql://...  # real catalog
+    python -m benchmarks.schema_prompt_tokens --tables 5 10 20 --budget 800
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from typing import Any, Callable, Dict, List
+
+from RAG.schema_prompt import estimate_tokens, render_schema_for_prompt
+
+
+def _token_counter() -> Callable[[str], int]:
+    try:
+        import tiktoken
+        enc = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(enc.encode(text))
+    except Exception:
+        return estimate_tokens
+
+
+def synthetic_schema(n_tables: int = 40, seed: int = 7) -> Dict[str, Any]:
+    """
+    Small deterministic schema in build_schema_context_from_db() shape.
+    """
+    rnd = random.Random(seed)
+    types = ["integer", "bigint", "character varying", "text", "timestamp with time zone",
+             "date", "numeric", "boolean", "double precision"]
+    words = ["flight", "carrier", "airport", "route", "booking", "passenger", "crew", "aircraft",
+             "schedule", "delay", "gate", "terminal", "ticket", "fare", "status", "code"]
+
+    tables: Dict[str, Any] = {}
+    fks: List[Dict[str, str]] = []
+    names = []
+    for i in range(n_tables):
+        schema = "flight_operations" if i % 3 else "reference_data"
+        name = f"{rnd.choice(words).title()}{rnd.choice(words).title()}{i}"
+        fq = f"{schema}.{name}"
+        names.append(fq)
+        cols = [{"ordinal_position": 1, "name": "id", "type": "bigint", "nullable": False,
+                 "default": None, "description": "primary key"}]
+        for pos in range(2, rnd.randint(8, 30)):
+            cols.append({
+                "ordinal_position": pos,
+                "name": f"{rnd.choice(words)}_{rnd.choice(words)}_{pos}",
+                "type": rnd.choice(types),
+                "nullable": rnd.random() < 0.5,
+                "default": None,
+                "description": f"{rnd.choice(words)} {rnd.choice(words)} value" if rnd.random() < 0.4 else None,
+            })
+        tables[fq] = {"schema": schema, "name": name,
+                      "description": f"{name} records" if rnd.random() < 0.7 else None,
+                      "columns": cols}
+        if i:
+            target = names[rnd.randrange(i)]
+            fks.append({"from": fq, "from_column": "id", "to": target, "to_column": "id",
+                        "constraint": f"fk_{i}"})
+
+    return {"tables": tables, "foreign_keys": fks}
+
+
+def selected_subset(schema_full: Dict[str, Any], n: int) -> Dict[str, Any]:
+    """
+    Mimics select_relevant_schema_with_llm() output for the first n tables.
+    """
+    picked = list(schema_full["tables"])[:n]
+    keep = set(picked)
+    return {
+        "tables": {fq: schema_full["tables"][fq] for fq in picked},
+        "foreign_keys": [fk for fk in schema_full["foreign_keys"] if fk["from"] in keep and fk["to"] in keep],
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pg-url", default=None)
+    ap.add_argument("--tables", type=int, nargs="+", default=[5, 10, 20])
+    ap.add_argument("--budget", type=int, default=800)
+    args = ap.parse_args()
+
+    if args.pg_url:
+        from DB.init_db import build_schema_context_from_db
+        schema_full = build_schema_context_from_db(args.pg_url)
+    else:
+        schema_full = synthetic_schema()
+
+    count = _token_counter()
+    print(f"{'tables':>6} {'json':>8} {'json_full':>10} {'compact':>8} {'budget':>8} {'vs_full':>8}")
+    for n in args.tables:
+        ctx = selected_subset(schema_full, n)
+        t_json = count(render_schema_for_prompt(ctx, fmt="json"))
+        t_full = count(json.dumps(ctx, ensure_ascii=False))
+        t_compact = count(render_schema_for_prompt(ctx, fmt="compact"))
+        t_budget = count(render_schema_for_prompt(ctx, fmt="compact", token_budget=args.budget))
+        saved = 1 - t_compact / t_full if t_full else 0.0
+        print(f"{n:>6} {t_json:>8} {t_full:>10} {t_compact:>8} {t_budget:>8} {saved:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+How the catalog-side work scales with the number of tables: generation of a
+synthetic catalog (benchmarks/synth_schema.py), chunking (build_chunks), the
+BM25 index, the join graph, the selection brief and one table selection call
+with a zero-latency fake LLM. Optional:
+- --embed N   embeds the first N chunks with the sentence-transformers model and
+              extrapolates to all chunks
+- --pg-url    creates the catalog in Postgres (bench_* schemas) and times the
+              catalog load (build_schema_context_from_db + QUERIES sections)
+
+Usage:
+    python -m benchmarks.schema_scaling
+    python -m benchmarks.schema_scaling --tables 10 1000 10000 --schemas 20
+    python -m benchmarks.schema_scaling --tables 1000 --pg-url postgresql://... --embed 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks.synth_schema import SynthConfig, generate_schema_full, to_sections
+from DB.build_vector_store import build_chunks
+from DB.join_graph import JoinGraph
+from LLM.select_relevant_schema_with_llm import render_schema_brief, select_relevant_schema_with_llm
+from RAG.lexical_index import LexicalIndex
+from RAG.schema_prompt import estimate_tokens
+
+ANALYSIS = {
+    "intent": "list",
+    "entities": [{"name": "flight"}, {"name": "carrier"}],
+    "metrics": [],
+    "filters": [],
+    "keywords": ["flight", "carrier", "delay"],
+}
+
+
+@contextmanager
+def _timed(out: Dict[str, float], name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    yield
+    out[name] = round((time.perf_counter() - start) * 1000, 1)
+
+
+def _load_from_pg(pg_url: str, out: Dict[str, float]) -> None:
+    import psycopg
+    from DB.init_db import QUERIES, _fetch_section, build_schema_context_from_db
+
+    with _timed(out, "pg_schema_context_ms"):
+        build_schema_context_from_db(pg_url)
+    with _timed(out, "pg_sections_ms"):
+        with psycopg.connect(pg_url) as conn:
+            for name, sql in QUERIES.items():
+                _fetch_section(conn, name.lower(), sql)
+
+
+def _embed(chunks: List[Any], limit: int, out: Dict[str, float]) -> None:
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    sample = [text for text, _ in chunks[:limit]]
+    with _timed(out, "embed_sample_ms"):
+        model.encode(sample, batch_size=64, show_progress_bar=False)
+    out["embed_all_est_ms"] = round(out["embed_sample_ms"] * len(chunks) / max(1, len(sample)), 1)
+
+
+def run_size(n_tables: int, args: argparse.Namespace) -> Dict[str, Any]:
+    cfg = SynthConfig(
+        n_schemas=min(args.schemas, n_tables),
+        n_tables=n_tables,
+        columns=tuple(args.columns),
+        fk_per_table=args.fk_per_table,
+        seed=args.seed,
+    )
+    t: Dict[str, float] = {}
+
+    with _timed(t, "generate_ms"):
+        schema_full = generate_schema_full(cfg)
+    with _timed(t, "sections_ms"):
+        sections = to_sections(schema_full)
+    with _timed(t, "chunks_ms"):
+        chunks = build_chunks(sections)
+    with _timed(t, "lexical_index_ms"):
+        index = LexicalIndex.from_chunks(chunks)
+    with _timed(t, "lexical_search_ms"):
+        index.search(["flight carrier delay"], top_k=20)
+    with _timed(t, "join_graph_ms"):
+        graph = JoinGraph.from_schema(schema_full)
+    with _timed(t, "join_connect_ms"):
+        graph.connect(list(schema_full["tables"])[-5:], max_hops=3)
+    with _timed(t, "brief_ms"):
+        brief = render_schema_brief(schema_full)
+
+    llm = FakeChatModel(call_ms=0, prefill_tps=1e12, decode_tps=1e12, jitter=0)
+    with _timed(t, "select_tables_ms"):
+        asyncio.run(select_relevant_schema_with_llm(llm, ANALYSIS, schema_full))
+
+    if args.pg_url:
+        from benchmarks.pg_fixture import create_bench_database
+
+        with _timed(t, "pg_create_ms"):
+            create_bench_database(args.pg_url, schema_full, rows_per_table=args.rows)
+        _load_from_pg(args.pg_url, t)
+
+    if args.embed:
+        _embed(chunks, args.embed, t)
+
+    return {
+        "tables": n_tables,
+        "columns": sum(len(x["columns"]) for x in schema_full["tables"].values()),
+        "fks": len(schema_full["foreign_keys"]),
+        "chunks": len(chunks),
+        "brief_tokens": estimate_tokens(brief),
+        "timings": t,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--tables", type=int, nargs="+", default=[10, 1000, 10000])
+    ap.add_argument("--schemas", type=int, default=10)
+    ap.add_argument("--columns", type=int, nargs=3, default=[4, 10, 40], metavar=("MIN", "MODE", "MAX"))
+    ap.add_argument("--fk-per-table", type=float, default=1.0)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--pg-url", default=None)
+    ap.add_argument("--rows", type=int, default=0)
+    ap.add_argument("--embed", type=int, default=0, metavar="N", help="embed the first N chunks")
+    args = ap.parse_args()
+
+    for n in args.tables:
+        r = run_size(n, args)
+        print(f"\ntables={r['tables']} columns={r['columns']} fks={r['fks']} "
+              f"chunks={r['chunks']} brief_tokens~{r['brief_tokens']}")
+        for name, ms in r["timings"].items():
+            print(f"  {name:<22} {ms:>10}")
+
+
+if __name__ == "__main__":
+    main()
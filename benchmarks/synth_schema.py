@@ -0,0 +1,192 @@
+"""
+Synthetic large-schema generator for scaling tests.
+
+One SynthConfig produces the same catalog in three forms:
+- schema_full  — build_schema_context_from_db() shape (tables, columns, comments, FKs)
+- sections     — Section objects as DB/init_db.py::QUERIES returns them, for build_chunks()
+- Postgres     — DDL + rows via benchmarks.pg_fixture (create_database())
+
+    cfg = SynthConfig(n_schemas=20, n_tables=10_000, columns=(4, 12, 60), fk_per_table=1.5)
+    schema_full = generate_schema_full(cfg)
+    chunks = build_chunks(to_sections(schema_full))
+
+FK columns are real "<target>_id" bigint columns referencing the target's "id".
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from DB.build_vector_store import Section
+
+_WORDS = [
+    "flight", "carrier", "airport", "route", "booking", "passenger", "crew", "aircraft",
+    "schedule", "delay", "gate", "terminal", "ticket", "fare", "status", "code", "payment",
+    "invoice", "baggage", "seat", "loyalty", "member", "cargo", "fuel", "maintenance",
+    "slot", "runway", "weather", "catering", "refund", "voucher", "partner", "contract",
+]
+_TYPES = [
+    ("integer", 3), ("bigint", 2), ("character varying", 5), ("text", 2),
+    ("timestamp with time zone", 2), ("date", 2), ("numeric", 2), ("boolean", 1),
+    ("double precision", 1),
+]
+
+
+@dataclass
+class SynthConfig:
+    n_schemas: int = 3
+    n_tables: int = 100
+    # columns per table: triangular distribution (min, mode, max), FK columns not included
+    columns: Tuple[int, int, int] = (4, 10, 40)
+    fk_per_table: float = 1.0  # average outgoing FKs per table (Poisson-like)
+    table_comment_rate: float = 0.7
+    column_comment_rate: float = 0.3
+    seed: int = 7
+
+
+def _ident(rnd: random.Random, n: int) -> str:
+    return "_".join(rnd.choice(_WORDS) for _ in range(n))
+
+
+def generate_schema_full(cfg: SynthConfig) -> Dict[str, Any]:
+    rnd = random.Random(cfg.seed)
+    type_names = [t for t, _ in _TYPES]
+    type_weights = [w for _, w in _TYPES]
+
+    schemas = [f"{_ident(rnd, 1)}_{i}" for i in range(cfg.n_schemas)]
+    tables: Dict[str, Any] = {}
+    names: List[str] = []
+
+    for i in range(cfg.n_tables):
+        schema = schemas[i % cfg.n_schemas]
+        name = f"{_ident(rnd, 2)}_{i}"
+        fq = f"{schema}.{name}"
+        names.append(fq)
+
+        lo, mode, hi = cfg.columns
+        n_cols = int(round(rnd.triangular(lo, hi, mode)))
+        cols = [{"ordinal_position": 1, "name": "id", "type": "bigint", "nullable": False,
+                 "default": None, "description": "primary key"}]
+        used = {"id"}
+        while len(cols) < n_cols:
+            cname = _ident(rnd, rnd.choice((1, 2)))
+            if cname in used or cname.endswith("_id"):
+                continue
+            used.add(cname)
+            cols.append({
+                "ordinal_position": len(cols) + 1,
+                "name": cname,
+                "type": rnd.choices(type_names, type_weights)[0],
+                "nullable": rnd.random() < 0.5,
+                "default": None,
+                "description": f"{cname.replace('_', ' ')} of the {name.split('_')[0]}"
+                if rnd.random() < cfg.column_comment_rate else None,
+            })
+
+        tables[fq] = {
+            "schema": schema,
+            "name": name,
+            "description": f"{name.rsplit('_', 1)[0].replace('_', ' ')} records"
+            if rnd.random() < cfg.table_comment_rate else None,
+            "columns": cols,
+        }
+
+    foreign_keys: List[Dict[str, str]] = []
+    for i, fq in enumerate(names[1:], start=1):
+        # geometric count with mean fk_per_table; targets are earlier tables (no cycles)
+        n_fk = 0
+        p = 1 / (1 + cfg.fk_per_table)
+        while rnd.random() > p and n_fk < 8:
+            n_fk += 1
+        t = tables[fq]
+        for target in dict.fromkeys(names[rnd.randrange(i)] for _ in range(n_fk)):
+            col = f"{tables[target]['name']}_id"[:63]
+            if any(c["name"] == col for c in t["columns"]):
+                continue
+            t["columns"].append({
+                "ordinal_position": len(t["columns"]) + 1,
+                "name": col,
+                "type": "bigint",
+                "nullable": True,
+                "default": None,
+                "description": None,
+            })
+            foreign_keys.append({
+                "from": fq,
+                "from_column": col,
+                "to": target,
+                "to_column": "id",
+                "constraint": f"fk_{len(foreign_keys)}",
+            })
+
+    return {"tables": tables, "foreign_keys": foreign_keys}
+
+
+def _s(v: Any) -> str:
+    return "" if v is None else str(v)
+
+
+def to_sections(schema_full: Dict[str, Any]) -> Dict[str, Section]:
+    """
+    Same rows/columns as _fetch_section() over DB/init_db.py::QUERIES.
+    """
+    tables, columns, table_comments, column_comments = [], [], [], []
+    for t in schema_full["tables"].values():
+        s, n = t["schema"], t["name"]
+        tables.append([s, n])
+        table_comments.append([s, n, _s(t.get("description"))])
+        for c in t["columns"]:
+            columns.append([s, n, _s(c["ordinal_position"]), c["name"], c["type"],
+                            "YES" if c.get("nullable") else "NO", _s(c.get("default"))])
+            column_comments.append([s, n, c["name"], _s(c.get("description"))])
+
+    fks = []
+    for fk in schema_full.get("foreign_keys") or []:
+        fs, _, ft = fk["from"].partition(".")
+        ts, _, tt = fk["to"].partition(".")
+        fks.append([fs, ft, fk["from_column"], ts, tt, fk["to_column"], fk["constraint"]])
+
+    return {
+        "tables": Section("tables", ["table_schema", "table_name"], sorted(tables)),
+        "columns": Section("columns", ["table_schema", "table_name", "ordinal_position", "column_name",
+                                       "data_type", "is_nullable", "column_default"], columns),
+        "table_comments": Section("table_comments", ["schema_name", "table_name", "table_description"],
+                                  table_comments),
+        "column_comments": Section("column_comments", ["schema_name", "table_name", "column_name",
+                                                       "column_description"], column_comments),
+        "foreign_keys": Section("foreign_keys", ["from_schema", "from_table", "from_column", "to_schema",
+                                                 "to_table", "to_column", "constraint_name"], fks),
+    }
+
+
+def create_database(pg_url: str, cfg: SynthConfig, rows_per_table: int = 10) -> Dict[str, Any]:
+    """
+    Creates the catalog in Postgres (bench_* schemas) and returns its schema_full.
+    """
+    from benchmarks.pg_fixture import create_bench_database
+
+    return create_bench_database(pg_url, generate_schema_full(cfg), rows_per_table=rows_per_table)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pg-url", required=True)
+    ap.add_argument("--schemas", type=int, default=3)
+    ap.add_argument("--tables", type=int, default=100)
+    ap.add_argument("--columns", type=int, nargs=3, default=[4, 10, 40], metavar=("MIN", "MODE", "MAX"))
+    ap.add_argument("--fk-per-table", type=float, default=1.0)
+    ap.add_argument("--rows", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    cfg = SynthConfig(n_schemas=args.schemas, n_tables=args.tables, columns=tuple(args.columns),
+                      fk_per_table=args.fk_per_table, seed=args.seed)
+    schema_full = create_database(args.pg_url, cfg, rows_per_table=args.rows)
+    print(f"created {len(schema_full['tables'])} tables, {len(schema_full['foreign_keys'])} FKs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+Execution-accuracy evaluation of the db pipeline (what db_query_chain runs).
+
+Gold set: JSONL, one {"id": ..., "question": ..., "sql": <reference SQL>} per line.
+For every question the pipeline runs, then the predicted and the reference SQL
+are both executed (read-only, statement_timeout) and their result sets compared:
+- order-insensitive (multiset of rows; column order matters, names do not)
+- values normalized: Decimal/float rounded, integral numbers as int, dates as ISO
+- small results are compared row by row; above --exact-rows only a streaming
+  multiset hash (row count + sum of 128-bit row hashes) is kept, so result size
+  does not bound memory
+
+Reported per configuration: execution accuracy, pipeline ok rate, SQL executions
+per question (1 + fixes), LLM calls and tokens (record_llm_usage), latency p50/p95.
+
+Configurations are settings overrides, "name:KEY=VALUE,KEY=VALUE"; "model" and
+"temperature" go to make_llm(). Without --config the current settings are used.
+
+    python -m benchmarks.text2sql_eval --pg-url ... --gold gold.jsonl \\
+        --config two_call:PIPELINE_MODE=two_call --config combined:PIPELINE_MODE=combined
+    # CI: fake LLM, bench_* catalog and gold pairs generated from it
+    python -m benchmarks.text2sql_eval --pg-url ... --fake --synthetic 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime as dt
+import hashlib
+import json
+import math
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+import psycopg
+
+from API.config import settings
+from benchmarks.e2e import summarize
+from LLM.db_pipeline import run_db_pipeline
+from LLM.utils import collect_llm_usage
+from observability.timing import collect_stage_timings
+
+_HASH_MOD = 1 << 128
+
+
+# ---------- result sets ----------
+
+def normalize_value(v: Any, float_digits: int = 6) -> Any:
+    if isinstance(v, bool) or v is None:
+        return v
+    if isinstance(v, (int, float, Decimal)):
+        if not (v.is_finite() if isinstance(v, Decimal) else math.isfinite(v)):
+            return str(v)  # nan/inf
+        if v == int(v):
+            return int(v)
+        return round(float(v), float_digits)
+    if isinstance(v, (dt.date, dt.time, dt.datetime)):
+        return v.isoformat()
+    if isinstance(v, (bytes, memoryview)):
+        return bytes(v).hex()
+    if isinstance(v, (list, tuple)):
+        return tuple(normalize_value(x, float_digits) for x in v)
+    if isinstance(v, dict):
+        return json.dumps(v, sort_keys=True, default=str)
+    return v if isinstance(v, str) else str(v)
+
+
+def row_hash(row: Tuple[Any, ...]) -> int:
+    return int.from_bytes(hashlib.blake2b(repr(row).encode(), digest_size=16).digest(), "big")
+
+
+@dataclass
+class ResultSet:
+    count: int = 0
+    digest: int = 0  # sum of row hashes mod 2**128: independent of row order
+    rows: Optional[Counter] = field(default_factory=Counter)  # None once above exact_rows
+
+    def add(self, row: Tuple[Any, ...], exact_rows: int) -> None:
+        self.count += 1
+        self.digest = (self.digest + row_hash(row)) % _HASH_MOD
+        if self.rows is not None:
+            self.rows[row] += 1
+            if self.count > exact_rows:
+                self.rows = None
+
+
+def same_result(a: ResultSet, b: ResultSet) -> bool:
+    if a.count != b.count:
+        return False
+    if a.rows is not None and b.rows is not None:
+        return a.rows == b.rows
+    return a.digest == b.digest
+
+
+def fetch_result(
+    pg_url: str,
+    sql: str,
+    *,
+    timeout_ms: int = 30_000,
+    exact_rows: int = 10_000,
+    max_rows: int = 5_000_000,
+    batch: int = 5_000,
+) -> ResultSet:
+    """
+    Streams the query through a server-side cursor in a read-only transaction.
+    Raises ValueError above max_rows.
+    """
+    res = ResultSet()
+    with psycopg.connect(pg_url) as conn:
+        conn.read_only = True
+        with conn.cursor() as cur:
+            cur.execute("SELECT set_config('statement_timeout', %s, true)", (str(int(timeout_ms)),))
+        with conn.cursor(name="text2sql_eval") as cur:
+            cur.execute(sql.strip().rstrip(";"))
+            while True:
+                chunk = cur.fetchmany(batch)
+                if not chunk:
+                    break
+                for row in chunk:
+                    res.add(tuple(normalize_value(v) for v in row), exact_rows)
+                if res.count > max_rows:
+                    raise ValueError(f"result has more than {max_rows} rows")
+    return res
+
+
+# ---------- gold / configs ----------
+
+def load_gold(path: str) -> List[Dict[str, Any]]:
+    gold = []
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            item = json.loads(line)
+            if not item.get("question") or not item.get("sql"):
+                raise ValueError(f"{path}:{n}: 'question' and 'sql' are required")
+            item.setdefault("id", str(n))
+            gold.append(item)
+    return gold
+
+
+def synthetic_gold(schema_full: Dict[str, Any], n: int) -> List[Dict[str, Any]]:
+    """
+    Gold pairs a fake LLM can get right: "list <table words> records" -> first 10 rows.
+    """
+    gold = []
+    for fq, t in list(schema_full["tables"].items())[:n]:
+        words = t["name"].rsplit("_", 1)[0].replace("_", " ")
+        gold.append({
+            "id": fq,
+            "question": f"List {words} records",
+            "sql": f'SELECT * FROM "{t["schema"]}"."{t["name"]}" ORDER BY id LIMIT 10',
+        })
+    return gold
+
+
+def _parse_value(raw: str) -> Any:
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def parse_config(spec: str) -> Dict[str, Any]:
+    """
+    "name:KEY=VALUE,KEY=VALUE" -> {"name", "settings", "model", "temperature"}
+    """
+    name, _, rest = spec.partition(":")
+    overrides: Dict[str, Any] = {}
+    for part in filter(None, rest.split(",")):
+        key, sep, value = part.partition("=")
+        if not sep:
+            raise ValueError(f"bad override {part!r} in {spec!r}")
+        overrides[key.strip()] = _parse_value(value.strip())
+    cfg = {"name": name or "default", "model": overrides.pop("model", None),
+           "temperature": overrides.pop("temperature", None), "settings": {}}
+    for key, value in overrides.items():
+        if not hasattr(settings, key):
+            raise ValueError(f"unknown setting {key!r} in {spec!r}")
+        cfg["settings"][key] = value
+    return cfg
+
+
+# ---------- evaluation ----------
+
+async def eval_question(
+    llm: Any,
+    item: Dict[str, Any],
+    reference: Optional[ResultSet],
+    args: argparse.Namespace,
+) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"id": item["id"], "question": item["question"], "match": False}
+    with collect_stage_timings() as timings, collect_llm_usage() as usage:
+        start = time.perf_counter()
+        try:
+            payload = await run_db_pipeline(llm, item["question"], max_attempts=args.max_attempts)
+        except Exception as e:
+            payload = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        out["latency_s"] = time.perf_counter() - start
+
+    attempts = payload.get("attempts") or []
+    out.update({
+        "ok": bool(payload.get("ok")),
+        "sql": payload.get("sql"),
+        "executions": len(attempts) + bool(payload.get("ok")),
+        "llm_calls": usage["calls"],
+        "prompt_tokens": usage["prompt_tokens"],
+        "output_tokens": usage["output_tokens"],
+        "stages": timings.totals(),
+    })
+    if not out["ok"]:
+        out["error"] = payload.get("error")
+        return out
+    if reference is None:
+        out["error"] = "reference SQL failed"
+        return out
+
+    try:
+        predicted = await asyncio.to_thread(
+            fetch_result, args.pg_url, out["sql"], timeout_ms=args.timeout_ms, exact_rows=args.exact_rows,
+        )
+    except Exception as e:
+        out["error"] = f"predicted SQL failed: {e}"
+        return out
+    out["match"] = same_result(predicted, reference)
+    out["rows"] = predicted.count
+    return out
+
+
+def aggregate(name: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    n = len(results) or 1
+    return {
+        "config": name,
+        "questions": len(results),
+        "execution_accuracy": round(sum(r["match"] for r in results) / n, 4),
+        "ok_rate": round(sum(r["ok"] for r in results) / n, 4),
+        "avg_executions": round(sum(r["executions"] for r in results) / n, 2),
+        "avg_llm_calls": round(sum(r["llm_calls"] for r in results) / n, 2),
+        "avg_prompt_tokens": round(sum(r["prompt_tokens"] for r in results) / n, 1),
+        "avg_output_tokens": round(sum(r["output_tokens"] for r in results) / n, 1),
+        "latency": summarize([r["latency_s"] for r in results]),
+    }
+
+
+async def run_config(
+    cfg: Dict[str, Any],
+    gold: List[Dict[str, Any]],
+    references: Dict[str, Optional[ResultSet]],
+    args: argparse.Namespace,
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    saved = {key: getattr(settings, key) for key in cfg["settings"]}
+    for key, value in cfg["settings"].items():
+        setattr(settings, key, value)
+    try:
+        if args.fake:
+            from benchmarks.fake_llm import FakeChatModel
+            llm = FakeChatModel(call_ms=args.llm_ms, prefill_tps=args.prefill_tps, decode_tps=args.decode_tps)
+        else:
+            from LLM.make_llm import make_llm
+            llm = make_llm(cfg["model"], cfg["temperature"] if cfg["temperature"] is not None else 0)
+
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def one(item: Dict[str, Any]) -> Dict[str, Any]:
+            async with sem:
+                return await eval_question(llm, item, references[item["id"]], args)
+
+        results = await asyncio.gather(*[one(item) for item in gold])
+    finally:
+        for key, value in saved.items():
+            setattr(settings, key, value)
+    return aggregate(cfg["name"], results), results
+
+
+def _print_summary(rows: List[Dict[str, Any]]) -> None:
+    print(f"{'config':<20} {'EX':>6} {'ok':>6} {'execs':>6} {'calls':>6} {'prompt tok':>11} "
+          f"{'out tok':>8} {'p50 ms':>9} {'p95 ms':>9}")
+    for r in rows:
+        print(f"{r['config']:<20} {r['execution_accuracy']:>6.1%} {r['ok_rate']:>6.1%} "
+              f"{r['avg_executions']:>6} {r['avg_llm_calls']:>6} {r['avg_prompt_tokens']:>11} "
+              f"{r['avg_output_tokens']:>8} {r['latency']['p50_ms']:>9} {r['latency']['p95_ms']:>9}")
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    settings.DATABASE_URL = args.pg_url
+    # every question must run on its own: no coalescing with a concurrent duplicate
+    settings.SINGLE_FLIGHT_ENABLED = False
+
+    if args.synthetic:
+        from benchmarks.pg_fixture import create_bench_database
+        from benchmarks.synth_schema import SynthConfig, generate_schema_full
+
+        schema_full = create_bench_database(
+            args.pg_url, generate_schema_full(SynthConfig(n_tables=max(args.synthetic, 10))), rows_per_table=50,
+        )
+        gold = synthetic_gold(schema_full, args.synthetic)
+    else:
+        gold = load_gold(args.gold)
+
+    references: Dict[str, Optional[ResultSet]] = {}
+    for item in gold:
+        try:
+            references[item["id"]] = fetch_result(
+                args.pg_url, item["sql"], timeout_ms=args.timeout_ms, exact_rows=args.exact_rows,
+            )
+        except Exception as e:
+            print(f"reference SQL failed for {item['id']}: {e}", file=sys.stderr)
+            references[item["id"]] = None
+
+    configs = [parse_config(c) for c in args.config] or [parse_config("current:")]
+    summary, details = [], {}
+    for cfg in configs:
+        agg, results = await run_config(cfg, gold, references, args)
+        summary.append(agg)
+        details[cfg["name"]] = results
+
+    _print_summary(summary)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "results": details}, f, indent=2, default=str)
+        print(f"\nreport saved to {args.out}")
+
+    if args.min_accuracy is not None and any(s["execution_accuracy"] < args.min_accuracy for s in summary):
+        return 1
+    return 0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pg-url", required=True)
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--gold", help="JSONL with question/sql pairs")
+    src.add_argument("--synthetic", type=int, metavar="N", help="create a bench_* catalog and N gold pairs")
+    ap.add_argument("--config", action="append", default=[], help="name:KEY=VALUE,... (repeatable)")
+    ap.add_argument("--fake", action="store_true", help="benchmarks.fake_llm instead of make_llm()")
+    ap.add_argument("--llm-ms", type=float, default=0.0)
+    ap.add_argument("--prefill-tps", type=float, default=1e9)
+    ap.add_argument("--decode-tps", type=float, default=1e9)
+    ap.add_argument("--concurrency", type=int, default=1)
+    ap.add_argument("--max-attempts", type=int, default=5)
+    ap.add_argument("--timeout-ms", type=int, default=30_000)
+    ap.add_argument("--exact-rows", type=int, default=10_000, help="above this only row hashes are compared")
+    ap.add_argument("--min-accuracy", type=float, default=None, help="exit 1 if any config is below")
+    ap.add_argument("--out", default=None, help="JSON report with per-question results")
+    sys.exit(asyncio.run(main_async(ap.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,18 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from observability.logger import setup_logger
 from  API.chat import chat_router
 from  API.history import history_router
+from  API.batch import batch_router
 from  API.ui import ui_router
 from API.config import config_router
 from observability.metrics import metrics_router
+from API.stats import stats_router
+from API.jobs import job_manager, jobs_router
+from LLM.admission import LLMOverloadedError
+from DB.profiles import profile_registry
+from store.query_stats import query_stats
 #from RAG.chroma_store import ChromaStore
 #from API.config import settings
 
@@ -16,10 +23,34 @@ setup_logger()  # один раз
 app = FastAPI(title="LLM Orchestrator (Ollama)")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+@app.exception_handler(LLMOverloadedError)
+async def llm_overloaded_handler(request: Request, exc: LLMOverloadedError):
+    # queue full -> 429, waited too long -> 503; clients should back off
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc), "reason": exc.reason},
+        headers={"Retry-After": str(exc.retry_after_s)},
+    )
+
+
+@app.on_event("shutdown")
+async def cancel_jobs():
+    await job_manager.shutdown()
+
+
+@app.on_event("shutdown")
+def close_db_profiles():
+    profile_registry.close_all()
+    query_stats.flush()
+
+
 app.include_router(chat_router, tags=["chat"])
+app.include_router(batch_router, tags=["chat"])
 app.include_router(history_router, tags=["history"])
 app.include_router(config_router, tags=["config"])
 app.include_router(metrics_router, tags=["metrics"])
+app.include_router(stats_router, tags=["stats"])
+app.include_router(jobs_router, tags=["jobs"])
 
 
 # @app.on_event("startup")
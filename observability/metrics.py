@@ -25,6 +25,13 @@ LLM_LATENCY = Histogram(
     registry=REGISTRY,
 )
 
+STAGE_LATENCY = Histogram(
+    "orchestrator_stage_latency_seconds",
+    "db pipeline stage latency (catalog, analyze, select_tables, sql_generate, sql_execute, ...)",
+    ["stage"],
+    registry=REGISTRY,
+)
+
 LLM_ERRORS_TOTAL = Counter(
     "orchestrator_llm_errors_total",
     "Total LLM errors",
@@ -32,6 +39,180 @@ LLM_ERRORS_TOTAL = Counter(
     registry=REGISTRY,
 )
 
+LLM_PROMPT_TOKENS_TOTAL = Counter(
+    "orchestrator_llm_prompt_tokens_total",
+    "Prompt tokens sent to the LLM (kind=total|cached, cached as reported by the provider)",
+    ["model", "mode", "kind"],
+    registry=REGISTRY,
+)
+
+LLM_JSON_PARSE_FAILURES_TOTAL = Counter(
+    "orchestrator_llm_json_parse_failures_total",
+    "LLM replies that were not valid JSON for the stage's response model (before repair)",
+    ["stage"],
+    registry=REGISTRY,
+)
+
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "orchestrator_llm_queue_wait_seconds",
+    "Time an LLM call waited for an admission slot",
+    ["backend", "priority"],
+    buckets=(0.005, 0.05, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+    registry=REGISTRY,
+)
+
+LLM_QUEUE_DEPTH = Gauge(
+    "orchestrator_llm_queue_depth",
+    "LLM calls waiting for an admission slot",
+    ["backend"],
+    registry=REGISTRY,
+)
+
+LLM_INFLIGHT_CALLS = Gauge(
+    "orchestrator_llm_inflight_calls",
+    "LLM calls holding an admission slot",
+    ["backend"],
+    registry=REGISTRY,
+)
+
+LLM_ADMISSION_REJECTED_TOTAL = Counter(
+    "orchestrator_llm_admission_rejected_total",
+    "LLM calls rejected by admission control (reason=queue_full|queue_timeout)",
+    ["backend", "reason"],
+    registry=REGISTRY,
+)
+
+SINGLE_FLIGHT_TOTAL = Counter(
+    "orchestrator_single_flight_total",
+    "Coalesced calls (role=leader ran the work, follower reused its result)",
+    ["name", "role"],
+    registry=REGISTRY,
+)
+
+DB_PROFILES_OPEN = Gauge(
+    "orchestrator_db_profiles_open",
+    "DB profiles holding an open connection pool",
+    registry=REGISTRY,
+)
+
+DB_PROFILE_EVICTIONS_TOTAL = Counter(
+    "orchestrator_db_profile_evictions_total",
+    "DB profiles closed (reason=idle|capacity)",
+    ["profile", "reason"],
+    registry=REGISTRY,
+)
+
+SQL_STATEMENT_TIMEOUT_MS = Histogram(
+    "orchestrator_sql_statement_timeout_ms",
+    "statement_timeout chosen for generated SQL (source=history|explain|default|static)",
+    ["source", "escalated"],
+    buckets=(100, 250, 500, 1000, 2000, 5000, 10000, 20000, 30000, 60000),
+    registry=REGISTRY,
+)
+
+SQL_TIMEOUTS_TOTAL = Counter(
+    "orchestrator_sql_timeouts_total",
+    "Generated SQL cancelled by statement_timeout, by how the timeout was chosen",
+    ["source"],
+    registry=REGISTRY,
+)
+
+SQL_DB_BUDGET_EXHAUSTED_TOTAL = Counter(
+    "orchestrator_sql_db_budget_exhausted_total",
+    "Requests that stopped retrying because the per-request DB time budget ran out",
+    registry=REGISTRY,
+)
+
+SQL_EXEC_MODE_TOTAL = Counter(
+    "orchestrator_sql_exec_mode_total",
+    "Generated SQL executions (mode=prepared|inline|fallback; fallback = lifted form rejected)",
+    ["mode"],
+    registry=REGISTRY,
+)
+
+JOBS_TOTAL = Counter(
+    "orchestrator_jobs_total",
+    "Finished /jobs jobs (status=succeeded|failed|cancelled)",
+    ["status"],
+    registry=REGISTRY,
+)
+
+JOBS_ACTIVE = Gauge(
+    "orchestrator_jobs_active",
+    "Jobs waiting for a worker (state=queued) or being executed (state=running)",
+    ["state"],
+    registry=REGISTRY,
+)
+
+RESULT_PROFILE_TOTAL = Counter(
+    "orchestrator_result_profile_total",
+    "Result profile queries (outcome=ok|timeout|error)",
+    ["outcome"],
+    registry=REGISTRY,
+)
+
+RESULT_CACHE_REQUESTS_TOTAL = Counter(
+    "orchestrator_result_cache_requests_total",
+    "Result cache lookups (kind=rows|columnar|aggregate, result=hit|miss|expired|invalidated|uncacheable)",
+    ["kind", "result"],
+    registry=REGISTRY,
+)
+
+RESULT_CACHE_BYTES = Gauge(
+    "orchestrator_result_cache_bytes",
+    "Serialized size of cached query results",
+    registry=REGISTRY,
+)
+
+RESULT_CACHE_EVICTIONS_TOTAL = Counter(
+    "orchestrator_result_cache_evictions_total",
+    "Cached results dropped to stay within RESULT_CACHE_MAX_BYTES",
+    registry=REGISTRY,
+)
+
+DB_QUERY_LATENCY = Histogram(
+    "orchestrator_db_query_latency_seconds",
+    "Read query latency per target (target=primary or replica host:port/db)",
+    ["profile", "target"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    registry=REGISTRY,
+)
+
+DB_QUERY_ERRORS_TOTAL = Counter(
+    "orchestrator_db_query_errors_total",
+    "Read query errors per target (kind=connect|query)",
+    ["profile", "target", "kind"],
+    registry=REGISTRY,
+)
+
+DB_READ_ROUTED_TOTAL = Counter(
+    "orchestrator_db_read_routed_total",
+    "Read connections routed (reason=replica|no_replicas|failover)",
+    ["profile", "target", "reason"],
+    registry=REGISTRY,
+)
+
+DB_REPLICA_HEALTHY = Gauge(
+    "orchestrator_db_replica_healthy",
+    "1 if the replica passed its last health check (reachable, lag within limit)",
+    ["profile", "target"],
+    registry=REGISTRY,
+)
+
+DB_REPLICA_LAG_SECONDS = Gauge(
+    "orchestrator_db_replica_lag_seconds",
+    "Replication lag seen by the last health check",
+    ["profile", "target"],
+    registry=REGISTRY,
+)
+
+ROUTER_DECISIONS_TOTAL = Counter(
+    "orchestrator_router_decisions_total",
+    "Fast-path router decisions (route=db|agent)",
+    ["route", "cached"],
+    registry=REGISTRY,
+)
+
 INFLIGHT = Gauge(
     "orchestrator_inflight_requests",
     "Number of in-flight requests",
@@ -0,0 +1,60 @@
+"""
+Per-stage timing of the db pipeline.
+
+    with stage_timer("sql_execute"):
+        rows = run_sql(sql)
+
+Every stage is observed in orchestrator_stage_latency_seconds{stage}. Inside
+collect_stage_timings() the durations are also collected per request (contextvar),
+which is what the benchmark harness reports (benchmarks/e2e.py).
+"""
+
+from __future__ import annotations
+
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from observability.metrics import STAGE_LATENCY
+
+
+class StageTimings:
+    def __init__(self) -> None:
+        self.stages: Dict[str, List[float]] = defaultdict(list)
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage].append(seconds)
+
+    def totals(self) -> Dict[str, float]:
+        """
+        Seconds per stage for this request (a stage may run several times, e.g. sql_fix).
+        """
+        return {stage: sum(values) for stage, values in self.stages.items()}
+
+
+_current: ContextVar[Optional[StageTimings]] = ContextVar("stage_timings", default=None)
+
+
+@contextmanager
+def collect_stage_timings() -> Iterator[StageTimings]:
+    timings = StageTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.labels(stage=stage).observe(elapsed)
+        timings = _current.get()
+        if timings is not None:
+            timings.add(stage, elapsed)
@@ -0,0 +1,48 @@
+ANALYZE_SELECT_PROMPT = """
+You are an expert SQL architect.
+
+In ONE step you:
+1) extract structured intent from a natural language data request
+2) select which of the candidate database tables are needed to answer it
+
+The candidate tables (one line per table, plus foreign keys) are given
+in the user message, followed by the user request.
+
+Return STRICT JSON only:
+
+{{
+  "intent": "schedule | list | aggregation | stats | detail | comparison | unknown",
+  "entities": [
+    {{
+      "type": "airline | airport | flight | date | code | generic",
+      "value": "...",
+      "aliases": ["...", "..."],
+      "confidence": 0.0-1.0
+    }}
+  ],
+  "time_range": {{
+    "type": "none | relative | absolute",
+    "from": null,
+    "to": null,
+    "raw": "original text"
+  }},
+  "metrics": {{
+    "type": "none | count | sum | avg | min | max | top_n",
+    "value": null,
+    "dimension": null
+  }},
+  "keywords": ["important domain keywords"],
+  "search_queries": ["short schema-oriented query"],
+  "tables": ["schema.table"],
+  "also_consider": ["schema.table"],
+  "reason": "short explanation of the table choice",
+  "confidence": 0.0
+}}
+
+Rules:
+- "tables": up to {max_tables} tables, ONLY names from the candidate list, exactly as written
+- Prefer core fact tables and required join tables
+- If unsure, include fewer tables
+- If a code like 'SU', 'U6', 'S7' appears, extract it as an entity.
+- No markdown. No comments. JSON only.
+"""
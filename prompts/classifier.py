@@ -22,5 +22,7 @@ Return STRICT JSON only:
 
 Rules:
 - If you are unsure, set is_db_request=false.
+- If the message only makes sense with earlier conversation
+  ("and for yesterday?", "same for S7", "show it again"), set is_db_request=false.
 - Do NOT add any text outside JSON.
 """
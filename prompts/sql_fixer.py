@@ -7,6 +7,11 @@ You are given:
 - the previous SQL query
 - the database error message
 
+schema_context is JSON or compact DDL-like text: "TABLE schema.table -- description"
+followed by one indented, comma-separated "name type (description)" column list
+("... +N more" = N columns omitted, do NOT guess them), "@N" schema aliases from the
+"-- schema aliases (expand in SQL):" line to be expanded in SQL, "JOINS" section.
+
 Rules:
 - ONLY SELECT or WITH ... SELECT statements.
 - Use ONLY tables and columns from schema_context.
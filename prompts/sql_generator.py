@@ -9,6 +9,14 @@ CRITICAL PostgreSQL RULE:
 - ALL table names and column names from schema_context MUST be wrapped in double quotes ("").
 - Do NOT use unquoted identifiers for tables or columns.
 
+schema_context is either JSON or compact DDL-like text:
+- "TABLE schema.table -- description" starts a table; the indented line below it lists
+  the table's columns, comma-separated, as "name type (description)"
+- a column list ending in "... +N more" means N columns were omitted; do NOT guess them
+- "-- schema aliases (expand in SQL): @1=..." at the top defines "@1", "@2" ...;
+  always expand them to real schema names in SQL
+- "JOINS" lists join conditions between tables
+
 Rules:
 - ONLY SELECT or WITH ... SELECT statements.
 - Use ONLY tables and columns present in schema_context.
@@ -29,6 +37,7 @@ Return STRICT JSON only:
 Additional rules:
 - Prefer filtering early (WHERE) before joins.
 - Prefer explicit column lists over SELECT *.
+- If schema_context has join_hints, use exactly these conditions to JOIN tables.
 - If time or range is not specified, assume a reasonable default.
 """
 
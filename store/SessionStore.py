@@ -70,6 +70,13 @@ class SessionStore:
         self._touch_order(key)
         return session_id
 
+    def drop_session(self, session_id: str) -> None:
+        # все истории сессии (chat, sql, ...): одноразовые сессии батча (API/batch.py)
+        keys = [k for k in self._db if k[0] == session_id]
+        for key in keys:
+            del self._db[key]
+        self._order = [k for k in self._order if k[0] != session_id]
+
 
 session_store = SessionStore()
 
@@ -89,3 +96,4 @@ class ChatRequest(BaseModel):
     messages: list[ChatMessage]
     model: Optional[str] = None
     temperature: Optional[float] = None
+    answer_mode: Optional[Literal["template", "llm"]] = None  # None => settings.DEFAULT_ANSWER_MODE
@@ -0,0 +1,247 @@
+"""
+Runtime statistics of executed SQL, per (DB profile, fingerprint).
+
+run_sql records every execution: runtime, rows returned, outcome (ok|timeout|error).
+Kept in memory (bounded); with QUERY_STATS_PATH set, loaded from and flushed
+to SQLite every QUERY_STATS_FLUSH_S (on the next record) and at shutdown.
+Percentiles are computed over the last QUERY_STATS_WINDOW runtimes in this
+process (the stored p95 is used until new runs arrive).
+
+    GET /stats/queries?limit=20&order_by=p95_ms   (API/stats.py)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import closing
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from DB.sql_fingerprint import normalize_sql, sql_fingerprint
+
+logger = logging.getLogger("orchestrator")
+
+StatsKey = Tuple[str, str]  # (profile, fingerprint)
+
+ORDER_FIELDS = ("p95_ms", "mean_ms", "max_ms", "total_ms", "count", "error_rate", "timeout_rate")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_stats (
+    profile TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    sql TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    timeouts INTEGER NOT NULL,
+    total_ms REAL NOT NULL,
+    max_ms REAL NOT NULL,
+    rows_total INTEGER NOT NULL,
+    p95_ms REAL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (profile, fingerprint)
+)
+"""
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.4999)) - 1))
+    return ordered[k]
+
+
+class QueryStat:
+    def __init__(self, profile: str, fingerprint: str, sql: str, window: int):
+        self.profile = profile
+        self.fingerprint = fingerprint
+        self.sql = sql  # normalized text, literals stripped
+        self.count = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows_total = 0
+        self.stored_p95_ms: Optional[float] = None
+        self.last_seen = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    @property
+    def p95_ms(self) -> Optional[float]:
+        return percentile(list(self.recent), 95) if self.recent else self.stored_p95_ms
+
+    def as_dict(self) -> Dict[str, Any]:
+        n = self.count or 1
+        p95 = self.p95_ms
+        return {
+            "profile": self.profile,
+            "fingerprint": self.fingerprint,
+            "sql": self.sql,
+            "count": self.count,
+            "mean_ms": round(self.total_ms / n, 2),
+            "p50_ms": round(percentile(list(self.recent), 50), 2) if self.recent else None,
+            "p95_ms": round(p95, 2) if p95 is not None else None,
+            "max_ms": round(self.max_ms, 2),
+            "total_ms": round(self.total_ms, 1),
+            "avg_rows": round(self.rows_total / n, 1),
+            "error_rate": round(self.errors / n, 4),
+            "timeout_rate": round(self.timeouts / n, 4),
+            "last_seen": self.last_seen,
+        }
+
+
+class QueryStatsStore:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        *,
+        flush_interval_s: float = 30.0,
+        window: int = 256,
+        max_keys: int = 10000,
+    ):
+        self.path = path
+        self.flush_interval_s = flush_interval_s
+        self.window = window
+        self.max_keys = max_keys
+        self._stats: "OrderedDict[StatsKey, QueryStat]" = OrderedDict()
+        self._dirty: set = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        if path and os.path.exists(path):
+            self._load()
+
+    # ---------- recording ----------
+
+    def record(
+        self,
+        profile: str,
+        sql: str,
+        seconds: float,
+        *,
+        rows: int = 0,
+        outcome: str = "ok",
+    ) -> None:
+        """
+        outcome: ok | timeout | error
+        """
+        normalized = normalize_sql(sql)
+        key = (profile, sql_fingerprint(sql))
+        ms = seconds * 1000
+        with self._lock:
+            st = self._stats.get(key)
+            if st is None:
+                st = self._stats[key] = QueryStat(profile, key[1], normalized, self.window)
+                while len(self._stats) > self.max_keys:
+                    self._stats.popitem(last=False)
+            self._stats.move_to_end(key)
+            st.count += 1
+            st.total_ms += ms
+            st.max_ms = max(st.max_ms, ms)
+            st.rows_total += rows
+            st.errors += outcome == "error"
+            st.timeouts += outcome == "timeout"
+            st.last_seen = time.time()
+            st.recent.append(ms)
+            self._dirty.add(key)
+
+        if self.path and time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self.flush()
+
+    # ---------- reading ----------
+
+    def top(self, limit: int = 20, order_by: str = "p95_ms", profile: Optional[str] = None) -> List[Dict[str, Any]]:
+        if order_by not in ORDER_FIELDS:
+            raise ValueError(f"order_by must be one of {', '.join(ORDER_FIELDS)}")
+        with self._lock:
+            rows = [st.as_dict() for st in self._stats.values() if profile is None or st.profile == profile]
+        rows.sort(key=lambda r: r[order_by] if r[order_by] is not None else -1, reverse=True)
+        return rows[:limit]
+
+    def get(self, profile: str, sql: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            st = self._stats.get((profile, sql_fingerprint(sql)))
+            return st.as_dict() if st else None
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+    # ---------- persistence ----------
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path or "")
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute(_SCHEMA)
+        return conn
+
+    def _load(self) -> None:
+        try:
+            # closing(): `with conn` only commits / rolls back, it does not close
+            with closing(self._connect()) as conn, conn:
+                rows = conn.execute(
+                    "SELECT profile, fingerprint, sql, count, errors, timeouts, total_ms, max_ms,"
+                    " rows_total, p95_ms, last_seen FROM query_stats ORDER BY last_seen"
+                ).fetchall()
+        except sqlite3.Error:
+            logger.exception("query_stats: load failed (%s)", self.path)
+            return
+        with self._lock:
+            for (profile, fp, sql, count, errors, timeouts, total_ms, max_ms, rows_total, p95, last_seen) in rows:
+                st = QueryStat(profile, fp, sql, self.window)
+                st.count, st.errors, st.timeouts = count, errors, timeouts
+                st.total_ms, st.max_ms, st.rows_total = total_ms, max_ms, rows_total
+                st.stored_p95_ms, st.last_seen = p95, last_seen
+                self._stats[(profile, fp)] = st
+            while len(self._stats) > self.max_keys:
+                self._stats.popitem(last=False)
+
+    def flush(self) -> int:
+        """
+        Writes changed fingerprints to SQLite; returns how many.
+        """
+        if not self.path:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                self._last_flush = time.monotonic()
+                keys, self._dirty = self._dirty, set()
+                rows = [
+                    (st.profile, st.fingerprint, st.sql, st.count, st.errors, st.timeouts, st.total_ms,
+                     st.max_ms, st.rows_total, st.p95_ms, st.last_seen)
+                    for st in (self._stats.get(k) for k in keys) if st is not None
+                ]
+            if not rows:
+                return 0
+            try:
+                with closing(self._connect()) as conn, conn:
+                    conn.executemany("INSERT OR REPLACE INTO query_stats VALUES (?,?,?,?,?,?,?,?,?,?,?)", rows)
+            except sqlite3.Error:
+                logger.exception("query_stats: flush failed (%s)", self.path)
+                with self._lock:
+                    self._dirty |= keys
+                return 0
+            return len(rows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._dirty.clear()
+
+
+def _make_store() -> QueryStatsStore:
+    from API.config import settings
+
+    return QueryStatsStore(
+        settings.QUERY_STATS_PATH or None,
+        flush_interval_s=settings.QUERY_STATS_FLUSH_S,
+        window=settings.QUERY_STATS_WINDOW,
+    )
+
+
+query_stats = _make_store()
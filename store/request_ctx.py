@@ -1,3 +1,6 @@
 from contextvars import ContextVar
 
 current_session_id: ContextVar[str | None] = ContextVar("current_session_id", default=None)
+
+# DB profile of the current request (DB/profiles.py); None = "default"
+current_db_profile: ContextVar[str | None] = ContextVar("current_db_profile", default=None)
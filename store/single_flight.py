@@ -0,0 +1,103 @@
+"""
+Single-flight (request coalescing): concurrent calls with the same key share
+one execution. The first caller starts the function, every caller waits for
+its result (or its exception). Nothing is cached after the call finishes.
+
+- SingleFlight      — asyncio, for coroutines (db pipeline)
+- SyncSingleFlight  — threads, for blocking code (catalog load, embeddings)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from observability.metrics import SINGLE_FLIGHT_TOTAL
+
+T = TypeVar("T")
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, _Flight] = {}
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Returns (result, shared); shared=True if the result came from another caller's run.
+
+        fn() runs in its own task that every caller awaits through a shield:
+        a cancelled caller (leader included) does not cancel the run for the
+        others. The run is cancelled only when no caller is left waiting.
+        """
+        flight = self._inflight.get(key)
+        shared = flight is not None
+        if flight is None:
+            SINGLE_FLIGHT_TOTAL.labels(name=self.name, role="leader").inc()
+            flight = self._inflight[key] = _Flight(asyncio.ensure_future(fn()))
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            SINGLE_FLIGHT_TOTAL.labels(name=self.name, role="follower").inc()
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), shared
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self._forget(key, flight)  # a new caller starts a fresh run
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SyncSingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> Tuple[T, bool]:
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+
+        if not leader:
+            SINGLE_FLIGHT_TOTAL.labels(name=self.name, role="follower").inc()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        SINGLE_FLIGHT_TOTAL.labels(name=self.name, role="leader").inc()
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
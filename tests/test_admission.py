@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from LLM.admission import AdmissionController, LLMOverloadedError
+
+
+def test_priority_order_and_queue_limit():
+    async def scenario():
+        ctl = AdmissionController("test", max_concurrent=1, max_queue=2, queue_timeout_s=5)
+        order = []
+
+        await ctl.acquire()  # holds the only slot
+
+        async def worker(name, priority):
+            await ctl.acquire(priority)
+            order.append(name)
+            ctl.release(0.01)
+
+        bg = asyncio.create_task(worker("background", "background"))
+        await asyncio.sleep(0)
+        chat = asyncio.create_task(worker("interactive", "interactive"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(LLMOverloadedError) as exc:
+            await ctl.acquire()
+        assert exc.value.status_code == 429
+        assert exc.value.retry_after_s >= 1
+
+        ctl.release(0.01)
+        await asyncio.gather(bg, chat)
+        assert order == ["interactive", "background"]
+        assert ctl.active == 0 and ctl.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_rejects_with_503():
+    async def scenario():
+        ctl = AdmissionController("test", max_concurrent=1, max_queue=4, queue_timeout_s=0.05)
+        await ctl.acquire()
+        with pytest.raises(LLMOverloadedError) as exc:
+            await ctl.acquire()
+        assert exc.value.status_code == 503
+
+        ctl.release()
+        assert ctl.active == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,59 @@
+import asyncio
+import json
+
+from langchain_core.messages import AIMessage
+
+from benchmarks.schema_prompt_tokens import synthetic_schema
+from LLM.analyze_and_select import analyze_and_select, candidate_tables, parse_analyze_select
+
+
+class _FakeLLM:
+    def __init__(self, reply: str):
+        self.reply = reply
+        self.calls = []
+
+    async def ainvoke(self, messages):
+        self.calls.append(messages)
+        return AIMessage(content=self.reply)
+
+
+def test_parse_analyze_select_validates():
+    ok = parse_analyze_select('noise {"intent": "list", "entities": [{"value": "SU"}], "tables": ["a.b"]} noise')
+    assert ok is not None
+    assert ok.analysis()["entities"][0]["type"] == "generic"
+    assert ok.selection()["tables"] == ["a.b"]
+
+    assert parse_analyze_select('{"tables": "not a list"}') is None
+    assert parse_analyze_select("no json here") is None
+
+
+def test_candidate_tables_prefilters_large_catalogs():
+    schema_full = synthetic_schema(n_tables=60)
+    assert candidate_tables(schema_full, "flight delay", max_candidates=100) == []
+
+    picked = candidate_tables(schema_full, "flight delay", max_candidates=10)
+    assert 0 < len(picked) <= 10
+    assert all(fq in schema_full["tables"] for fq in picked)
+
+
+def test_analyze_and_select_single_call():
+    schema_full = synthetic_schema(n_tables=20)
+    target = next(iter(schema_full["tables"]))
+    llm = _FakeLLM(json.dumps({"intent": "list", "search_queries": ["x"], "tables": [target, "nope.nope"]}))
+
+    analysis, selected = asyncio.run(analyze_and_select(llm, "list things", schema_full))
+
+    assert len(llm.calls) == 1
+    assert analysis["intent"] == "list"
+    assert target in selected["tables"]
+    assert selected["retrieval_debug"]["mode"] == "llm_analyze_select"
+    assert selected["retrieval_debug"]["fallback"] is None
+
+
+def test_analyze_and_select_invalid_reply_falls_back_to_lexical():
+    schema_full = synthetic_schema(n_tables=20)
+    llm = _FakeLLM("sorry, I can't")
+
+    _, selected = asyncio.run(analyze_and_select(llm, "flight delay", schema_full))
+    assert selected["retrieval_debug"]["fallback"] in ("lexical", "first_n")
+    assert selected["tables"]
@@ -0,0 +1,24 @@
+from LLM.answer_renderer import parse_db_payload, render_db_answer, render_markdown_table
+
+
+def test_render_markdown_table_escapes_and_truncates():
+    table = render_markdown_table([{"a": 1, "b": "x|y"}, {"a": None, "b": "z" * 100}])
+    lines = table.splitlines()
+    assert lines[0] == "| a | b |"
+    assert "x\\|y" in lines[2]
+    assert lines[3].endswith("… |")
+
+
+def test_render_db_answer_ok_and_error():
+    ok = render_db_answer({"ok": True, "sql": "SELECT 1", "rows_preview": [{"n": 1}], "attempts": []})
+    assert ok.startswith("Found 1 row.")
+    assert "```sql\nSELECT 1\n```" in ok
+
+    err = render_db_answer({"ok": False, "error": "timeout", "attempts": [{"sql": "SELECT 2"}]})
+    assert "timeout" in err and "SELECT 2" in err
+
+
+def test_parse_db_payload():
+    assert parse_db_payload('{"mode": "db_query_chain", "ok": true}') == {"mode": "db_query_chain", "ok": True}
+    assert parse_db_payload('{"mode": "conversation"}') is None
+    assert parse_db_payload("plain text") is None
@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import API.batch as batch
+
+
+def test_parse_batch_lines():
+    text = "\n".join([
+        json.dumps({"id": "a", "question": "flights today"}),
+        "",
+        "not json",
+        json.dumps({"request_id": "r-1", "title": "Delays", "body": "per carrier"}),
+        json.dumps({"id": "empty"}),
+    ])
+    items = batch.parse_batch_lines(text)
+    assert [i["index"] for i in items] == [0, 1, 2, 3]
+    assert items[0] == {"index": 0, "id": "a", "question": "flights today"}
+    assert items[1]["id"] == "3" and "error" in items[1]
+    assert items[2]["question"] == "Delays\nper carrier"
+    assert items[3]["error"] == "no question in line"
+
+
+def test_run_batch_keeps_input_order(monkeypatch):
+    class FakeProfile:
+        async def aschema_context(self):
+            return {"tables": {"s.t": {}}}
+
+    async def fake_pipeline(llm, question, *, schema_full=None, max_attempts=5):
+        # later questions finish first
+        await asyncio.sleep(0.05 if question == "slow" else 0.0)
+        return {"ok": question != "bad", "sql": f"select '{question}'", "rows_preview": [{}], "attempts": []}
+
+    monkeypatch.setattr(batch, "get_db_profile", lambda *a: FakeProfile())
+    monkeypatch.setattr(batch, "run_db_pipeline", fake_pipeline)
+    monkeypatch.setattr(batch, "make_llm", lambda *a: object())
+
+    items = batch.parse_batch_lines("\n".join(json.dumps({"question": q}) for q in ["slow", "bad", "fast"]))
+
+    async def collect():
+        return [r async for r in batch.run_batch(items, concurrency=3)]
+
+    results = asyncio.run(collect())
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert [r["ok"] for r in results] == [True, False, True]
+    assert results[0]["latency_ms"] >= results[2]["latency_ms"]
+    assert results[2]["row_count"] == 1
+
+
+def test_chat_mode_drops_throwaway_session_state(monkeypatch):
+    import sys
+    import types
+
+    import tools.llm_tools as llm_tools
+    from store.SessionStore import session_store
+    from store.request_ctx import current_session_id
+
+    sessions = []
+
+    async def fake_chat_turn(question, history, answer_mode):
+        # what db_query_chain keeps for show_last_sql / summarize_last_result
+        session_id = current_session_id.get()
+        sessions.append(session_id)
+        llm_tools._session_set(session_id, "last_result", {"rows_preview": [{"n": 1}] * 100})
+        session_store.append_messages(session_id, "sql", ["SELECT 1"])
+        return "done"
+
+    monkeypatch.setitem(sys.modules, "API.chat", types.SimpleNamespace(answer_chat_turn=fake_chat_turn))
+    items = batch.parse_batch_lines("\n".join(json.dumps({"question": q}) for q in ["a", "b", "c"]))
+
+    async def collect():
+        return [r async for r in batch.run_batch(items, concurrency=2, mode="chat", answer_mode="template")]
+
+    results = asyncio.run(collect())
+    assert [r["answer"] for r in results] == ["done"] * 3 and len(set(sessions)) == 3
+    assert not set(sessions) & set(llm_tools._INMEM_STATE)
+    assert not [k for k in session_store._db if k[0] in sessions]
@@ -0,0 +1,49 @@
+import json
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from benchmarks.e2e import compare_to_baseline, percentile
+from benchmarks.fake_llm import FakeChatModel
+from observability.timing import collect_stage_timings, stage_timer
+from prompts.sql_generator import SQL_GENERATOR_PROMPT
+
+
+def test_percentile_nearest_rank():
+    values = [0.1 * i for i in range(1, 101)]
+    assert percentile(values, 50) == values[49]
+    assert percentile(values, 99) == values[98]
+    assert percentile([], 95) == 0.0
+
+
+def test_stage_timings_are_collected_per_request():
+    with collect_stage_timings() as timings:
+        with stage_timer("sql_fix"):
+            pass
+        with stage_timer("sql_fix"):
+            pass
+    assert len(timings.stages["sql_fix"]) == 2
+    # outside a collector only the histogram is updated
+    with stage_timer("sql_fix"):
+        pass
+    assert len(timings.stages["sql_fix"]) == 2
+
+
+def test_fake_llm_generates_sql_for_first_table():
+    llm = FakeChatModel(call_ms=0)
+    res = llm.invoke([
+        SystemMessage(content=SQL_GENERATOR_PROMPT),
+        HumanMessage(content="schema_context:\n-- schema aliases (expand in SQL): @1=bench_ops\n"
+                             "TABLE @1.Flights\n  id int8\n\nUser request:\nlist flights"),
+    ])
+    assert json.loads(res.content)["sql_preview"] == 'SELECT * FROM "bench_ops"."Flights" LIMIT 10'
+    assert res.usage_metadata["input_tokens"] > 0
+
+
+def test_compare_to_baseline_flags_regressions():
+    def report(p95, rps):
+        stat = {"p50_ms": p95 / 2, "p95_ms": p95, "p99_ms": p95, "n": 10}
+        return {"levels": [{"concurrency": 4, "throughput_rps": rps, "total": stat, "stages": {"sql_generate": stat}}]}
+
+    assert compare_to_baseline(report(100, 10), report(100, 10), 0.2) == []
+    problems = compare_to_baseline(report(150, 7), report(100, 10), 0.2)
+    assert len(problems) == 3
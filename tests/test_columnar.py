@@ -0,0 +1,36 @@
+import io
+import json
+from decimal import Decimal
+
+from DB.columnar import ColumnarResult, payload_row_count, payload_table
+from DB.row_encoding import dumps
+from LLM.answer_renderer import parse_db_payload, render_db_answer
+
+
+def test_columnar_payload_round_trips_through_json_and_renders():
+    result = ColumnarResult(["carrier", "avg_delay"], ["text", "numeric"], [("SU", Decimal("12.50")), ("S7", None)])
+    text = dumps({"mode": "db_query_chain", "ok": True, "sql": "SELECT 1", "result": result, "attempts": []})
+    assert json.loads(text)["result"] == {
+        "columns": ["carrier", "avg_delay"], "types": ["text", "numeric"], "rows": [["SU", 12.50], ["S7", None]],
+    }
+
+    payload = parse_db_payload(text)
+    assert payload_table(payload) == (["carrier", "avg_delay"], [("SU", 12.5), ("S7", None)])
+    assert payload_row_count(payload) == 2
+    answer = render_db_answer(payload)
+    assert answer.startswith("Found 2 rows.")
+    assert "| carrier | avg_delay |" in answer and "| SU | 12.5 |" in answer
+
+
+def test_dict_rows_and_columnar_are_interchangeable():
+    rows = [{"a": 1, "b": "x"}, {"a": 2, "b": None}]
+    result = ColumnarResult.from_dicts(rows)
+    assert result.to_dicts() == rows
+    assert result.column("a") == [1, 2]
+    assert len(result.head(1)) == 1
+    assert payload_table({"rows_preview": rows}) == (["a", "b"], [[1, "x"], [2, None]])
+    assert payload_row_count({"rows_preview": rows}) == payload_row_count({"result": result}) == 2
+
+    out = io.StringIO()
+    assert result.write_csv(out) == 2
+    assert out.getvalue().splitlines() == ["a,b", "1,x", "2,"]
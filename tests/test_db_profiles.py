@@ -0,0 +1,109 @@
+from contextlib import contextmanager
+
+import pytest
+
+import DB.profiles as profiles
+from API.config import settings
+from store.request_ctx import current_db_profile
+
+
+class FakePool:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setattr(settings, "DB_PROFILES", {"dev": "postgresql://dev", "prod": "postgresql://prod"})
+    monkeypatch.setattr(profiles, "profile_registry", profiles.ProfileRegistry())
+    return profiles.profile_registry
+
+
+def test_profiles_are_routed_by_request_context(registry):
+    assert registry.names() == ["default", "dev", "prod"]
+    assert profiles.get_db_profile().dsn == settings.DATABASE_URL
+
+    token = current_db_profile.set("prod")
+    try:
+        assert profiles.get_db_profile().dsn == "postgresql://prod"
+    finally:
+        current_db_profile.reset(token)
+
+    with pytest.raises(profiles.UnknownDBProfileError):
+        profiles.get_db_profile("staging")
+
+
+def test_catalog_is_cached_per_profile(registry, monkeypatch):
+    loads = []
+
+    @contextmanager
+    def fake_connection(self):
+        yield self.dsn
+
+    def fake_load(conn, statement_timeout_seconds):
+        loads.append(conn)
+        return {"tables": {f"{conn}.t": {}}, "foreign_keys": []}
+
+    monkeypatch.setattr(profiles.DBProfile, "connection", fake_connection)
+    monkeypatch.setattr(profiles, "schema_context_from_conn", fake_load)
+    monkeypatch.setattr(settings, "DB_CATALOG_TTL_S", 60.0)
+
+    dev, prod = registry.get("dev"), registry.get("prod")
+    assert dev.schema_context() is dev.schema_context()
+    assert list(prod.schema_context()["tables"]) == ["postgresql://prod.t"]
+    assert loads == ["postgresql://dev", "postgresql://prod"]
+    assert dev.vector_namespace != prod.vector_namespace
+
+
+def test_idle_and_excess_profiles_are_closed(registry, monkeypatch):
+    monkeypatch.setattr(settings, "DB_PROFILE_IDLE_TTL_S", 100.0)
+    monkeypatch.setattr(settings, "DB_MAX_OPEN_PROFILES", 1)
+    dev, prod, default = registry.get("dev"), registry.get("prod"), registry.get()
+    for p, used in ((dev, 10.0), (prod, 50.0), (default, 60.0)):
+        p._pool, p.last_used = FakePool(), used
+
+    # now=120: dev idle for 110 s; prod is over the open-pool cap
+    assert registry.evict(keep="default", now=120.0) == ["dev", "prod"]
+    assert not dev.is_open and not prod.is_open and default.is_open
+
+
+def test_default_profile_follows_database_url(registry, monkeypatch):
+    old = registry.get()
+    old._pool = pool = FakePool()
+    monkeypatch.setattr(settings, "DATABASE_URL", "postgresql://other")
+    assert registry.get().dsn == "postgresql://other"
+    assert pool.closed
+
+
+def test_rag_retrieval_uses_the_profile_vector_store(registry, monkeypatch):
+    from RAG.schema_context import RetrievalConfig, build_schema_context
+
+    used = []
+
+    class FakeChroma:
+        def __init__(self, namespace):
+            self.namespace = namespace
+
+        def query(self, queries, n_results, where):
+            used.append(self.namespace)
+            return {
+                "documents": [[f"TABLE public.{self.namespace}"]],
+                "metadatas": [[{"schema_name": "public", "table_name": self.namespace}]],
+                "distances": [[0.1]],
+            }
+
+        def get_by_metadata(self, where, limit=2000):
+            return {"documents": [], "metadatas": []}
+
+    monkeypatch.setattr(profiles.DBProfile, "vector_store", lambda self: FakeChroma(self.vector_namespace))
+    token = current_db_profile.set("prod")
+    try:
+        ctx = build_schema_context(None, {"search_queries": ["flights"]}, RetrievalConfig(hybrid=False))
+    finally:
+        current_db_profile.reset(token)
+    prod_ns = registry.get("prod").vector_namespace
+    assert used == [prod_ns]
+    assert [t["name"] for t in ctx["tables"]] == [f"public.{prod_ns}"]
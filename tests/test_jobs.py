@@ -0,0 +1,115 @@
+import asyncio
+import os
+import time
+from decimal import Decimal
+
+import pytest
+
+import API.jobs as jobs
+from DB.spool import SpoolWriter, iter_csv, read_spool
+from LLM.admission import current_llm_priority
+
+
+def test_spool_pages_across_batches(tmp_path):
+    path = str(tmp_path / "j" / "result.ndjson")
+    with SpoolWriter(path) as spool:
+        spool.write_header(["id", "amt"], ["int4", "numeric"])
+        for start in range(0, 10, 4):
+            spool.write_batch([(i, Decimal(f"{i}.10")) for i in range(start, min(start + 4, 10))])
+    assert spool.rows == 10 and spool.bytes == os.path.getsize(path)
+
+    page = read_spool(path, offset=3, limit=5)
+    assert page.columns == ["id", "amt"] and page.types == ["int4", "numeric"]
+    assert [r[0] for r in page.rows] == [3, 4, 5, 6, 7]
+    assert page.rows[0][1] == Decimal("3.10")  # exact digits survive the spool
+    assert len(read_spool(path, offset=8, limit=100).rows) == 2
+    assert "".join(iter_csv(path)).splitlines()[:2] == ["id,amt", "0,0.10"]
+
+
+class FakeProfile:
+    name = "default"
+
+
+@pytest.fixture
+def manager(monkeypatch, tmp_path):
+    executed = []
+
+    def fake_execute(self, job):
+        executed.append(job.sql)
+        time.sleep(0.05)
+        job.rows = 3
+
+    monkeypatch.setattr(jobs, "get_db_profile", lambda *a: FakeProfile())
+    monkeypatch.setattr(jobs.JobManager, "_execute", fake_execute)
+    m = jobs.JobManager(workers=1, max_queued=2, spool_dir=str(tmp_path / "spool"))
+    m.executed = executed
+    return m
+
+
+async def _wait(job):
+    while job.status not in jobs.FINISHED:
+        await asyncio.sleep(0.01)
+
+
+def test_sql_and_question_jobs(manager, monkeypatch):
+    seen = {}
+
+    async def fake_generate(llm, question, **kw):
+        seen["priority"] = current_llm_priority.get()
+        return {"ok": question != "bad", "sql": "SELECT 1;", "error": "no tables"}
+
+    monkeypatch.setattr(jobs, "generate_db_sql", fake_generate)
+    monkeypatch.setattr(jobs, "make_llm", lambda *a: object())
+
+    async def scenario():
+        a = manager.submit(sql="SELECT * FROM t;")
+        b = manager.submit(question="how many?")
+        for j in (a, b):
+            await _wait(j)
+        bad = manager.submit(question="bad")
+        await _wait(bad)
+        return a, b, bad
+
+    a, b, bad = asyncio.run(scenario())
+    assert (a.status, a.rows, a.sql) == ("succeeded", 3, "SELECT * FROM t")
+    assert (b.status, b.sql) == ("succeeded", "SELECT 1")
+    assert seen["priority"] == "background"
+    assert bad.status == "failed" and "no tables" in bad.error
+    assert manager.executed == ["SELECT * FROM t", "SELECT 1"]
+    assert a.as_dict()["result"]["row_count"] == 3
+
+
+def test_validation_queue_limit_and_cancel(manager):
+    with pytest.raises(ValueError):
+        manager.submit(sql="DELETE FROM t")
+    with pytest.raises(ValueError):
+        manager.submit(sql="SELECT 1", question="q")
+
+    async def scenario():
+        running = manager.submit(sql="SELECT 1")
+        await asyncio.sleep(0.01)  # takes the only worker
+        queued = [manager.submit(sql="SELECT 2"), manager.submit(sql="SELECT 3")]
+        with pytest.raises(OverflowError):
+            manager.submit(sql="SELECT 4")
+        await manager.cancel(queued[0].id)
+        for j in (running, *queued):
+            await _wait(j)
+        return running, queued
+
+    running, queued = asyncio.run(scenario())
+    assert [j.status for j in (running, *queued)] == ["succeeded", "cancelled", "succeeded"]
+    assert "SELECT 2" not in manager.executed
+
+
+def test_purge_drops_expired_jobs_and_spool(manager, tmp_path):
+    async def scenario():
+        job = manager.submit(sql="SELECT 1")
+        await _wait(job)
+        return job
+
+    job = asyncio.run(scenario())
+    os.makedirs(os.path.join(manager.spool_dir, job.id))
+    assert manager.purge(now=time.time() + 10) == 0
+    assert manager.purge(now=time.time() + jobs.settings.JOBS_TTL_S + 10) == 1
+    assert manager.get(job.id) is None
+    assert os.listdir(manager.spool_dir) == []
@@ -0,0 +1,58 @@
+from DB.join_graph import JoinGraph, join_hints
+
+
+FKS = [
+    {"from": "public.flights", "from_column": "carrier_id", "to": "public.carriers", "to_column": "id", "constraint": "fk_carrier"},
+    {"from": "public.flights", "from_column": "route_id", "to": "public.routes", "to_column": "id", "constraint": "fk_route"},
+    {"from": "public.routes", "from_column": "origin_id", "to": "public.airports", "to_column": "id", "constraint": "fk_origin"},
+    {"from": "public.bookings", "from_column": "flight_no", "to": "public.flights", "to_column": "flight_no", "constraint": "fk_flight"},
+    {"from": "public.bookings", "from_column": "flight_date", "to": "public.flights", "to_column": "flight_date", "constraint": "fk_flight"},
+]
+
+
+def test_shortest_path_and_multi_column_fk():
+    graph = JoinGraph(FKS)
+
+    path = graph.shortest_path("public.carriers", "public.airports")
+    assert [e.constraint for e in path] == ["fk_carrier", "fk_route", "fk_origin"]
+    assert graph.shortest_path("public.carriers", "public.carriers") == []
+    assert graph.shortest_path("public.carriers", "public.unknown") is None
+
+    (edge,) = graph.shortest_path("public.bookings", "public.flights")
+    assert edge.hint() == (
+        "public.bookings.flight_no = public.flights.flight_no AND "
+        "public.bookings.flight_date = public.flights.flight_date"
+    )
+
+
+def test_connect_adds_bridge_tables():
+    graph = JoinGraph(FKS)
+
+    bridges, edges = graph.connect(["public.carriers", "public.airports"])
+    assert bridges == ["public.flights", "public.routes"]
+    assert join_hints(edges) == [
+        "public.flights.carrier_id = public.carriers.id",
+        "public.flights.route_id = public.routes.id",
+        "public.routes.origin_id = public.airports.id",
+    ]
+
+    # too far for max_hops: nothing is bridged
+    assert graph.connect(["public.carriers", "public.airports"], max_hops=2) == ([], [])
+
+
+def test_bfs_cache_is_thread_safe():
+    from concurrent.futures import ThreadPoolExecutor
+
+    graph = JoinGraph(FKS, max_cached_sources=2)
+    tables = sorted({fk["from"] for fk in FKS} | {fk["to"] for fk in FKS})
+    expected = {t: graph.shortest_path(tables[0], t) for t in tables}
+
+    def lookups(i):
+        for n in range(200):
+            t = tables[(i + n) % len(tables)]
+            assert graph.shortest_path(tables[0], t) == expected[t]
+            graph.shortest_path(t, tables[0])
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lookups, range(8)))
+    assert len(graph._bfs_cache) <= 2
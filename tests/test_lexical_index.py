@@ -0,0 +1,84 @@
+from RAG.lexical_index import (
+    LexicalIndex,
+    rank_tables_lexically,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+
+
+CHUNKS = [
+    ("TABLE public.FlightSchedules\nDescription: planned flights\nColumns:\n- carrier_code (text)",
+     {"chunk_type": "table_summary", "schema_name": "public", "table_name": "FlightSchedules"}),
+    ("Column public.FlightSchedules.carrier_code type=text nullable=NO default=NULL",
+     {"chunk_type": "column", "schema_name": "public", "table_name": "FlightSchedules", "column_name": "carrier_code"}),
+    ("TABLE public.Airports\nDescription: airport directory\nColumns:\n- iata (text)\n- city (text)",
+     {"chunk_type": "table_summary", "schema_name": "public", "table_name": "Airports"}),
+    ("TABLE public.HistoryFlights\nDescription: flown flights archive\nColumns:\n- Airline (text)",
+     {"chunk_type": "table_summary", "schema_name": "public", "table_name": "HistoryFlights"}),
+]
+
+
+def test_tokenize_splits_camel_and_snake_case():
+    assert tokenize("FlightSchedules") == ["flightschedules", "flight", "schedules"]
+    assert tokenize("carrier_code") == ["carrier_code", "carrier", "code"]
+    assert tokenize("HTTPServer id") == ["httpserver", "http", "server", "id"]
+    assert tokenize("Рейсы") == ["рейсы"]
+
+
+def test_exact_identifier_ranks_first():
+    index = LexicalIndex.from_chunks(CHUNKS)
+    assert len(index) == 3
+
+    hits = index.search(["carrier_code"], top_k=3)
+    assert hits[0][0] == ("public", "FlightSchedules")
+
+    hits = index.search(["iata airport"], top_k=3)
+    assert hits[0][0] == ("public", "Airports")
+    assert index.summary(("public", "Airports")).startswith("TABLE public.Airports")
+
+
+def test_reciprocal_rank_fusion_prefers_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+    assert [key for key, _ in fused] == ["b", "a", "d", "c"]
+
+
+def test_rank_tables_lexically_from_schema_full():
+    schema_full = {
+        "tables": {
+            "public.Airports": {"schema": "public", "name": "Airports", "description": "", "columns": [
+                {"name": "iata", "description": None},
+            ]},
+            "public.FlightSchedules": {"schema": "public", "name": "FlightSchedules", "description": "", "columns": [
+                {"name": "carrier_code", "description": "airline IATA code"},
+            ]},
+        },
+        "foreign_keys": [],
+    }
+    analysis = {"search_queries": ["FlightSchedules carrier_code SU"], "keywords": [], "entities": []}
+    assert rank_tables_lexically(schema_full, analysis, top_k=1) == ["public.FlightSchedules"]
+
+
+def test_hybrid_retrieval_applies_extra_where_to_lexical_hits():
+    from RAG.schema_context import RetrievalConfig, retrieve_table_candidates
+
+    class FakeChroma:
+        lexical_index = LexicalIndex.from_chunks(CHUNKS)
+
+        def query(self, queries, n_results, where):
+            assert where == {"chunk_type": "table_summary", "schema_name": "public"}
+            return {
+                "documents": [["TABLE public.Airports"]],
+                "metadatas": [[{"schema_name": "public", "table_name": "Airports"}]],
+                "distances": [[0.2]],
+            }
+
+        def lexical_search(self, queries, n_results=10):
+            return [(("archive", "FlightSchedules"), 3.0), (("public", "FlightSchedules"), 2.0)]
+
+    analysis = {"search_queries": ["flight schedules"], "keywords": [], "entities": []}
+    out = retrieve_table_candidates(
+        FakeChroma(), analysis, RetrievalConfig(hybrid=True), extra_where={"schema_name": "public"},
+    )
+    assert {(c["schema_name"], c["table_name"]) for c in out} == {
+        ("public", "Airports"), ("public", "FlightSchedules"),
+    }
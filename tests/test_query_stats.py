@@ -0,0 +1,66 @@
+from store.query_stats import QueryStatsStore, percentile
+
+
+def test_literals_share_a_fingerprint_and_stats_roll_up():
+    store = QueryStatsStore()
+    for i in range(1, 21):
+        store.record("default", f"SELECT * FROM s.t WHERE id = {i} LIMIT 10", i / 1000, rows=2)
+    store.record("default", "SELECT * FROM s.t WHERE id = 99 LIMIT 10", 5.0, outcome="timeout")
+    store.record("default", "SELECT * FROM s.t WHERE id = 'x' LIMIT 10", 0.001, outcome="error")
+
+    (row,) = store.top()
+    assert row["sql"] == "select * from s.t where id = ? limit ?"
+    assert row["count"] == 22
+    assert row["timeout_rate"] == round(1 / 22, 4) and row["error_rate"] == round(1 / 22, 4)
+    assert row["max_ms"] == 5000.0 and row["avg_rows"] == round(40 / 22, 1)
+    assert row["p95_ms"] == percentile([i for i in range(1, 21)] + [5000.0, 1.0], 95)
+
+
+def test_top_orders_and_filters_by_profile():
+    store = QueryStatsStore()
+    store.record("default", "SELECT 1 FROM a", 0.010)
+    store.record("default", "SELECT 1 FROM b", 0.500)
+    store.record("dev", "SELECT 1 FROM c", 2.0)
+    assert [r["sql"] for r in store.top(order_by="mean_ms")] == [
+        "select ? from c", "select ? from b", "select ? from a"
+    ]
+    assert [r["sql"] for r in store.top(1, profile="default")] == ["select ? from b"]
+
+
+def test_flush_and_reload_from_sqlite(tmp_path):
+    path = str(tmp_path / "stats" / "q.sqlite3")
+    store = QueryStatsStore(path, flush_interval_s=3600)
+    store.record("default", "SELECT * FROM t WHERE x = 1", 0.2, rows=5)
+    store.record("default", "SELECT * FROM t WHERE x = 2", 0.4, rows=7)
+    assert store.flush() == 1
+    assert store.flush() == 0  # nothing changed since
+
+    reloaded = QueryStatsStore(path)
+    (row,) = reloaded.top()
+    assert (row["count"], row["avg_rows"], row["p95_ms"]) == (2, 6.0, 400.0)
+    reloaded.record("default", "SELECT * FROM t WHERE x = 3", 0.1)
+    assert reloaded.top()[0]["count"] == 3
+
+
+def test_sqlite_connections_are_closed(tmp_path):
+    import sqlite3
+
+    import pytest
+
+    opened = []
+
+    class TrackingStore(QueryStatsStore):
+        def _connect(self):
+            conn = super()._connect()
+            opened.append(conn)
+            return conn
+
+    path = str(tmp_path / "q.sqlite3")
+    store = TrackingStore(path, flush_interval_s=3600)
+    store.record("default", "SELECT 1 FROM t", 0.1)
+    store.flush()
+    TrackingStore(path)  # load
+    assert len(opened) == 2
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
@@ -0,0 +1,153 @@
+from contextlib import contextmanager
+
+import pytest
+
+from API.config import settings
+from DB.result_cache import ResultCache, canonical_sql, referenced_tables, table_ttl
+
+
+class FakeProfile:
+    name = "default"
+    dsn = "postgresql://db/test"
+
+    def __init__(self):
+        self.counters = {"public.flights": (10, 10, 0), "ref.airports": (5, 5, 0)}
+
+    @contextmanager
+    def connection(self):
+        profile = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql, params=None):
+                pass
+
+            def fetchall(self):
+                return [(name, *v) for name, v in profile.counters.items()]
+
+        class Conn:
+            def cursor(self):
+                return Cursor()
+
+        yield Conn()
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(settings, "RESULT_CACHE_INVALIDATION", "pg_stat")
+    monkeypatch.setattr(settings, "RESULT_CACHE_MARKER_CHECK_S", 0.0)
+    monkeypatch.setattr(settings, "RESULT_CACHE_TTL_S", 60.0)
+    monkeypatch.setattr(settings, "RESULT_CACHE_TABLE_TTLS", {"ref.*": 3600.0, "audit_log": 0.0})
+    return ResultCache(max_bytes=10_000, max_entry_bytes=5_000)
+
+
+def _get_or_put(cache, profile, sql, value):
+    key = ResultCache.key(profile, "rows", sql, 10)
+    found = cache.lookup(profile, key, sql)
+    if found.hit:
+        return found.value, True
+    cache.put(key, value, found)
+    return value, False
+
+
+def test_key_keeps_literals_but_ignores_formatting():
+    assert canonical_sql("SELECT *\n FROM t -- x\nWHERE c = 'AA';") == "select * from t where c = 'AA'"
+    assert canonical_sql("select * from t where c = 'AA'") != canonical_sql("select * from t where c = 'DL'")
+
+
+def test_tables_and_ttl_groups(cache):
+    sql = 'SELECT * FROM public.flights f JOIN ref."Airports" a ON a.id = f.dst, ref.carriers WHERE f.x = 1'
+    assert referenced_tables(sql) == ["public.flights", "ref.Airports", "ref.carriers"]
+    assert table_ttl(["ref.carriers"]) == 3600.0
+    assert table_ttl(["ref.carriers", "public.flights"]) == 60.0
+    assert table_ttl(["audit_log"]) == 0.0
+
+
+def test_hit_until_a_read_table_changes(cache):
+    profile = FakeProfile()
+    sql = "SELECT * FROM flights WHERE carrier = 'AA' LIMIT 10"
+    assert _get_or_put(cache, profile, sql, [{"n": 1}]) == ([{"n": 1}], False)
+    rows, hit = _get_or_put(cache, profile, sql, [{"n": 2}])
+    assert (rows, hit) == ([{"n": 1}], True)
+    rows.append("mutated by caller")  # callers get a copy
+
+    profile.counters["ref.airports"] = (6, 6, 1)  # another table: still valid
+    assert _get_or_put(cache, profile, sql, None) == ([{"n": 1}], True)
+
+    profile.counters["public.flights"] = (11, 11, 1)
+    assert _get_or_put(cache, profile, sql, [{"n": 2}]) == ([{"n": 2}], False)
+
+
+def test_size_bound_evicts_least_recently_used(cache):
+    profile = FakeProfile()
+    big = ["x" * 3_000]
+    for i in range(3):
+        _get_or_put(cache, profile, f"SELECT * FROM flights WHERE id = {i}", big)
+    assert len(cache) == 3 and cache.bytes <= 10_000
+    _get_or_put(cache, profile, "SELECT * FROM flights WHERE id = 0", big)  # touch 0
+    _get_or_put(cache, profile, "SELECT * FROM flights WHERE id = 3", big)
+    assert len(cache) == 3
+    assert _get_or_put(cache, profile, "SELECT * FROM flights WHERE id = 0", None)[1] is True
+    assert _get_or_put(cache, profile, "SELECT * FROM flights WHERE id = 1", big)[1] is False
+
+    # too big for one entry / never-cached table group
+    assert _get_or_put(cache, profile, "SELECT * FROM flights", ["x" * 6_000])[1] is False
+    assert _get_or_put(cache, profile, "SELECT * FROM flights", None)[1] is False
+    _get_or_put(cache, profile, "SELECT * FROM audit_log", [1])
+    assert _get_or_put(cache, profile, "SELECT * FROM audit_log", None)[1] is False
+
+
+def test_cte_names_are_not_tables():
+    sql = 'WITH q(c0, c1) AS (SELECT * FROM flights), "Top" AS MATERIALIZED (SELECT 1 FROM q) SELECT * FROM q, "Top"'
+    assert referenced_tables(sql) == ["flights"]
+
+
+def test_volatile_sql_and_unmarked_relations_are_not_cached(cache):
+    profile = FakeProfile()
+    for sql in [
+        "SELECT * FROM flights WHERE dep > now() - interval '1 day'",
+        "SELECT * FROM flights WHERE d = current_date",
+        "SELECT * FROM flights ORDER BY random() LIMIT 5",
+        "SELECT * FROM flights_view",  # a view: no pg_stat_user_tables row
+        "SELECT * FROM generate_series(1, 3) g",
+    ]:
+        assert _get_or_put(cache, profile, sql, [1]) == ([1], False)
+        assert _get_or_put(cache, profile, sql, [2]) == ([2], False), sql
+    assert len(cache) == 0
+
+    sql = "WITH q(c0) AS (SELECT carrier FROM flights) SELECT count(*) AS n FROM q"
+    _get_or_put(cache, profile, sql, [1])
+    assert _get_or_put(cache, profile, sql, None) == ([1], True)
+
+
+def test_rows_from_a_lagging_replica_are_not_cached(cache, monkeypatch):
+    import DB.executor as executor
+
+    profile = FakeProfile()
+    # the replica has not replayed the last insert the primary's counters show
+    servers = {"primary": [{"n": 11}], "replica:5432/db": [{"n": 10}]}
+    route = {"target": "replica:5432/db"}
+    executed = []
+
+    def fake_execute(sql_clean, timeout_ms, *, columnar=False):
+        executed.append(route["target"])
+        return servers[route["target"]], route["target"]
+
+    monkeypatch.setattr(executor, "get_db_profile", lambda: profile)
+    monkeypatch.setattr(executor, "_execute", fake_execute)
+    monkeypatch.setattr(executor, "result_cache", cache)
+    monkeypatch.setattr(settings, "RESULT_CACHE_ENABLED", True)
+    profile.counters["public.flights"] = (11, 11, 0)
+
+    sql = "SELECT count(*) AS n FROM flights"
+    assert executor.run_aggregate(sql) == {"n": 10}
+    assert len(cache) == 0  # not stored under the primary's newer markers
+    route["target"] = "primary"  # failover: the primary's rows are current
+    assert executor.run_aggregate(sql) == {"n": 11}
+    assert executor.run_aggregate(sql) == {"n": 11}
+    assert executed == ["replica:5432/db", "primary"]
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+import LLM.sql_pipeline as sql_pipeline
+from API.config import settings
+from DB.columnar import ColumnarResult
+from DB.result_profile import build_profile_sql, parse_profile
+from DB.timeout_policy import TimeoutChoice
+from LLM.answer_renderer import answer_context, render_db_answer
+
+
+def test_profile_sql_picks_aggregates_by_type():
+    sql = build_profile_sql("SELECT carrier, delay, meta FROM f;", ["text", "int4", "json"], top_k=3)
+    assert sql.startswith("WITH q(c0, c1, c2) AS (\nSELECT carrier, delay, meta FROM f\n)")
+    assert "count(DISTINCT c0) AS c0_distinct" in sql and "min(c0) AS c0_min" in sql
+    assert "GROUP BY 1 ORDER BY 2 DESC, 1 LIMIT 3) t) AS c0_top" in sql
+    assert "round(avg(c1)::numeric, 4) AS c1_avg" in sql and "c1_top" not in sql
+    # json: no equality / ordering, only nulls
+    assert "count(c2) AS c2_nonnull" in sql and "c2_distinct" not in sql and "min(c2)" not in sql
+
+    row = {"n": 7, "c0_nonnull": 7, "c0_distinct": 2, "c0_top": [{"value": "SU", "n": 5}], "c1_nonnull": 6, "c1_avg": 3}
+    profile = parse_profile(row, ["carrier", "delay"], ["text", "int4"])
+    assert profile == {"row_count": 7, "columns": [
+        {"name": "carrier", "type": "text", "nulls": 0, "distinct": 2, "top": [{"value": "SU", "n": 5}]},
+        {"name": "delay", "type": "int4", "nulls": 1, "avg": 3},
+    ]}
+
+
+def test_pipeline_profiles_full_previews_and_answer_uses_it(monkeypatch):
+    calls, threads = [], []
+    rows = ColumnarResult(["carrier"], ["text"], [("SU",)] * 10)
+
+    async def fake_generate(llm, user_text, schema_text):
+        return {"sql": "SELECT carrier FROM f"}
+
+    def fake_profile(sql, columns, types, *, timeout_ms=None):
+        calls.append((sql, columns, types, timeout_ms))
+        threads.append(threading.get_ident())
+        return {"row_count": 1234, "columns": [{"name": "carrier", "type": "text", "nulls": 0, "distinct": 3}]}
+
+    monkeypatch.setattr(sql_pipeline, "_llm_generate", fake_generate)
+    monkeypatch.setattr(sql_pipeline, "choose_timeout", lambda sql, budget: TimeoutChoice(500, "default"))
+    monkeypatch.setattr(sql_pipeline, "run_sql", lambda sql, **kw: rows if kw.get("columnar") else None)
+    monkeypatch.setattr(sql_pipeline, "profile_result", fake_profile)
+    monkeypatch.setattr(sql_pipeline, "render_schema_for_prompt", lambda *a, **kw: "")
+    monkeypatch.setattr(settings, "RESULT_PROFILE", "auto")
+    monkeypatch.setattr(settings, "RESULT_PROFILE_TIMEOUT_MS", 1500)
+
+    payload = asyncio.run(sql_pipeline.execute_with_retries(None, "carriers", {}, preview_limit=10))
+    assert calls == [("SELECT carrier FROM f", ["carrier"], ["text"], 1500)]
+    assert threading.get_ident() not in threads  # the profile round-trip is off the event loop
+    assert payload["rows_preview"][0] == {"carrier": "SU"} and payload["profile"]["row_count"] == 1234
+
+    assert render_db_answer(payload).startswith("Here are the first 10 of 1234 rows.")
+    ctx = answer_context(payload)
+    assert set(ctx) == {"ok", "sql", "profile", "sample_rows"} and len(ctx["sample_rows"]) == 3
+
+    # a preview shorter than the limit is the whole result: no profile query
+    rows.rows = rows.rows[:4]
+    calls.clear()
+    payload = asyncio.run(sql_pipeline.execute_with_retries(None, "carriers", {}, preview_limit=10))
+    assert calls == [] and "profile" not in payload
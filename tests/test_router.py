@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+
+import LLM.router as router
+from API.config import settings
+from LLM.admission import LLMOverloadedError
+
+
+@pytest.fixture
+def fast_path(monkeypatch):
+    monkeypatch.setattr(settings, "FAST_PATH_ROUTER", True)
+
+
+def test_overloaded_classifier_is_not_sent_to_the_agent(fast_path, monkeypatch):
+    async def overloaded(user_text, llm=None):
+        raise LLMOverloadedError("ollama", "queue_full", 429, 5)
+
+    monkeypatch.setattr(router, "classify_request", overloaded)
+    with pytest.raises(LLMOverloadedError):
+        asyncio.run(router.route_request("flights today", "template"))
+
+
+def test_other_classifier_errors_fall_back_to_the_agent(fast_path, monkeypatch):
+    async def broken(user_text, llm=None):
+        raise ConnectionError("ollama down")
+
+    monkeypatch.setattr(router, "classify_request", broken)
+    assert asyncio.run(router.route_request("flights today", "template")) is None
@@ -0,0 +1,52 @@
+import json
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from DB.row_encoding import dumps
+
+
+def test_rows_encode_in_one_compact_pass_with_exact_decimals():
+    row = {
+        "fare": Decimal("12345678901234567.10"),
+        "tiny": Decimal("1E-9"),
+        "nan": Decimal("NaN"),
+        "day": date(2024, 3, 1),
+        "at": datetime(2024, 3, 1, 12, 30, tzinfo=timezone.utc),
+        "id": uuid.UUID(int=1),
+        "wait": timedelta(minutes=5),
+        "raw": b"\x01\xff",
+        "name": "Шереметьево",
+        "gate": None,
+    }
+    text = dumps({"rows_preview": [row], "ok": True})
+    assert "\n" not in text and "Шереметьево" in text
+    decoded = json.loads(text, parse_float=Decimal)["rows_preview"][0]
+    assert decoded["fare"] == Decimal("12345678901234567.10")
+    assert decoded["tiny"] == Decimal("1E-9")
+    assert decoded["nan"] == "NaN"
+    assert decoded["day"] == "2024-03-01"
+    assert decoded["at"] == "2024-03-01T12:30:00+00:00"
+    assert decoded["id"] == "00000000-0000-0000-0000-000000000001"
+    assert decoded["wait"] == "0:05:00"
+    assert decoded["raw"] == "01ff"
+    assert decoded["gate"] is None
+
+
+def test_stdlib_fallback_encodes_columnar_results(monkeypatch):
+    import importlib
+    import sys
+
+    import DB.row_encoding as row_encoding
+    from DB.columnar import ColumnarResult
+
+    monkeypatch.setitem(sys.modules, "orjson", None)  # import orjson -> ImportError
+    fallback = importlib.reload(row_encoding)
+    try:
+        assert fallback.orjson is None
+        result = ColumnarResult(["carrier", "fare"], ["text", "numeric"], [("SU", Decimal("1.10"))])
+        decoded = json.loads(fallback.dumps({"ok": True, "result": result}))
+        assert decoded["result"] == {"columns": ["carrier", "fare"], "types": ["text", "numeric"], "rows": [["SU", "1.10"]]}
+    finally:
+        monkeypatch.delitem(sys.modules, "orjson")
+        importlib.reload(row_encoding)
@@ -0,0 +1,96 @@
+import json
+import re
+
+from RAG.schema_prompt import render_schema_for_prompt
+from RAG.schema_context import compact_for_prompt
+from prompts.sql_fixer import SQL_FIXER_PROMPT
+from prompts.sql_generator import SQL_GENERATOR_PROMPT
+
+
+SCHEMA_SELECTED = {
+    "tables": {
+        "flight_operations.FlightSchedules": {
+            "schema": "flight_operations",
+            "name": "FlightSchedules",
+            "description": "planned flights",
+            "columns": [
+                {"name": "id", "type": "bigint", "description": None},
+                {"name": "carrier_id", "type": "integer", "description": None},
+                {"name": "departure_at", "type": "timestamp with time zone", "description": "local time"},
+                {"name": "gate_note", "type": "text", "description": None},
+                {"name": "crew_note", "type": "text", "description": None},
+            ],
+        },
+        "flight_operations.Carriers": {
+            "schema": "flight_operations",
+            "name": "Carriers",
+            "description": None,
+            "columns": [
+                {"name": "id", "type": "integer", "description": None},
+                {"name": "carrier_code", "type": "character varying", "description": "IATA code"},
+            ],
+        },
+    },
+    "foreign_keys": [],
+    "join_hints": ["flight_operations.FlightSchedules.carrier_id = flight_operations.Carriers.id"],
+}
+
+
+def test_json_format_is_unchanged_prompt():
+    assert render_schema_for_prompt(SCHEMA_SELECTED, fmt="json") == json.dumps(
+        compact_for_prompt(SCHEMA_SELECTED), ensure_ascii=False
+    )
+
+
+def test_compact_format_with_schema_aliases():
+    text = render_schema_for_prompt(SCHEMA_SELECTED, fmt="compact")
+    assert text.splitlines() == [
+        "-- schema aliases (expand in SQL): @1=flight_operations",
+        "TABLE @1.FlightSchedules -- planned flights",
+        "  id int8, carrier_id int, departure_at timestamptz (local time), gate_note text, crew_note text",
+        "TABLE @1.Carriers",
+        "  id int, carrier_code varchar (IATA code)",
+        "JOINS",
+        "  @1.FlightSchedules.carrier_id = @1.Carriers.id",
+    ]
+
+
+def test_token_budget_drops_irrelevant_columns_first():
+    text = render_schema_for_prompt(SCHEMA_SELECTED, fmt="compact", token_budget=70, query="departure time")
+    lines = text.splitlines()
+    assert "gate_note" not in text and "crew_note" not in text
+    # join keys and request-matching columns survive
+    assert lines[2].startswith("  id int8, carrier_id int, departure_at timestamptz")
+    assert lines[2].endswith("... +2 more")
+
+
+def test_schema_brief_is_rendered_once_per_fingerprint():
+    from DB.schema_catalog import schema_fingerprint
+    from LLM.select_relevant_schema_with_llm import render_schema_brief
+
+    schema_full = {"tables": SCHEMA_SELECTED["tables"], "foreign_keys": []}
+    schema_full["fingerprint"] = schema_fingerprint(schema_full)
+
+    brief = render_schema_brief(schema_full)
+    assert render_schema_brief(schema_full) is brief
+    assert render_schema_brief(schema_full, ["flight_operations.Carriers"]) == (
+        "- flight_operations.Carriers | cols: id:integer, carrier_code:character varying"
+    )
+
+    changed = {"tables": {}, "foreign_keys": []}
+    assert schema_fingerprint(changed) != schema_full["fingerprint"]
+
+
+def test_prompts_describe_the_rendered_markers():
+    # marker as the prompts quote it -> how it shows up in the compact text
+    markers = {
+        "TABLE schema.table -- description": r"^TABLE @1\.FlightSchedules -- planned flights$",
+        "name type (description)": r"^  id int8, .*departure_at timestamptz \(local time\)",
+        "... +N more": r", \.\.\. \+\d+ more$",
+        "-- schema aliases (expand in SQL):": r"^-- schema aliases \(expand in SQL\): @1=flight_operations$",
+        "JOINS": r"^JOINS$",
+    }
+    text = render_schema_for_prompt(SCHEMA_SELECTED, fmt="compact", token_budget=70, query="departure time")
+    for marker, pattern in markers.items():
+        assert marker in SQL_GENERATOR_PROMPT and marker in SQL_FIXER_PROMPT, marker
+        assert re.search(pattern, text, flags=re.MULTILINE), (marker, text)
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from store.single_flight import SingleFlight, SyncSingleFlight
+
+
+def test_async_single_flight_shares_one_run():
+    async def scenario():
+        flights = SingleFlight("test")
+        runs = 0
+
+        async def work():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.02)
+            return {"rows": runs}
+
+        results = await asyncio.gather(*[flights.do("q", work) for _ in range(5)])
+        assert runs == 1
+        assert [r for r, _ in results] == [{"rows": 1}] * 5
+        assert sum(shared for _, shared in results) == 4
+        assert flights.inflight() == 0
+
+        # finished flights are not cached
+        await flights.do("q", work)
+        assert runs == 2
+
+    asyncio.run(scenario())
+
+
+def test_async_single_flight_propagates_errors():
+    async def scenario():
+        flights = SingleFlight("test")
+
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise ValueError("db down")
+
+        results = await asyncio.gather(*[flights.do("q", boom) for _ in range(3)], return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def scenario():
+        flights = SingleFlight("test")
+        runs = 0
+
+        async def work():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.05)
+            return "rows"
+
+        leader = asyncio.create_task(flights.do("q", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("q", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()  # client of the first request went away
+
+        assert await follower == ("rows", True)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert runs == 1 and flights.inflight() == 0
+
+    asyncio.run(scenario())
+
+
+def test_run_is_cancelled_when_every_caller_is_gone():
+    async def scenario():
+        flights = SingleFlight("test")
+        finished = []
+
+        async def work():
+            await asyncio.sleep(0.05)
+            finished.append(1)
+
+        callers = [asyncio.create_task(flights.do("q", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for c in callers:
+            c.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0.06)
+        assert finished == [] and flights.inflight() == 0
+
+    asyncio.run(scenario())
+
+
+def test_sync_single_flight_across_threads():
+    flights = SyncSingleFlight("test")
+    runs = []
+    results = []
+
+    def work():
+        runs.append(1)
+        time.sleep(0.05)
+        return "catalog"
+
+    threads = [threading.Thread(target=lambda: results.append(flights.do("db", work))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(runs) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+
+    with pytest.raises(KeyError):
+        flights.do("db", lambda: {}["missing"])
@@ -0,0 +1,137 @@
+from contextlib import contextmanager
+from decimal import Decimal
+
+import psycopg
+import pytest
+
+import DB.executor as executor
+from API.config import settings
+from DB.sql_params import is_lifting_error, lift_literals, unsafe_fingerprints
+
+
+def test_filter_literals_become_parameters():
+    lifted = lift_literals(
+        "SELECT carrier, count(*) FROM f WHERE carrier = 'AA' AND delay > 1.5 "
+        "AND dep >= date '2024-01-01' AND note LIKE '%it''s%' GROUP BY 1 ORDER BY 2 DESC LIMIT 10"
+    )
+    assert lifted.sql == (
+        "SELECT carrier, count(*) FROM f WHERE carrier = %s AND delay > %s "
+        "AND dep >= %s::date AND note LIKE %s GROUP BY 1 ORDER BY 2 DESC LIMIT 10"
+    )
+    assert lifted.params == ["AA", Decimal("1.5"), "2024-01-01", "%it's%"]
+
+
+def test_select_list_subqueries_and_join_conditions():
+    lifted = lift_literals(
+        "SELECT 'x' AS tag, a.id % 2 FROM a JOIN b ON b.a_id = a.id AND b.kind = 3 "
+        "WHERE a.id IN (SELECT id FROM c WHERE c.n > 5 ORDER BY 1 LIMIT 2) AND a.s = E'\\n'"
+    )
+    assert lifted.sql == (
+        "SELECT 'x' AS tag, a.id %% 2 FROM a JOIN b ON b.a_id = a.id AND b.kind = %s "
+        "WHERE a.id IN (SELECT id FROM c WHERE c.n > %s ORDER BY 1 LIMIT 2) AND a.s = E'\\n'"
+    )
+    assert lifted.params == [3, 5]
+
+
+def test_nothing_to_lift_or_already_parameterized():
+    assert lift_literals("SELECT 1 FROM t ORDER BY 1 LIMIT 10") is None
+    assert lift_literals("SELECT * FROM t WHERE id = $1 AND x = 'a'") is None
+
+
+class FakeCursor:
+    def __init__(self, log, reject):
+        self.log = log
+        self.reject = reject
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None, prepare=None):
+        self.log.append((sql, prepare))
+        if prepare and self.reject:
+            raise self.reject("rejected")
+
+    def fetchall(self):
+        return [{"n": 1}]
+
+
+class FakeConn:
+    def __init__(self, log, reject):
+        self.log = log
+        self.reject = reject
+
+    def cursor(self, row_factory=None):
+        return FakeCursor(self.log, self.reject)
+
+    def rollback(self):
+        self.log.append(("ROLLBACK", None))
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    log, state = [], {"reject": False}
+
+    class Profile:
+        name = "default"
+
+        @contextmanager
+        def routed_read_connection(self):
+            yield "primary", FakeConn(log, state["reject"])
+
+    monkeypatch.setattr(executor, "get_db_profile", lambda: Profile())
+    monkeypatch.setattr("DB.timeout_policy.get_db_profile", lambda: Profile())
+    monkeypatch.setattr(settings, "PG_LIFT_LITERALS", True)
+    monkeypatch.setattr(settings, "RESULT_CACHE_ENABLED", False)
+    unsafe_fingerprints.clear()
+    yield log, state
+    unsafe_fingerprints.clear()
+
+
+def _statements(log):
+    return [(sql, prepare) for sql, prepare in log if not sql.startswith("SELECT set_config")]
+
+
+def test_run_sql_prepares_lifted_sql(fake_db):
+    log, _ = fake_db
+    assert executor.run_sql("SELECT n FROM t WHERE k = 'a'") == [{"n": 1}]
+    assert _statements(log) == [("SELECT n FROM t WHERE k = %s LIMIT 10", True)]
+
+
+def test_rejected_lifting_falls_back_inline_and_is_remembered(fake_db):
+    log, state = fake_db
+    state["reject"] = psycopg.errors.AmbiguousFunction
+    assert executor.run_sql("SELECT f('a') AS n FROM t WHERE k = f('a')") == [{"n": 1}]
+    assert _statements(log) == [
+        ("SELECT f('a') AS n FROM t WHERE k = f(%s) LIMIT 10", True),
+        ("ROLLBACK", None),
+        ("SELECT f('a') AS n FROM t WHERE k = f('a') LIMIT 10", None),
+    ]
+    log.clear()
+    executor.run_sql("SELECT f('b') AS n FROM t WHERE k = f('b')")
+    assert _statements(log) == [("SELECT f('b') AS n FROM t WHERE k = f('b') LIMIT 10", None)]
+
+
+def test_query_errors_are_not_retried_inline(fake_db):
+    log, state = fake_db
+    state["reject"] = psycopg.errors.UndefinedColumn
+    with pytest.raises(psycopg.errors.UndefinedColumn):
+        executor.run_sql("SELECT nope FROM t WHERE k = 'a'")
+    assert _statements(log) == [("SELECT nope FROM t WHERE k = %s LIMIT 10", True)]
+    assert len(unsafe_fingerprints._keys) == 0
+
+
+@pytest.mark.parametrize("error, lifting", [
+    (psycopg.errors.IndeterminateDatatype, True),
+    (psycopg.errors.UndefinedFunction, True),
+    (psycopg.errors.AmbiguousFunction, True),
+    (psycopg.errors.DatatypeMismatch, True),
+    (psycopg.errors.UndefinedColumn, False),
+    (psycopg.errors.UndefinedTable, False),
+    (psycopg.errors.SyntaxError, False),
+    (psycopg.errors.InsufficientPrivilege, False),
+])
+def test_is_lifting_error(error, lifting):
+    assert is_lifting_error(error("x")) is lifting
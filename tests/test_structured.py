@@ -0,0 +1,54 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from LLM.response_models import QueryAnalysis, SqlGeneration, TableSelection
+from LLM.structured import StructuredOutputError, ainvoke_structured, bind_structured, parse_model
+
+
+class _ScriptedLLM:
+    def __init__(self, *replies: str):
+        self.replies = list(replies)
+        self.calls = []
+
+    async def ainvoke(self, messages):
+        self.calls.append(messages)
+        return AIMessage(content=self.replies.pop(0))
+
+
+def test_parse_model_tolerates_fences_and_nulls():
+    parsed = parse_model('```json\n{"intent": "list", "time_range": null, "extra": 1}\n```', QueryAnalysis)
+    assert parsed.intent == "list"
+    assert parsed.time_range == {}
+    assert parsed.model_dump()["extra"] == 1
+
+
+def test_ainvoke_structured_repairs_once():
+    llm = _ScriptedLLM('{"tables": "a.b"}', '{"tables": ["a.b"]}')
+    parsed, raw = asyncio.run(ainvoke_structured(llm, [HumanMessage(content="q")], TableSelection, "select_tables"))
+
+    assert parsed.tables == ["a.b"]
+    assert len(llm.calls) == 2
+    # repair turn carries the bad reply and the validation error
+    assert llm.calls[1][-2].content == '{"tables": "a.b"}'
+    assert "tables" in llm.calls[1][-1].content
+
+
+def test_ainvoke_structured_gives_up():
+    llm = _ScriptedLLM("nope", "still nope")
+    try:
+        asyncio.run(ainvoke_structured(llm, [HumanMessage(content="q")], SqlGeneration, "sql_generate"))
+    except StructuredOutputError as e:
+        assert e.raw == "still nope"
+    else:
+        raise AssertionError("expected StructuredOutputError")
+
+
+def test_bind_structured_ollama_schema():
+    from langchain_ollama import ChatOllama
+
+    bound = bind_structured(ChatOllama(model="m"), TableSelection)
+    assert bound.kwargs["format"]["properties"]["tables"]["type"] == "array"
+
+    plain = _ScriptedLLM()
+    assert bind_structured(plain, TableSelection) is plain
@@ -0,0 +1,35 @@
+from benchmarks.synth_schema import SynthConfig, generate_schema_full, to_sections
+from DB.build_vector_store import build_chunks
+from DB.join_graph import JoinGraph
+
+
+def test_generation_is_deterministic_and_sized():
+    cfg = SynthConfig(n_schemas=4, n_tables=60, columns=(3, 6, 12), fk_per_table=1.5, seed=3)
+    a = generate_schema_full(cfg)
+    assert a == generate_schema_full(cfg)
+    assert len(a["tables"]) == 60
+    assert len({t["schema"] for t in a["tables"].values()}) == 4
+    assert all(len(t["columns"]) >= 3 for t in a["tables"].values())
+
+
+def test_foreign_keys_reference_existing_columns():
+    schema_full = generate_schema_full(SynthConfig(n_tables=80, fk_per_table=2.0))
+    tables = schema_full["tables"]
+    assert schema_full["foreign_keys"]
+    for fk in schema_full["foreign_keys"]:
+        assert fk["from_column"] in {c["name"] for c in tables[fk["from"]]["columns"]}
+        assert fk["to_column"] == "id" and fk["to"] in tables
+    assert JoinGraph.from_schema(schema_full).neighbors(schema_full["foreign_keys"][0]["to"])
+
+
+def test_sections_feed_build_chunks():
+    schema_full = generate_schema_full(SynthConfig(n_tables=12, fk_per_table=1.0))
+    sections = to_sections(schema_full)
+    n_columns = sum(len(t["columns"]) for t in schema_full["tables"].values())
+
+    assert len(sections["columns"].rows) == n_columns
+    assert all(isinstance(v, str) for row in sections["columns"].rows for v in row)
+
+    chunks = build_chunks(sections)
+    kinds = [meta.get("chunk_type") for _, meta in chunks]
+    assert kinds.count("table_summary") == 12
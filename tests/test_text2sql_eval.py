@@ -0,0 +1,51 @@
+from decimal import Decimal
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from benchmarks.text2sql_eval import ResultSet, normalize_value, parse_config, same_result
+from LLM.utils import collect_llm_usage, record_llm_usage
+
+
+def _result(rows, exact_rows=100):
+    res = ResultSet()
+    for row in rows:
+        res.add(tuple(normalize_value(v) for v in row), exact_rows)
+    return res
+
+
+def test_result_comparison_ignores_row_order_and_numeric_types():
+    a = _result([(1, Decimal("2.50"), "x"), (2, Decimal("3"), "y")])
+    b = _result([(2, 3.0, "y"), (1, 2.5, "x")])
+    assert same_result(a, b)
+    assert not same_result(a, _result([(1, 2.5, "x")]))
+    # multiset, not set: duplicates count
+    assert not same_result(_result([(1,), (1,), (2,)]), _result([(1,), (2,), (2,)]))
+
+
+def test_large_results_compare_by_hash_only():
+    rows = [(i, f"r{i}") for i in range(50)]
+    a = _result(rows, exact_rows=10)
+    b = _result(list(reversed(rows)), exact_rows=10)
+    assert a.rows is None and b.rows is None
+    assert same_result(a, b)
+    assert not same_result(a, _result(rows[:-1] + [(49, "other")], exact_rows=10))
+
+
+def test_parse_config_splits_settings_and_model():
+    cfg = parse_config("combined:PIPELINE_MODE=combined,COMBINED_MAX_CANDIDATES=20,model=qwen2.5:7b")
+    assert cfg["name"] == "combined"
+    assert cfg["settings"] == {"PIPELINE_MODE": "combined", "COMBINED_MAX_CANDIDATES": 20}
+    assert cfg["model"] == "qwen2.5:7b"
+    with pytest.raises(ValueError):
+        parse_config("bad:NO_SUCH_SETTING=1")
+
+
+def test_llm_usage_is_collected_per_block():
+    msg = AIMessage(content="{}", usage_metadata={"input_tokens": 100, "output_tokens": 7, "total_tokens": 107})
+    with collect_llm_usage() as usage:
+        record_llm_usage(msg, "fake", "sql_generate")
+        record_llm_usage(msg, "fake", "sql_fix")
+    record_llm_usage(msg, "fake", "sql_fix")
+    assert usage["calls"] == 2
+    assert usage["prompt_tokens"] == 200 and usage["output_tokens"] == 14
@@ -0,0 +1,143 @@
+import pytest
+
+import DB.timeout_policy as tp
+from API.config import settings
+from DB.sql_fingerprint import normalize_sql, sql_fingerprint
+
+
+@pytest.fixture(autouse=True)
+def clean_history(monkeypatch):
+    tp.runtime_history.clear()
+    monkeypatch.setattr(settings, "PG_TIMEOUT_ADAPTIVE", True)
+    monkeypatch.setattr(settings, "PG_TIMEOUT_MIN_MS", 200)
+    monkeypatch.setattr(settings, "PG_TIMEOUT_MAX_MS", 30000)
+    monkeypatch.setattr(settings, "PG_TIMEOUT_HEADROOM", 3.0)
+    monkeypatch.setattr(settings, "PG_TIMEOUT_ESCALATION", 2.0)
+    monkeypatch.setattr(tp, "explain_estimate_ms", lambda sql: None)
+    yield
+    tp.runtime_history.clear()
+
+
+def test_fingerprint_ignores_literals_case_and_comments():
+    a = "SELECT * FROM s.t WHERE id = 42 AND code IN ('a', 'b') -- note\n LIMIT 10"
+    b = "select *  from s.t where id = 7 and code in ('x') limit 5;"
+    assert normalize_sql(a) == "select * from s.t where id = ? and code in (?) limit ?"
+    assert sql_fingerprint(a) == sql_fingerprint(b)
+    assert sql_fingerprint(a) != sql_fingerprint('SELECT * FROM s."T" WHERE id = 1')
+
+
+def test_default_then_history_estimate():
+    sql = "SELECT * FROM s.t LIMIT 10"
+    assert tp.choose_timeout(sql, tp.DBTimeBudget(20000)).source == "default"
+
+    tp.runtime_history.record(tp.history_key(sql), 0.5)
+    choice = tp.choose_timeout("select * from s.t limit 99", tp.DBTimeBudget(20000))
+    assert (choice.source, choice.timeout_ms) == ("history", 1500)
+
+
+def test_explain_estimate_is_used_and_cached(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tp, "explain_estimate_ms", lambda sql: calls.append(sql) or 4000.0)
+    sql = "SELECT count(*) FROM s.big LIMIT 10"
+    for _ in range(2):
+        choice = tp.choose_timeout(sql, tp.DBTimeBudget(20000))
+        assert (choice.source, choice.timeout_ms) == ("explain", 12000)
+    assert len(calls) == 1
+
+
+def test_explain_estimate_never_lowers_the_default(monkeypatch):
+    # uncalibrated cost factor: a cheap plan that really runs for 600 ms
+    monkeypatch.setattr(tp, "explain_estimate_ms", lambda sql: 1.0)
+    choice = tp.choose_timeout("SELECT * FROM s.cheap LIMIT 10", tp.DBTimeBudget(20000))
+    assert (choice.source, choice.timeout_ms) == ("explain", settings.PG_STATEMENT_TIMEOUT_MS)
+    assert choice.timeout_ms > 600
+
+
+def test_timeouts_escalate_within_the_request_budget():
+    sql = "SELECT * FROM s.slow LIMIT 10"
+    budget = tp.DBTimeBudget(3000)
+    first = tp.choose_timeout(sql, budget)
+    assert first.timeout_ms == settings.PG_STATEMENT_TIMEOUT_MS
+
+    budget.used_ms += first.timeout_ms
+    budget.timed_out(first.timeout_ms)
+    second = tp.choose_timeout(sql, budget)
+    # escalation asks for 2x, the remaining budget caps it
+    assert second.escalated and second.timeout_ms == 3000 - first.timeout_ms
+
+    budget.used_ms = 2900
+    assert tp.choose_timeout(sql, budget) is None
+
+
+def test_remembered_timeout_decays_after_fast_runs():
+    sql = "SELECT * FROM s.flaky LIMIT 10"
+    key = tp.history_key(sql)
+    tp.runtime_history.record(key, 4.0, timeout_ms=4000)
+    tp.runtime_history.record(key, 0.1)
+    assert tp.choose_timeout(sql, tp.DBTimeBudget(20000)).timeout_ms == 4000  # 2000 left * escalation 2
+
+    for _ in range(5):  # 2000 -> 1000 -> 500 -> 250 -> 125 -> dropped (below the 100 ms run)
+        tp.runtime_history.record(key, 0.1)
+    assert tp.runtime_history.estimate(key)[1] is None
+    assert tp.choose_timeout(sql, tp.DBTimeBudget(20000)).timeout_ms == 300  # 100 ms * headroom 3
+
+
+def test_cheap_correct_query_is_not_sent_to_the_fixer(monkeypatch):
+    import asyncio
+
+    import LLM.sql_pipeline as sql_pipeline
+    from DB.columnar import ColumnarResult
+    from DB.executor import DBTimeoutError
+
+    monkeypatch.setattr(tp, "explain_estimate_ms", lambda sql: 1.0)
+    timeouts = []
+
+    def fake_run_sql(sql, *, limit, timeout_ms, columnar):
+        timeouts.append(timeout_ms)
+        if timeout_ms < 600:  # the query really needs 600 ms
+            raise DBTimeoutError("canceling statement due to statement timeout")
+        return ColumnarResult(["n"], ["int8"], [(1,)])
+
+    async def fake_generate(llm, user_text, schema_text):
+        return {"sql": "SELECT count(*) AS n FROM s.cheap"}
+
+    async def no_fix(*a):
+        raise AssertionError("correct SQL sent to the LLM fixer")
+
+    monkeypatch.setattr(sql_pipeline, "_llm_generate", fake_generate)
+    monkeypatch.setattr(sql_pipeline, "_llm_fix", no_fix)
+    monkeypatch.setattr(sql_pipeline, "run_sql", fake_run_sql)
+    monkeypatch.setattr(sql_pipeline, "render_schema_for_prompt", lambda *a, **kw: "")
+
+    payload = asyncio.run(sql_pipeline.execute_with_retries(None, "how many", {}, columnar=True))
+    assert payload["ok"] and payload["attempts"] == []
+    assert timeouts == [settings.PG_STATEMENT_TIMEOUT_MS]
+
+
+def test_pipeline_chooses_the_timeout_off_the_event_loop(monkeypatch):
+    import asyncio
+    import threading
+
+    import LLM.sql_pipeline as sql_pipeline
+    from DB.columnar import ColumnarResult
+
+    threads = []
+
+    def fake_choose(sql, budget):
+        threads.append(threading.get_ident())
+        return tp.TimeoutChoice(500, "explain")
+
+    async def fake_generate(llm, user_text, schema_text):
+        return {"sql": "SELECT 1 AS n"}
+
+    monkeypatch.setattr(sql_pipeline, "_llm_generate", fake_generate)
+    monkeypatch.setattr(sql_pipeline, "choose_timeout", fake_choose)
+    monkeypatch.setattr(sql_pipeline, "run_sql", lambda sql, **kw: ColumnarResult(["n"], ["int4"], [(1,)]))
+    monkeypatch.setattr(sql_pipeline, "render_schema_for_prompt", lambda *a, **kw: "")
+
+    async def scenario():
+        payload = await sql_pipeline.execute_with_retries(None, "one", {}, columnar=True)
+        return payload, threading.get_ident()
+
+    payload, loop_thread = asyncio.run(scenario())
+    assert payload["ok"] and threads and loop_thread not in threads
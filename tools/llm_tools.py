@@ -1,23 +1,22 @@
 from __future__ import annotations
-import json
 from typing import Any, Optional
 from langchain_core.messages import SystemMessage, HumanMessage
 from DB.init_db import build_schema_context_from_db
 from store.SessionStore import session_store
-from RAG.schema_context import  compact_for_prompt
 from LLM.make_llm import make_llm
 from prompts.system_prompt import SYSTEM_PROMPT
 from LLM.query_analyze import analyze_query
 from DB.executor import *
 from LLM.sql_pipeline import execute_with_retries
 from langchain_core.messages import AIMessage
-from datetime import date, datetime
-from decimal import Decimal
 from API.config import settings
-from LLM.select_relevant_schema_with_llm import select_relevant_schema_with_llm
+from LLM.db_pipeline import run_db_pipeline
+from LLM.answer_renderer import answer_context, summarize_db_result
 from typing import Annotated
 from langchain_core.tools import tool, InjectedToolArg
-from typing import Any, Dict
+from typing import Any, Dict, List
+from DB.profiles import profile_registry
+from DB.row_encoding import dumps as dumps_json
 
 
 import logging
@@ -95,9 +94,21 @@ def _session_get(session_id: str, key: str, default: Any = None) -> Any:
     return _INMEM_STATE.get(session_id, {}).get(key, default)
 
 
+def forget_session(session_id: str) -> None:
+    """
+    Drops a session's state (last_sql, last_result, ...) and message histories:
+    throw-away sessions (API/batch.py chat mode) would otherwise keep full
+    result payloads for the life of the process.
+    """
+    _INMEM_STATE.pop(session_id, None)
+    if hasattr(session_store, "drop_session"):
+        session_store.drop_session(session_id)
+
+
 
 def _json(obj: Any) -> str:
-    return json.dumps(obj, ensure_ascii=False, indent=2)
+    # compact, one pass over the rows (DB/row_encoding.py)
+    return dumps_json(obj)
 
 
 # -----------------------------
@@ -176,7 +187,21 @@ async def db_healthcheck_tool() -> str:
 # -----------------------------
 # Tool: set_db_profile (no raw DSN)
 # -----------------------------
-ALLOWED_DB_PROFILES = {"dev", "prod"}  # настроишь под себя
+# профили = settings.DB_PROFILES + "default" (DATABASE_URL), см. DB/profiles.py
+def allowed_db_profiles() -> List[str]:
+    return profile_registry.names()
+
+
+def session_db_profile(session_id: Optional[str]) -> Optional[str]:
+    """
+    DB profile chosen in this session (set_db_profile), if it is still configured.
+    """
+    profile = _session_get(session_id, "db_profile")
+    if profile and profile not in allowed_db_profiles():
+        logger.warning("session db_profile %r is not configured; using default", profile)
+        return None
+    return profile
+
 
 @tool("set_db_profile")
 async def set_db_profile(
@@ -184,12 +209,13 @@ async def set_db_profile(
 ) -> str:
 
     """
-    Switches between preconfigured DB profiles (dev/prod).
+    Switches between preconfigured DB profiles (e.g. dev/prod).
     Does NOT accept raw connection strings.
     """
     session_id = current_session_id.get()
-    if profile not in ALLOWED_DB_PROFILES:
-        return _json({"mode": "set_db_profile", "ok": False, "error": f"Unknown profile: {profile}", "allowed": sorted(ALLOWED_DB_PROFILES)})
+    allowed = allowed_db_profiles()
+    if profile not in allowed:
+        return _json({"mode": "set_db_profile", "ok": False, "error": f"Unknown profile: {profile}", "allowed": allowed})
     _session_set(session_id, "db_profile", profile)
     return _json({"mode": "set_db_profile", "ok": True, "profile": profile})
 
@@ -232,61 +258,23 @@ async def db_query_chain(
     logger.info("db_query_chain tool is activated")
     llm = make_llm(model, temperature)
 
-    # 1) Analyze
-    analysis = await analyze_query(llm, user_text)
-    logger.info("analyzed query was executed")
-    # # 2) Build schema context from Chroma using metadata
-    # chroma = get_chroma()
-    # schema_full = build_schema_context(chroma, analysis)
-    # if not schema_full.get("tables"):
-    #     return _json({
-    #         "mode": "db_query_chain",
-    #         "ok": False,
-    #         "error": "No relevant tables found in schema RAG for this request.",
-    #         "analysis": analysis,
-    #     })
-    #
-    # schema_for_prompt = compact_for_prompt(schema_full)
-    # 2) Build schema context from DB (no Chroma)
-    schema_full = build_schema_context_from_db(settings.DATABASE_URL)
-    logger.info("analyzed query was executed")
-    if not schema_full.get("tables"):
-        return _json({
-            "mode": "db_query_chain",
-            "ok": False,
-            "error": "No tables found in database schema.",
-            "analysis": analysis,
-        })
-
-    schema_selected = await select_relevant_schema_with_llm(llm, analysis, schema_full)
-    logger.info("llm has selected relevant schemas")
-    schema_for_prompt = compact_for_prompt(schema_selected)
-    exec_res = await execute_with_retries(
-        llm=llm,
-        user_text=user_text,
-        schema_context=schema_for_prompt,
-        max_attempts=max_attempts,
-    )
-    logger.info("llm tryes to execute sql")
+    # analyze -> select tables -> SQL; identical in-flight questions share one run
+    payload = await run_db_pipeline(llm, user_text, max_attempts=max_attempts)
     # Persist last SQL for show_last_sql tool
-    if exec_res.get("ok") and exec_res.get("sql"):
-        _session_set(session_id, "last_sql", exec_res["sql"])
-        _session_set(session_id, "last_rows_preview", exec_res.get("rows_preview", []))
-        logger.info("llm has selected relevant schemas")
+    if payload.get("ok") and payload.get("sql"):
+        _session_set(session_id, "last_sql", payload["sql"])
+        _session_set(session_id, "last_rows_preview", payload.get("result") or payload.get("rows_preview", []))
         session_store.append_messages(
             session_id,
             "sql",
-            [AIMessage(content=exec_res.get("sql"))]
+            [AIMessage(content=payload.get("sql"))]
         )
 
-    payload = {
-        "mode": "db_query_chain",
-        "analysis": analysis,
-        "schema_selected": schema_full.get("retrieval_debug", {}),
-        **exec_res,
-    }
     try:
-        return _json(make_json_safe(payload))
+        text = _json(payload)
+        # kept for the optional LLM summary follow-up (summarize_last_result)
+        _session_set(session_id, "last_result", {"user_text": user_text, **payload})
+        return text
     except Exception:
         logger.exception("db_query_chain: failed to serialize response payload")
         # Last-resort minimal response (never fail tool)
@@ -298,20 +286,26 @@ async def db_query_chain(
 
 
 
-def json_default(o: Any):
-    if isinstance(o, (datetime, date)):
-        return o.isoformat()
-    if isinstance(o, Decimal):
-        return float(o)
-    if isinstance(o, set):
-        return list(o)
-    return str(o)
-
-def make_json_safe(data: Any) -> Any:
+# -----------------------------
+# Tool: summarize_last_result (optional LLM follow-up to a rendered result)
+# -----------------------------
+@tool("summarize_last_result")
+async def summarize_last_result(model: Optional[str] = None, temperature: Optional[float] = None) -> str:
     """
-    Converts arbitrary nested data into JSON-serializable structures.
+    Use this tool WHEN the user asks to summarize, explain or describe in words
+    the result of the previous database query
+    ("summarize it", "what does this table show?", "explain the result").
+
+    Does NOT run a new query.
     """
-    return json.loads(json.dumps(data, default=json_default, ensure_ascii=False))
+    session_id = current_session_id.get()
+    last = _session_get(session_id, "last_result")
+    if not last:
+        return _json({"mode": "summarize_last_result", "ok": False, "message": "No query result yet."})
+
+    llm = make_llm(model, temperature)
+    summary = await summarize_db_result(llm, last.get("user_text", ""), _json(answer_context(last)))
+    return _json({"mode": "summarize_last_result", "ok": True, "summary": summary})
 
 
 
@@ -322,6 +316,7 @@ TOOLS = [
     conversation_chain,
     db_query_chain,
     show_last_sql,
+    summarize_last_result,
     db_healthcheck_tool,
     set_db_profile,
 ]